@@ -68,6 +68,25 @@ function create_s3_bucket() {
     fi
 }
 
+function package_lambda() {
+    local code_zip=$1
+    local requirements=$2
+    local build_dir
+
+    # Install into a scratch copy so one zip's dependencies never leak into another
+    build_dir=$(mktemp -d)
+    cp -r ../lambda/. "$build_dir"
+    rm -f ./${code_zip}
+
+    # Binary wheels for the Lambda runtime (Pillow ships compiled codecs), not the build host
+    LAMBDA_PYTHON="${DEFAULT_PYTHON_RUNTIME:-python3.12}"
+    pip3 install -r ../lambda/${requirements} --target "$build_dir" \
+        --platform manylinux2014_x86_64 --implementation cp \
+        --python-version "${LAMBDA_PYTHON#python}" --only-binary=:all:
+    (cd "$build_dir" && zip -q -r - .) > ./${code_zip}
+    rm -rf "$build_dir"
+}
+
 function deploy() {
     echo "=== Environment Variables ==="
     echo "PROJECT_NAME: $PROJECT_NAME"
@@ -82,24 +101,19 @@ function deploy() {
     NOW=$(date "+%Y%m%d_%H%M%S")
     CODE_PATH="${ENV}/${NOW}"
 
-    # Package sources and dependencies
+    # Package sources and dependencies; only the image variants function
+    # gets Pillow, so every other function keeps a small zip
     CODE_ZIP="portfolio.zip"
-    pushd ../
-    rm -rf ./cloudformation/${CODE_ZIP}
-    
-    pushd ./lambda
-
-    pip3 install -r ./requirements.txt --target ./
-    zip -q ../cloudformation/${CODE_ZIP} -r .
-    popd
-
-    popd
+    VARIANTS_CODE_ZIP="portfolio-variants.zip"
+    package_lambda ${CODE_ZIP} requirements.txt
+    package_lambda ${VARIANTS_CODE_ZIP} requirements-variants.txt
 
     # Prepare upload bucket
     exist_s3_bucket ${CODE_BUCKET} ${REGION} ${AWS_PROFILE} || create_s3_bucket ${CODE_BUCKET} ${REGION} ${AWS_PROFILE}
 
     # Upload to s3 (code)
     aws --region ${REGION} ${AWS_PROFILE_OPTION} s3 cp ../cloudformation/${CODE_ZIP} s3://${CODE_BUCKET}/${CODE_PATH}/${CODE_ZIP}
+    aws --region ${REGION} ${AWS_PROFILE_OPTION} s3 cp ../cloudformation/${VARIANTS_CODE_ZIP} s3://${CODE_BUCKET}/${CODE_PATH}/${VARIANTS_CODE_ZIP}
 
     # Clean up any obsolete changesets first
     echo "Cleaning up old changesets..."
@@ -135,6 +149,7 @@ function deploy() {
                 Env=${ENV} \
                 CodeBucket=${CODE_BUCKET} \
                 CodePath="${CODE_PATH}/${CODE_ZIP}" \
+                VariantsCodePath="${CODE_PATH}/${VARIANTS_CODE_ZIP}" \
                 PythonRuntime=${DEFAULT_PYTHON_RUNTIME} \
                 ApiHostname=${API_HOSTNAME} \
                 ApiCertificateArn=${API_ACM_CERTIFICATE_ARN} \
@@ -1,79 +1,90 @@
+import base64
 import json
-import boto3
+from common import aws
 import os
+import random
+import time
 from datetime import datetime, timezone
-from typing import Dict, Any
+from typing import Dict, Any, List
 import uuid
+from analytics.records import encode_record
+from common.rollups import apply_rollups
+from common.utils import get_header
+
+# Limits for one request; BatchWriteItem itself takes at most 25 items
+MAX_EVENTS_PER_REQUEST = 100
+BATCH_WRITE_LIMIT = 25
+# Limits for one event. page_path is a GSI key, so it is rejected rather
+# than truncated; free text is cut to size
+MAX_KEY_LENGTHS = {
+    'event_type': 32,
+    'page_path': 1024,
+    'session_id': 128,
+    'user_id': 128,
+}
+MAX_TEXT_LENGTHS = {
+    'page_title': 300,
+    'referrer': 1024,
+}
+MAX_BATCH_RETRIES = 5
+BASE_BACKOFF_SECONDS = 0.05
+
+CORS_HEADERS = {
+    'Content-Type': 'application/json',
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'Content-Type,Authorization',
+    'Access-Control-Allow-Methods': 'POST,OPTIONS'
+}
 
 def lambda_handler(event, context):
     """
     Lambda handler for tracking analytics events
-    This endpoint receives page views, user interactions, etc.
+    This endpoint receives page views, user interactions, etc. either one
+    event per request or an array of events batched by the client
+    (including navigator.sendBeacon text/plain bodies)
     """
-    
+
     # Handle OPTIONS request for CORS
     if event.get('httpMethod') == 'OPTIONS':
         return {
             'statusCode': 200,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Content-Type,Authorization',
-                'Access-Control-Allow-Methods': 'POST,OPTIONS'
-            },
+            'headers': CORS_HEADERS,
             'body': ''
         }
-    
+
     try:
-        # Get DynamoDB table
-        dynamodb = boto3.resource('dynamodb')
-        analytics_table = dynamodb.Table(os.environ['ANALYTICS_TABLE'])
-        
-        # Parse the request
-        body = json.loads(event.get('body', '{}'))
-        
-        # Extract analytics data
-        event_type = body.get('event_type', 'page_view')
-        page_path = body.get('page_path', '/')
-        page_title = body.get('page_title', '')
-        user_agent = event.get('headers', {}).get('User-Agent', '')
-        ip_address = event.get('requestContext', {}).get('identity', {}).get('sourceIp', '')
-        referrer = body.get('referrer', '')
-        session_id = body.get('session_id', str(uuid.uuid4()))
-        user_id = body.get('user_id', None)  # For authenticated users
-        
-        # Create analytics record
-        timestamp = datetime.now(timezone.utc).isoformat()
-        analytics_record = {
-            'id': str(uuid.uuid4()),
-            'timestamp': timestamp,
-            'date': datetime.now(timezone.utc).strftime('%Y-%m-%d'),
-            'hour': datetime.now(timezone.utc).strftime('%Y-%m-%d-%H'),
-            'event_type': event_type,
-            'page_path': page_path,
-            'page_title': page_title,
-            'user_agent': user_agent,
-            'ip_address': ip_address,
-            'referrer': referrer,
-            'session_id': session_id,
-            'user_id': user_id,
-            'ttl': int((datetime.now(timezone.utc).timestamp() + (365 * 24 * 60 * 60)))  # 1 year TTL
+        events = parse_events(event)
+    except ValueError as e:
+        return {
+            'statusCode': 400,
+            'headers': CORS_HEADERS,
+            'body': json.dumps({'error': str(e)})
         }
-        
-        # Store in DynamoDB
-        analytics_table.put_item(Item=analytics_record)
-        
+
+    try:
+        analytics_table = aws.dynamodb().Table(os.environ['ANALYTICS_TABLE'])
+
+        # Request-level context shared by every event in the batch
+        user_agent = get_header(event, 'User-Agent') or ''
+        ip_address = event.get('requestContext', {}).get('identity', {}).get('sourceIp', '')
+        records = [build_record(body, user_agent, ip_address) for body in events]
+
+        # Store compact items in DynamoDB, 25 per BatchWriteItem
+        batch_write(analytics_table.name, [encode_record(record) for record in records])
+
+        # Keep the days' dashboard rollups current
+        rollup_table_name = os.environ.get('ANALYTICS_ROLLUP_TABLE')
+        page_views = [record for record in records if record['event_type'] == 'page_view']
+        if rollup_table_name and page_views:
+            apply_rollups(aws.dynamodb().Table(rollup_table_name), page_views)
+
+        # Nothing for the client to read; beacons ignore the response anyway
         return {
-            'statusCode': 200,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Content-Type,Authorization',
-                'Access-Control-Allow-Methods': 'POST,OPTIONS'
-            },
-            'body': json.dumps({'message': 'Analytics event tracked successfully'})
+            'statusCode': 204,
+            'headers': CORS_HEADERS,
+            'body': ''
         }
-        
+
     except Exception as e:
         print(f"Error tracking analytics: {str(e)}")
         return {
@@ -86,4 +97,106 @@ def lambda_handler(event, context):
                 'error': 'Failed to track analytics event',
                 'message': str(e)
             })
-        }
\ No newline at end of file
+        }
+
+def parse_events(event: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Return the checked events in the request body. Accepts a single event
+    object, an array of events, or {"events": [...]}; sendBeacon posts the
+    same JSON as text/plain, possibly base64-encoded by API Gateway.
+    Malformed events are dropped; ValueError if none are left
+    """
+    raw = event.get('body') or '{}'
+    if event.get('isBase64Encoded'):
+        raw = base64.b64decode(raw).decode('utf-8')
+    try:
+        body = json.loads(raw)
+    except json.JSONDecodeError:
+        raise ValueError('Request body must be JSON')
+
+    if isinstance(body, dict) and isinstance(body.get('events'), list):
+        body = body['events']
+    events = body if isinstance(body, list) else [body]
+    if not events:
+        raise ValueError('Expected an event object or a non-empty array of events')
+    if len(events) > MAX_EVENTS_PER_REQUEST:
+        raise ValueError(f'At most {MAX_EVENTS_PER_REQUEST} events per request')
+
+    # Drop only the malformed events, before anything is written, so one
+    # bad event can't fail a whole BatchWriteItem halfway through
+    valid, problems = [], []
+    for item in events:
+        try:
+            valid.append(clean_event(item))
+        except ValueError as e:
+            problems.append(str(e))
+    if problems:
+        print(f"Dropped {len(problems)} of {len(events)} analytics events: {'; '.join(sorted(set(problems)))}")
+    if not valid:
+        raise ValueError(problems[0])
+    return valid
+
+def clean_event(body: Any) -> Dict[str, Any]:
+    """
+    Check one client event's fields and fill in defaults. Raises
+    ValueError for anything DynamoDB would reject or that can't be keyed
+    """
+    if not isinstance(body, dict):
+        raise ValueError('Each event must be an object')
+    event = {
+        'event_type': body.get('event_type') or 'page_view',
+        'page_path': body.get('page_path') or '/',
+        'session_id': body.get('session_id') or str(uuid.uuid4()),
+        'user_id': body.get('user_id') or None,
+    }
+    for field, limit in MAX_KEY_LENGTHS.items():
+        value = event[field]
+        if value is None:
+            continue
+        if not isinstance(value, str) or not value.strip():
+            raise ValueError(f'{field} must be a non-empty string')
+        if len(value) > limit:
+            raise ValueError(f'{field} must be at most {limit} characters')
+        event[field] = value.strip()
+    for field, limit in MAX_TEXT_LENGTHS.items():
+        value = body.get(field) or ''
+        if not isinstance(value, str):
+            raise ValueError(f'{field} must be a string')
+        event[field] = value.strip()[:limit]
+    return event
+
+def build_record(body: Dict[str, Any], user_agent: str, ip_address: str) -> Dict[str, Any]:
+    """Create the long-form analytics record for one event checked by clean_event"""
+    now = datetime.now(timezone.utc)
+    return {
+        'id': str(uuid.uuid4()),
+        'timestamp': now.isoformat(),
+        'date': now.strftime('%Y-%m-%d'),
+        'hour': now.strftime('%Y-%m-%d-%H'),
+        'event_type': body['event_type'],
+        'page_path': body['page_path'],
+        'page_title': body['page_title'],
+        'user_agent': user_agent,
+        'ip_address': ip_address,
+        'referrer': body['referrer'],
+        'session_id': body['session_id'],
+        'user_id': body['user_id'],  # For authenticated users
+        'ttl': int(now.timestamp() + (365 * 24 * 60 * 60))  # 1 year TTL
+    }
+
+def batch_write(table_name: str, items: List[Dict[str, Any]]) -> None:
+    """
+    Write items with BatchWriteItem, retrying UnprocessedItems with
+    exponential backoff and jitter until they land or retries run out
+    """
+    for start in range(0, len(items), BATCH_WRITE_LIMIT):
+        request = {table_name: [{'PutRequest': {'Item': item}} for item in items[start:start + BATCH_WRITE_LIMIT]]}
+        for attempt in range(MAX_BATCH_RETRIES + 1):
+            response = aws.dynamodb().batch_write_item(RequestItems=request)
+            request = response.get('UnprocessedItems')
+            if not request:
+                break
+            if attempt < MAX_BATCH_RETRIES:
+                time.sleep(BASE_BACKOFF_SECONDS * (2 ** attempt) * (1 + random.random()))
+        else:
+            raise RuntimeError(f"{len(request[table_name])} analytics events left unprocessed after retries")
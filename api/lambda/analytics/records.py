@@ -0,0 +1,207 @@
+"""
+Compact storage encoding for analytics events.
+
+The tracker used to store every event with long attribute names, the
+full User-Agent and referrer, and the time three times over (timestamp,
+date and hour). Compact records keep only:
+
+- the key and GSI attributes under their existing names: ``id``,
+  ``date``, ``timestamp`` (second precision) and ``page_path``;
+- ``date`` is write-sharded as ``YYYY-MM-DD#N`` so a busy day spreads
+  over ``ANALYTICS_DATE_SHARDS`` partitions of ``date_timestamp_index``
+  instead of one hot key;
+- ``ttl``, which the table's TTL setting points at;
+- short attribute names for everything else, with the user agent
+  classified at ingest into browser family and device codes, and the
+  referrer reduced to its host plus a traffic source code.
+
+Readers call :func:`decode_record`, which turns both compact and legacy
+items into the same long-form dict, so old events keep working until
+their TTL removes them.
+"""
+
+import os
+import zlib
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from boto3.dynamodb.conditions import Attr
+
+from common.traffic import classify_referrer
+
+EVENT_CODES = {
+    "page_view": "pv",
+    "click": "c",
+    "scroll": "s",
+    "download": "d",
+    "form_submit": "f",
+}
+SOURCE_CODES = {
+    "Direct": "d",
+    "Organic Search": "o",
+    "Social Media": "s",
+    "Referral": "r",
+}
+BROWSER_CODES = {
+    "Chrome": "c",
+    "Safari": "s",
+    "Firefox": "f",
+    "Edge": "e",
+    "Opera": "o",
+    "Bot": "b",
+    "Other": "x",
+}
+DEVICE_CODES = {
+    "Desktop": "d",
+    "Mobile": "m",
+    "Tablet": "t",
+    "Bot": "b",
+}
+_DECODE = {
+    "e": {code: name for name, code in EVENT_CODES.items()},
+    "rc": {code: name for name, code in SOURCE_CODES.items()},
+    "b": {code: name for name, code in BROWSER_CODES.items()},
+    "dv": {code: name for name, code in DEVICE_CODES.items()},
+}
+
+# Long field name -> compact attribute(s) that carry it
+SHORT_NAMES = {
+    "event_type": ("e",),
+    "page_title": ("t",),
+    "session_id": ("s",),
+    "user_id": ("u",),
+    "ip_address": ("ip",),
+    "referrer": ("rh", "rc"),
+    "user_agent": ("b", "dv"),
+}
+
+BOT_MARKERS = ("bot", "crawl", "spider", "slurp", "headless")
+
+# Readers query every shard below this count, so it may grow but never shrink
+DATE_SHARDS = max(int(os.getenv("ANALYTICS_DATE_SHARDS", "4")), 1)
+SHARD_SEPARATOR = "#"
+
+# Matches page views in both encodings
+PAGE_VIEW_FILTER = Attr("event_type").eq("page_view") | Attr("e").eq(EVENT_CODES["page_view"])
+
+
+def classify_user_agent(user_agent: str) -> Tuple[str, str]:
+    """Return ``(browser family, device)`` for a User-Agent header."""
+    ua = (user_agent or "").lower()
+    if not ua or any(marker in ua for marker in BOT_MARKERS):
+        return ("Bot", "Bot") if ua else ("Other", "Desktop")
+    # Order matters: Edge and Opera also claim Chrome, Chrome claims Safari
+    if "edg/" in ua or "edga/" in ua or "edgios/" in ua:
+        family = "Edge"
+    elif "opr/" in ua or "opera" in ua:
+        family = "Opera"
+    elif "firefox/" in ua or "fxios/" in ua:
+        family = "Firefox"
+    elif "chrome/" in ua or "crios/" in ua:
+        family = "Chrome"
+    elif "safari/" in ua:
+        family = "Safari"
+    else:
+        family = "Other"
+    if "ipad" in ua or "tablet" in ua:
+        device = "Tablet"
+    elif "mobi" in ua or "iphone" in ua or "android" in ua:
+        device = "Mobile"
+    else:
+        device = "Desktop"
+    return family, device
+
+
+def referrer_host(referrer: str) -> str:
+    """Host of a referrer URL without a leading ``www.``."""
+    host = urlparse((referrer or "").strip()).hostname or ""
+    return host[4:] if host.startswith("www.") else host
+
+
+def date_shard_key(day: str, shard: int) -> str:
+    return f"{day}{SHARD_SEPARATOR}{shard}"
+
+
+def date_keys(day: str, shards: Optional[int] = None) -> List[str]:
+    """Every ``date`` GSI key a day's events can live under, legacy unsharded key first."""
+    return [day] + [date_shard_key(day, shard) for shard in range(shards or DATE_SHARDS)]
+
+
+def shard_for(event_id: str, shards: int) -> int:
+    # crc32 rather than hash(), which is salted per process
+    return zlib.crc32(event_id.encode("utf-8")) % shards
+
+
+def encode_record(record: Dict, shards: Optional[int] = None) -> Dict:
+    """Build the stored item for a long-form event record."""
+    when = datetime.fromisoformat(record["timestamp"])
+    shards = shards or DATE_SHARDS
+    item = {
+        "id": record["id"],
+        "date": date_shard_key(record["date"], shard_for(record["id"], shards)),
+        "timestamp": when.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "page_path": record.get("page_path") or "/",
+        "e": EVENT_CODES.get(record["event_type"], record["event_type"]),
+        "rc": SOURCE_CODES[record.get("source") or classify_referrer(record.get("referrer"))],
+        "ttl": record["ttl"],
+    }
+    family, device = classify_user_agent(record.get("user_agent"))
+    item["b"] = BROWSER_CODES[family]
+    item["dv"] = DEVICE_CODES[device]
+    # Empty values are simply left out
+    optional = {
+        "t": record.get("page_title"),
+        "s": record.get("session_id"),
+        "u": record.get("user_id"),
+        "ip": record.get("ip_address"),
+        "rh": referrer_host(record.get("referrer")),
+    }
+    item.update({name: value for name, value in optional.items() if value})
+    return item
+
+
+def decode_record(item: Dict) -> Dict:
+    """Return the long-form view of a stored item in either encoding."""
+    if "e" not in item:
+        return item
+    record = {
+        "id": item.get("id"),
+        "date": (item.get("date") or "").split(SHARD_SEPARATOR, 1)[0],
+        "timestamp": item.get("timestamp"),
+        "page_path": item.get("page_path", "/"),
+        "event_type": _DECODE["e"].get(item["e"], item["e"]),
+        "page_title": item.get("t", ""),
+        "session_id": item.get("s", ""),
+        "user_id": item.get("u"),
+        "ip_address": item.get("ip", ""),
+        "referrer": item.get("rh", ""),
+        "source": _DECODE["rc"].get(item.get("rc")),
+        "browser": _DECODE["b"].get(item.get("b")),
+        "device": _DECODE["dv"].get(item.get("dv")),
+    }
+    if "ttl" in item:
+        record["ttl"] = item["ttl"]
+    return record
+
+
+def decode_records(items: Iterable[Dict]):
+    return [decode_record(item) for item in items]
+
+
+def projection(*fields: str) -> Dict:
+    """
+    ProjectionExpression kwargs that fetch ``fields`` in both encodings.
+
+    Every name goes through a placeholder, since several of the short and
+    long names (``date``, ``timestamp``, ``hour``) are reserved words.
+    """
+    names = []
+    for field in fields:
+        names.append(field)
+        names.extend(SHORT_NAMES.get(field, ()))
+    placeholders = {f"#f{i}": name for i, name in enumerate(dict.fromkeys(names))}
+    return {
+        "ProjectionExpression": ", ".join(placeholders),
+        "ExpressionAttributeNames": placeholders,
+    }
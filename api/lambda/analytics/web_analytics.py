@@ -1,10 +1,36 @@
+import functools
+import heapq
 import json
-import boto3
+import time
 from datetime import datetime, timedelta, timezone
-from typing import Dict, List, Any
+from typing import Dict, Iterable, Iterator, List, Any
 import os
-from collections import defaultdict, Counter
-from boto3.dynamodb.conditions import Key, Attr
+from collections import Counter
+from boto3.dynamodb.conditions import Key
+from common.hyperloglog import HyperLogLog
+from analytics.records import PAGE_VIEW_FILTER, date_keys, decode_records, projection
+from common import aws
+from common.cache import DayRollupCache
+from common.rollups import compute_rollups, load_rollups
+from common.scan import parallel_pages
+
+DATE_INDEX = 'date_timestamp_index'
+# Upper bound on concurrent per-day queries (90d is the longest range)
+MAX_QUERY_WORKERS = 16
+# Query pages waiting to be aggregated; bounds memory on busy ranges
+MAX_BUFFERED_PAGES = 8
+# A day counts as closed once this long past its end, so events in flight
+# at midnight still land before it is cached for good
+DAY_CLOSE_GRACE = timedelta(minutes=10)
+
+# How long today's figures may be served from memory before re-reading
+LIVE_CACHE_SECONDS = int(os.getenv('ANALYTICS_CACHE_SECONDS', '60'))
+
+# Daily rollups reused across warm invocations; only open days are re-read
+rollup_cache = DayRollupCache(live_ttl=LIVE_CACHE_SECONDS)
+# Assembled dashboard responses by (first date, days, source), so refreshes
+# within LIVE_CACHE_SECONDS skip both the reads and the merging
+recent_responses: Dict[tuple, tuple] = {}
 
 def lambda_handler(event, context):
     """
@@ -26,7 +52,7 @@ def lambda_handler(event, context):
     
     try:
         # Get DynamoDB table
-        dynamodb = boto3.resource('dynamodb')
+        dynamodb = aws.dynamodb()
         analytics_table = dynamodb.Table(os.environ['ANALYTICS_TABLE'])
         
         # Get query parameters
@@ -37,8 +63,8 @@ def lambda_handler(event, context):
         days = parse_date_range(date_range)
         start_date = datetime.now(timezone.utc) - timedelta(days=days)
         
-        # Query analytics data
-        analytics_data = get_real_analytics_data(analytics_table, start_date, days)
+        rollup_table_name = os.getenv('ANALYTICS_ROLLUP_TABLE')
+        analytics_data = get_analytics_data(dynamodb, rollup_table_name, analytics_table, start_date, days)
         
         return {
             'statusCode': 200,
@@ -75,98 +101,179 @@ def parse_date_range(date_range: str) -> int:
     }
     return range_map.get(date_range, 7)
 
+def range_dates(start_date: datetime) -> List[str]:
+    """Every UTC date from start_date through today"""
+    end_date = datetime.now(timezone.utc)
+    return [
+        (start_date + timedelta(days=offset)).strftime('%Y-%m-%d')
+        for offset in range((end_date.date() - start_date.date()).days + 1)
+    ]
+
+def get_analytics_data(dynamodb, rollup_table_name, analytics_table,
+                       start_date: datetime, days: int) -> Dict[str, Any]:
+    """
+    Dashboard data for the range, from a recent response when one is fresh
+    """
+    key = (start_date.strftime('%Y-%m-%d'), days, rollup_table_name)
+    now = time.time()
+    cached = recent_responses.get(key)
+    if cached and now - cached[0] < LIVE_CACHE_SECONDS:
+        return cached[1]
+
+    # Read the daily rollups when enabled, else query the raw events
+    if rollup_table_name:
+        analytics_data = get_rollup_analytics_data(dynamodb, rollup_table_name, analytics_table, start_date, days)
+    else:
+        analytics_data = get_real_analytics_data(analytics_table, start_date, days)
+
+    for stale in [k for k, (at, _) in recent_responses.items() if now - at >= LIVE_CACHE_SECONDS]:
+        del recent_responses[stale]
+    # Empty data may just be a failed read, so it is never reused
+    if analytics_data['totalPageViews']:
+        recent_responses[key] = (now, analytics_data)
+    return analytics_data
+
+def closed_before() -> str:
+    """First UTC date that may still receive events"""
+    return (datetime.now(timezone.utc) - DAY_CLOSE_GRACE).strftime('%Y-%m-%d')
+
+def cached_rollups(dates: List[str], load) -> Dict[str, Dict]:
+    """
+    Rollups for dates, reading only the days rollup_cache doesn't hold
+    through load(missing_dates) -> {date: rollup}; days without traffic
+    are absent from both
+    """
+    found, missing = rollup_cache.get_many(dates)
+    if missing:
+        loaded = load(missing)
+        cutoff = closed_before()
+        for date in missing:
+            rollup_cache.put(date, loaded.get(date), cutoff)
+            found[date] = loaded.get(date)
+    return {date: rollup for date, rollup in found.items() if rollup}
+
+def get_rollup_analytics_data(dynamodb, rollup_table_name: str, analytics_table,
+                              start_date: datetime, days: int) -> Dict[str, Any]:
+    """
+    Get analytics data from the daily rollups: one item per closed day of
+    the range, plus the shards of open days. Closed days come from
+    rollup_cache once loaded, so a warm container usually reads just
+    today's shards
+    """
+    try:
+        # Closed days still in shards (or holding raw session ids) are compacted
+        rollups = cached_rollups(
+            range_dates(start_date),
+            lambda missing: load_rollups(dynamodb, rollup_table_name, missing, compact_before=closed_before()),
+        )
+        return process_rollups(rollups, days)
+    except Exception as e:
+        print(f"Error reading analytics rollups, falling back to raw events: {str(e)}")
+        return get_real_analytics_data(analytics_table, start_date, days)
+
 def get_real_analytics_data(analytics_table, start_date: datetime, days: int) -> Dict[str, Any]:
     """
     Get real analytics data from DynamoDB
     """
     try:
-        # Query analytics data for the date range
-        start_date_str = start_date.strftime('%Y-%m-%d')
-        end_date_str = datetime.now(timezone.utc).strftime('%Y-%m-%d')
-        
-        # Scan the table for the date range (in production, use GSI for better performance)
-        response = analytics_table.scan(
-            FilterExpression=Attr('date').between(start_date_str, end_date_str) & 
-                           Attr('event_type').eq('page_view')
-        )
-        
-        items = response['Items']
-        
-        # Continue scanning if there are more items
-        while 'LastEvaluatedKey' in response:
-            response = analytics_table.scan(
-                FilterExpression=Attr('date').between(start_date_str, end_date_str) & 
-                               Attr('event_type').eq('page_view'),
-                ExclusiveStartKey=response['LastEvaluatedKey']
-            )
-            items.extend(response['Items'])
-        
-        return process_analytics_data(items, days)
+        rollups = cached_rollups(range_dates(start_date), lambda missing: query_rollups(analytics_table, missing))
+        return process_rollups(rollups, days)
         
     except Exception as e:
         print(f"Error querying analytics data: {str(e)}")
         # Return empty data if there's an error
         return generate_empty_analytics_data(days)
 
-def process_analytics_data(items: List[Dict], days: int) -> Dict[str, Any]:
+def query_rollups(analytics_table, dates: List[str]) -> Dict[str, Dict]:
     """
-    Process raw analytics data into dashboard format
+    Build the daily rollups of dates from the raw events. One Query per day
+    and date shard on the date GSI, run concurrently; pages are folded into
+    the rollups as they arrive and then dropped, so memory stays flat
+    however busy the range was
     """
-    if not items:
+    keys = [key for date in dates for key in date_keys(date)]
+    table = aws.thread_safe(analytics_table)
+    pages = parallel_pages(
+        [functools.partial(query_day_pages, table, key) for key in keys],
+        max_workers=min(len(keys), MAX_QUERY_WORKERS),
+        max_buffered_pages=MAX_BUFFERED_PAGES,
+    )
+    return compute_rollups(item for page in pages for item in page)
+
+def query_day_pages(analytics_table, date_key: str) -> Iterator[List[Dict]]:
+    """
+    Yield the page views under one date GSI key (a day shard such as
+    2024-05-01#2, or a bare day for events written before sharding) a page
+    at a time, projecting only the fields process_analytics_data reads
+    """
+    kwargs = {
+        'IndexName': DATE_INDEX,
+        'KeyConditionExpression': Key('date').eq(date_key),
+        'FilterExpression': PAGE_VIEW_FILTER,
+        **projection('date', 'timestamp', 'hour', 'session_id', 'page_path', 'page_title', 'referrer'),
+    }
+    response = analytics_table.query(**kwargs)
+    yield decode_records(response['Items'])
+    while 'LastEvaluatedKey' in response:
+        response = analytics_table.query(ExclusiveStartKey=response['LastEvaluatedKey'], **kwargs)
+        yield decode_records(response['Items'])
+
+def query_day(analytics_table, date: str) -> Iterator[Dict]:
+    """Yield one day's page views across all its shards, in timestamp order"""
+    shards = [
+        (item for page in query_day_pages(analytics_table, key) for item in page)
+        for key in date_keys(date)
+    ]
+    # Each shard is already sorted by the GSI's timestamp range key
+    yield from heapq.merge(*shards, key=lambda item: item.get('timestamp') or '')
+
+def process_analytics_data(items: Iterable[Dict], days: int) -> Dict[str, Any]:
+    """
+    Process raw analytics data into dashboard format in a single pass
+    """
+    return process_rollups(compute_rollups(items), days)
+
+def process_rollups(rollups: Dict[str, Dict], days: int) -> Dict[str, Any]:
+    """
+    Process daily rollups into dashboard format
+    """
+    if not any(rollup['views'] for rollup in rollups.values()):
         return generate_empty_analytics_data(days)
     
     # Calculate basic metrics
-    total_page_views = len(items)
-    unique_visitors = len(set(item.get('session_id', '') for item in items))
-    
-    # Calculate daily stats
-    daily_stats = defaultdict(lambda: {'views': 0, 'visitors': set()})
+    total_page_views = sum(rollup['views'] for rollup in rollups.values())
+    visitors = HyperLogLog()
     page_views = Counter()
+    page_titles = {}
     referrers = Counter()
     
-    for item in items:
-        date = item.get('date', '')
-        session_id = item.get('session_id', '')
-        page_path = item.get('page_path', '/')
-        page_title = item.get('page_title', 'Unknown')
-        referrer = item.get('referrer', '')
-        
-        # Daily stats
-        daily_stats[date]['views'] += 1
-        daily_stats[date]['visitors'].add(session_id)
-        
-        # Page views
-        page_views[(page_path, page_title)] += 1
-        
-        # Referrers
-        if referrer and referrer.strip():
-            if 'google' in referrer.lower():
-                referrers['Organic Search'] += 1
-            elif any(social in referrer.lower() for social in ['facebook', 'twitter', 'linkedin', 'instagram']):
-                referrers['Social Media'] += 1
-            else:
-                referrers['Referral'] += 1
-        else:
-            referrers['Direct'] += 1
+    for date in sorted(rollups):
+        rollup = rollups[date]
+        visitors.merge(rollup['visitors'])
+        page_views.update(rollup['pages'])
+        # Later days win, so a renamed page shows its current title
+        page_titles.update(rollup['titles'])
+        referrers.update(rollup['sources'])
+    unique_visitors = visitors.estimate()
     
     # Convert daily stats to list
     daily_stats_list = []
     for i in range(days):
         date = (datetime.now(timezone.utc) - timedelta(days=days-1-i)).strftime('%Y-%m-%d')
-        stats = daily_stats.get(date, {'views': 0, 'visitors': set()})
+        rollup = rollups.get(date)
         daily_stats_list.append({
             'date': date,
-            'views': stats['views'],
-            'visitors': len(stats['visitors'])
+            'views': rollup['views'] if rollup else 0,
+            'visitors': rollup['visitors'].estimate() if rollup else 0
         })
     
     # Top pages
     top_pages = []
-    for (path, title), views in page_views.most_common(5):
+    for path, views in page_views.most_common(5):
         top_pages.append({
             'path': path,
             'views': views,
-            'title': title or path.split('/')[-1].replace('-', ' ').title()
+            'title': page_titles.get(path) or path.split('/')[-1].replace('-', ' ').title()
         })
     
     # Traffic sources
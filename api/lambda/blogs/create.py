@@ -2,13 +2,13 @@ import os
 import json
 import uuid
 from datetime import datetime
-import boto3
-from common.utils import build_response
+from common import aws
+from common.utils import build_response, build_excerpt, estimate_reading_time
 from common.contsants import StatusCodes, Headers
+from common.snapshots import write_blog_snapshot
+from common.blog_stats import apply_stats_delta
 import logging
 
-dynamodb = boto3.resource("dynamodb")
-
 
 logger = logging.getLogger(__name__)
 
@@ -43,7 +43,7 @@ def lambda_handler(event, context):
         title = body.get("title", "").strip()
         content = body.get("content", "").strip()
         tags = body.get("tags", [])
-        reading_time = body.get("reading_time", 1)
+        reading_time = body.get("reading_time") or estimate_reading_time(content)
         blog_status = body.get("status", "draft")  # Default to draft
 
         # For drafts, only title is required. For published posts, both title and content are required.
@@ -73,6 +73,7 @@ def lambda_handler(event, context):
             "author": user_id,
             "title": title,
             "content": content or "<p></p>",  # Default empty content for drafts
+            "excerpt": build_excerpt(content),
             "tags": tags,
             "reading_time": reading_time,
             "images": body.get("images", []),  # expect list of image URLs (S3)
@@ -84,9 +85,18 @@ def lambda_handler(event, context):
             "published_at": published_at_value,
         }
 
-        table = dynamodb.Table(BLOGS_TABLE)
+        table = aws.dynamodb().Table(BLOGS_TABLE)
         table.put_item(Item=item)
 
+        stats_table_name = os.getenv("BLOG_STATS_TABLE")
+        if stats_table_name:
+            apply_stats_delta(aws.dynamodb().Table(stats_table_name), user_id, None, item)
+
+        media_bucket = os.getenv("MEDIA_BUCKET")
+        if media_bucket and blog_status == "published":
+            if not write_blog_snapshot(media_bucket, item):
+                logger.error(f"Failed to write snapshot for blog {blog_id}")
+
         return build_response(
             StatusCodes.CREATED,
             Headers.CORS,
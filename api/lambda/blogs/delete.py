@@ -1,15 +1,14 @@
 import json
 import os
-import boto3
+from common import aws
 from common.utils import build_response
 from common.contsants import StatusCodes, Headers
+from common.snapshots import delete_blog_snapshot
+from common.blog_stats import apply_stats_delta
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Initialize DynamoDB resource
-dynamodb = boto3.resource('dynamodb')
-
 
 def lambda_handler(event, context):
     # Handle OPTIONS request for CORS
@@ -31,7 +30,7 @@ def lambda_handler(event, context):
                 {"message": "Server configuration error"}
             )
 
-        table = dynamodb.Table(table_name)
+        table = aws.dynamodb().Table(table_name)
         
         # Get blog ID from query parameters
         query_params = event.get('queryStringParameters') or {}
@@ -71,6 +70,14 @@ def lambda_handler(event, context):
         try:
             table.delete_item(Key={'id': blog_id})
             logger.info(f"Successfully deleted blog with ID: {blog_id}")
+
+            stats_table_name = os.getenv('BLOG_STATS_TABLE')
+            if stats_table_name:
+                apply_stats_delta(aws.dynamodb().Table(stats_table_name), blog_item.get('author', 'unknown'), blog_item, None)
+
+            media_bucket = os.getenv('MEDIA_BUCKET')
+            if media_bucket and blog_item.get('status') == 'published':
+                delete_blog_snapshot(media_bucket, blog_id)
             
             return build_response(
                 StatusCodes.OK,
@@ -1,13 +1,16 @@
 import os
 import json
-import boto3
+from common import aws
 from boto3.dynamodb.conditions import Key
-from common.utils import build_response, process_image_references
-from common.contsants import StatusCodes, Headers
+from common.utils import (
+    build_response, process_image_references, has_signed_images, extract_s3_key_from_url, build_projection, dumps,
+    compute_etag, etag_matches, not_modified_response,
+)
+from common.images import manifest_versions
+from common.contsants import StatusCodes, Headers, BlogFields
 import logging
-from common.s3 import get_s3_file_url
+from common.s3 import get_cached_s3_file_url, presigned_url_cache
 
-dynamodb = boto3.resource("dynamodb")
 logger = logging.getLogger(__name__)
 
 
@@ -29,17 +32,30 @@ def lambda_handler(event, context):
             {"error": "MEDIA_BUCKET env variable not set"},
         )
 
-    table = dynamodb.Table(table_name)
+    table = aws.dynamodb().Table(table_name)
 
     params = event.get("queryStringParameters") or {}
     limit = int(params.get("limit", "10"))
     last_key = params.get("lastKey")
 
+    try:
+        projection = build_projection(
+            params.get("fields"), BlogFields.ALL, BlogFields.PROJECTIONS,
+            default="card", always=("id", "updated_at"),
+        )
+    except ValueError as e:
+        return build_response(
+            StatusCodes.BAD_REQUEST,
+            Headers.CORS,
+            {"error": str(e)},
+        )
+
     query_kwargs = {
         "IndexName": "status_published_at",
         "KeyConditionExpression": Key("status").eq("published"),
         "ScanIndexForward": False,
         "Limit": limit,
+        **projection,
     }
 
     if last_key:
@@ -60,26 +76,56 @@ def lambda_handler(event, context):
         )
 
     items = response.get("Items")
+    last_evaluated_key = response.get("LastEvaluatedKey")
+    wants_images = not projection or "#images" in projection["ExpressionAttributeNames"]
+    # Only presigned URLs expire; pages of content-addressed images keep one ETag
+    signs_images = wants_images and any(has_signed_images(item.get("images")) for item in items)
+
+    # Cards only show the first image; load its variant manifests for the whole page at once
+    thumbnail_keys = []
+    if wants_images:
+        thumbnail_keys = [
+            extract_s3_key_from_url(item["images"][0]) for item in items
+            if isinstance(item.get("images"), list) and item["images"] and item["images"][0]
+        ]
+
+    # Validator for this page: request shape, page cursor, item versions and
+    # which thumbnails have their variants yet
+    etag = compute_etag(
+        params.get("fields") or "card",
+        limit,
+        last_key,
+        dumps(last_evaluated_key),
+        presigned_url_cache.validity_epoch() if signs_images else "",
+        *(f"{item.get('id')}@{item.get('updated_at')}" for item in items),
+        *manifest_versions(media_bucket, thumbnail_keys),
+    )
+    headers = Headers.for_route("get-blogs", etag)
+    if etag_matches(event, etag):
+        return not_modified_response(headers)
 
     # Convert image S3 keys/URLs to presigned URLs using centralized utility
     for item in items:
-        item["reading_time"] = int(item["reading_time"])
+        if not wants_images:
+            continue
         images_list = item.get("images", [])
-        
+
         if images_list and isinstance(images_list, list):
             # Use centralized utility function
-            presigned_urls = process_image_references(images_list, media_bucket, get_s3_file_url)
-            # Store as JSON string for frontend compatibility
-            item["images"] = json.dumps(presigned_urls) if presigned_urls else None
+            item["images"] = process_image_references(images_list, media_bucket, get_cached_s3_file_url) or None
+            thumbnails = process_image_references(images_list[:1], media_bucket, get_cached_s3_file_url,
+                                                  with_variants=True)
+            item["thumbnail"] = thumbnails[0] if thumbnails else None
         else:
             item["images"] = None
-            
-    last_evaluated_key = response.get("LastEvaluatedKey")
+            item["thumbnail"] = None
+
+    logger.info(f"Presigned URL cache: {presigned_url_cache.stats()}")
     return build_response(
         StatusCodes.OK,
-        Headers.CORS,
+        headers,
         {
             "blogs": items,
-            "lastKey": json.dumps(last_evaluated_key) if last_evaluated_key else None,
+            "lastKey": dumps(last_evaluated_key) if last_evaluated_key else None,
         },
     )
@@ -1,13 +1,15 @@
 import os
-import json
-import boto3
+from common import aws
 from boto3.dynamodb.conditions import Key
-from common.contsants import StatusCodes, Headers
-from common.utils import build_response, process_image_references
+from common.contsants import StatusCodes, Headers, BlogFields
+from common.utils import (
+    build_response, process_image_references, has_signed_images, extract_s3_key_from_url, build_projection,
+    RawJSON, compute_etag, etag_matches, not_modified_response, redirect_response,
+)
+from common.images import manifest_versions
+from common.snapshots import blog_snapshot_exists, read_blog_snapshot, snapshot_url
 import logging
-from common.s3 import get_s3_file_url
-
-dynamodb = boto3.resource("dynamodb")
+from common.s3 import get_cached_s3_file_url, presigned_url_cache
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -32,7 +34,8 @@ def lambda_handler(event, context):
             {"error": "MEDIA_BUCKET env variable not set"},
         )
 
-    blog_id = event.get("queryStringParameters", {}).get("id")
+    params = event.get("queryStringParameters") or {}
+    blog_id = params.get("id")
     if not blog_id:
         logger.error("Blog ID is required")
         return build_response(
@@ -40,12 +43,42 @@ def lambda_handler(event, context):
             Headers.CORS,
             {"error": "Blog ID is required"},
         )
+
+    # Serve the pre-rendered snapshot written on publish, skipping DynamoDB
+    # and presigning entirely. Falls through to a live read if it is missing
+    # (drafts, unknown ids, posts published before snapshots existed).
+    mode = params.get("mode")
+    if mode == "redirect":
+        if blog_snapshot_exists(media_bucket, blog_id):
+            return redirect_response(snapshot_url(media_bucket, blog_id), Headers.CORS)
+        logger.info(f"No snapshot for blog {blog_id}, reading from DynamoDB")
+    if mode == "snapshot":
+        snapshot = read_blog_snapshot(media_bucket, blog_id)
+        if snapshot:
+            etag = compute_etag(snapshot)
+            headers = Headers.for_route("blog-snapshot", etag)
+            if etag_matches(event, etag):
+                return not_modified_response(headers)
+            return build_response(StatusCodes.OK, headers, RawJSON(snapshot))
+        logger.info(f"No snapshot for blog {blog_id}, reading from DynamoDB")
+
+    try:
+        projection = build_projection(
+            params.get("fields"), BlogFields.ALL, BlogFields.PROJECTIONS, always=("id", "updated_at")
+        )
+    except ValueError as e:
+        return build_response(
+            StatusCodes.BAD_REQUEST,
+            Headers.CORS,
+            {"error": str(e)},
+        )
+
     try:
-        table = dynamodb.Table(table_name)
+        table = aws.dynamodb().Table(table_name)
         logger.info(f"Fetching blog with ID: {blog_id}")
         KeyConditionExpression = Key("id").eq(blog_id)
-        response = table.query(KeyConditionExpression=KeyConditionExpression)
-        item = response.get("Items", [{}])[0]
+        response = table.query(KeyConditionExpression=KeyConditionExpression, **projection)
+        item = (response.get("Items") or [{}])[0]
     except Exception as e:
         logger.error(f"Error fetching blog: {str(e)}")
         return build_response(
@@ -58,18 +91,36 @@ def lambda_handler(event, context):
             Headers.CORS,
             {"error": "Blog not found"},
         )
-    # Process images using centralized utility
+    wants_images = not projection or "#images" in projection["ExpressionAttributeNames"]
     images_list = item.get("images", [])
-    item["reading_time"] = int(item["reading_time"])
-    
-    if images_list and isinstance(images_list, list):
+    image_keys = []
+    if wants_images and images_list and isinstance(images_list, list):
+        image_keys = [extract_s3_key_from_url(image_ref) for image_ref in images_list if image_ref]
+    etag = compute_etag(
+        item["id"],
+        item.get("updated_at"),
+        params.get("fields") or "full",
+        presigned_url_cache.validity_epoch() if wants_images and has_signed_images(images_list) else "",
+        # Variants are generated after upload; their arrival changes imageSources
+        *manifest_versions(media_bucket, image_keys),
+    )
+    headers = Headers.for_route("get-blog", etag)
+    if etag_matches(event, etag):
+        return not_modified_response(headers)
+
+    # Process images using centralized utility
+    if wants_images and images_list and isinstance(images_list, list):
         # Use centralized utility function
-        item["images"] = process_image_references(images_list, media_bucket, get_s3_file_url)
-    else:
+        item["imageSources"] = process_image_references(images_list, media_bucket, get_cached_s3_file_url,
+                                                        with_variants=True)
+        item["images"] = [source["url"] for source in item["imageSources"]]
+    elif wants_images:
         item["images"] = []
+        item["imageSources"] = []
+    logger.info(f"Presigned URL cache: {presigned_url_cache.stats()}")
 
     return build_response(
         StatusCodes.OK,
-        Headers.CORS,
-        json.dumps(item),
+        headers,
+        item,
     )
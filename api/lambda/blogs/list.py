@@ -1,15 +1,87 @@
+import base64
+import heapq
 import json
 import os
-import boto3
-from boto3.dynamodb.conditions import Key, Attr
+from common import aws
+from boto3.dynamodb.conditions import Key
 from common.utils import build_response
 from common.contsants import StatusCodes, Headers
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Initialize DynamoDB resource
-dynamodb = boto3.resource('dynamodb')
+STATUSES = ('published', 'draft')
+DRAFT_PREFIX = 'draft_'
+INDEX_HASH_KEYS = {
+    'status_published_at': 'status',
+    'author_index': 'author',
+}
+
+
+def build_streams(status_filter, author=None):
+    """
+    Map the request onto GSI key conditions, one per sorted stream.
+
+    Drafts store published_at as ``draft_<timestamp>``, so on author_index
+    the two statuses are separable with range conditions on the sort key.
+    """
+    statuses = STATUSES if status_filter == 'all' else (status_filter,)
+    if any(status not in STATUSES for status in statuses):
+        return {}
+
+    streams = {}
+    for status in statuses:
+        if author:
+            published_range = (
+                Key('published_at').begins_with(DRAFT_PREFIX) if status == 'draft'
+                else Key('published_at').lt(DRAFT_PREFIX)
+            )
+            streams[status] = ('author_index', Key('author').eq(author) & published_range)
+        else:
+            streams[status] = ('status_published_at', Key('status').eq(status))
+    return streams
+
+
+def query_stream(table, index_name, key_condition, start_key, page_size):
+    """Yield items newest-first from one GSI, fetching pages of page_size lazily."""
+    query_params = {
+        'IndexName': index_name,
+        'KeyConditionExpression': key_condition,
+        'ScanIndexForward': False,
+        'ProjectionExpression': 'id, title, #status, created_at, published_at, author',
+        'ExpressionAttributeNames': {
+            '#status': 'status'
+        },
+        'Limit': page_size
+    }
+    if start_key:
+        query_params['ExclusiveStartKey'] = start_key
+
+    while True:
+        response = table.query(**query_params)
+        yield from response.get('Items', [])
+        if 'LastEvaluatedKey' not in response:
+            return
+        query_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def tag_stream(name, items):
+    for item in items:
+        yield name, item
+
+
+def merge_key(item):
+    """Timestamp used for global ordering, ignoring the draft_ marker."""
+    published_at = item.get('published_at') or item.get('created_at', '')
+    if published_at.startswith(DRAFT_PREFIX):
+        published_at = published_at[len(DRAFT_PREFIX):]
+    return published_at, item['id']
+
+
+def stream_key(index_name, item):
+    """ExclusiveStartKey that resumes a stream right after ``item``."""
+    hash_key = INDEX_HASH_KEYS[index_name]
+    return {'id': item['id'], hash_key: item[hash_key], 'published_at': item['published_at']}
 
 
 def lambda_handler(event, context):
@@ -32,63 +104,67 @@ def lambda_handler(event, context):
                 {"message": "Server configuration error"}
             )
 
-        table = dynamodb.Table(table_name)
+        table = aws.dynamodb().Table(table_name)
         
         # Get query parameters
         query_params = event.get('queryStringParameters') or {}
         page_size = int(query_params.get('pageSize', '10'))
         last_key = query_params.get('lastKey')
         status_filter = query_params.get('status', 'all')
+        author = query_params.get('author')
         
         # Limit page size to prevent abuse
         page_size = min(max(page_size, 1), 50)
         
         logger.info(f"Fetching blogs list - pageSize: {page_size}, status: {status_filter}")
 
-        # Build scan parameters for lightweight query
-        scan_params = {
-            'ProjectionExpression': 'id, title, #status, created_at, published_at, author',
-            'ExpressionAttributeNames': {
-                '#status': 'status'
-            },
-            'Limit': page_size
-        }
-        
-        # Add status filter if specified
-        if status_filter != 'all':
-            scan_params['FilterExpression'] = Attr('status').eq(status_filter)
-        
-        # Add pagination token if provided
+        streams = build_streams(status_filter, author)
+        if not streams:
+            return build_response(
+                StatusCodes.BAD_REQUEST,
+                Headers.CORS,
+                {"message": f"Unsupported status: {status_filter}"}
+            )
+
+        # Decode the composite cursor: one ExclusiveStartKey per stream
+        cursor = {}
         if last_key:
             try:
                 # Decode the last key (in real app, you'd want to encrypt/sign this)
-                import base64
-                decoded_key = json.loads(base64.b64decode(last_key).decode('utf-8'))
-                scan_params['ExclusiveStartKey'] = decoded_key
+                cursor = json.loads(base64.b64decode(last_key).decode('utf-8'))['streams']
             except Exception as e:
                 logger.warning(f"Invalid lastKey provided: {e}")
-        
-        # Execute scan
-        response = table.scan(**scan_params)
-        items = response.get('Items', [])
-        
-        # Sort by created_at descending (newest first)
-        items.sort(key=lambda x: x.get('published_at', x.get('created_at', '')), reverse=True)
-        
+                cursor = {}
+
+        iterators = [
+            tag_stream(name, query_stream(table, index, condition, cursor.get(name), page_size))
+            for name, (index, condition) in streams.items()
+        ]
+        # Every stream is already newest-first, so a k-way merge gives global order
+        merged = heapq.merge(*iterators, key=lambda entry: merge_key(entry[1]), reverse=True)
+
+        items = []
+        next_cursor = {name: cursor.get(name) for name in streams}
+        for name, item in merged:
+            items.append(item)
+            next_cursor[name] = stream_key(streams[name][0], item)
+            if len(items) == page_size:
+                break
+        has_more = len(items) == page_size and next(merged, None) is not None
+
         # Prepare response
         result = {
             "blogs": items,
             "count": len(items),
-            "hasMore": 'LastEvaluatedKey' in response
+            "hasMore": has_more
         }
-        
+
         # Add next page token if there are more items
-        if 'LastEvaluatedKey' in response:
-            # Encode the last key (in real app, you'd want to encrypt/sign this)
-            import base64
-            next_key = base64.b64encode(json.dumps(response['LastEvaluatedKey']).encode('utf-8')).decode('utf-8')
+        if has_more:
+            # Encode the cursor (in real app, you'd want to encrypt/sign this)
+            next_key = base64.b64encode(json.dumps({"streams": next_cursor}).encode('utf-8')).decode('utf-8')
             result['nextPageToken'] = next_key
-        
+
         logger.info(f"Successfully fetched {len(items)} blogs")
         
         return build_response(
@@ -1,17 +1,19 @@
-import json
 import os
-import boto3
-from boto3.dynamodb.conditions import Key, Attr
+from common import aws
 from common.utils import build_response
 from common.contsants import StatusCodes, Headers
+from common.blog_stats import GLOBAL_SCOPE, author_scope, monthly_histogram
+from common.post_views import get_post_views
+from common.hyperloglog import HyperLogLog
 import logging
+from collections import Counter
 from datetime import datetime, timedelta
-from collections import defaultdict
 
 logger = logging.getLogger(__name__)
 
-# Initialize DynamoDB resource
-dynamodb = boto3.resource('dynamodb')
+# Per-post metrics window; analytics events expire after a year
+DEFAULT_WINDOW_DAYS = 30
+MAX_WINDOW_DAYS = 365
 
 
 def lambda_handler(event, context):
@@ -34,18 +36,55 @@ def lambda_handler(event, context):
                 {"message": "Server configuration error"}
             )
 
-        table = dynamodb.Table(table_name)
+        table = aws.dynamodb().Table(table_name)
         
         # Get query parameters
         query_params = event.get('queryStringParameters') or {}
         blog_id = query_params.get('id')
         
+        stats_table_name = os.getenv('BLOG_STATS_TABLE')
+        if not stats_table_name:
+            logger.error("BLOG_STATS_TABLE environment variable not set")
+            return build_response(
+                StatusCodes.INTERNAL_SERVER_ERROR,
+                Headers.CORS,
+                {"message": "Server configuration error"}
+            )
+
         if blog_id:
             # Get stats for specific blog
-            return get_blog_stats(table, blog_id)
-        else:
-            # Get overall dashboard stats
-            return get_dashboard_stats(table)
+            analytics_table_name = os.getenv('ANALYTICS_TABLE')
+            if not analytics_table_name:
+                logger.error("ANALYTICS_TABLE environment variable not set")
+                return build_response(
+                    StatusCodes.INTERNAL_SERVER_ERROR,
+                    Headers.CORS,
+                    {"message": "Server configuration error"}
+                )
+            try:
+                days = min(max(int(query_params.get('days', DEFAULT_WINDOW_DAYS)), 1), MAX_WINDOW_DAYS)
+            except ValueError:
+                return build_response(
+                    StatusCodes.BAD_REQUEST,
+                    Headers.CORS,
+                    {"message": "days must be an integer"}
+                )
+            return get_blog_stats(
+                table, blog_id, aws.dynamodb().Table(analytics_table_name), aws.dynamodb().Table(stats_table_name), days
+            )
+
+        # Get overall dashboard stats, optionally for the calling author only
+        scope = GLOBAL_SCOPE
+        if query_params.get('scope') == 'author':
+            claims = (event.get('requestContext') or {}).get('authorizer', {}).get('claims', {})
+            if not claims.get('sub'):
+                return build_response(
+                    StatusCodes.UNAUTHORIZED,
+                    Headers.CORS,
+                    {"message": "User not authenticated."}
+                )
+            scope = author_scope(claims['sub'])
+        return get_dashboard_stats(aws.dynamodb().Table(stats_table_name), scope)
 
     except Exception as e:
         logger.error(f"Error fetching blog stats: {e}")
@@ -56,137 +95,133 @@ def lambda_handler(event, context):
         )
 
 
-def get_blog_stats(table, blog_id):
-    """Get detailed stats for a specific blog"""
+def get_blog_stats(table, blog_id, analytics_table, stats_table, days=DEFAULT_WINDOW_DAYS):
+    """Get detailed stats for a specific blog from its tracked page views"""
     try:
         # Get blog details
-        response = table.get_item(Key={'id': blog_id})
+        response = table.get_item(
+            Key={'id': blog_id},
+            ProjectionExpression='id, title, #status, created_at, published_at, reading_time',
+            ExpressionAttributeNames={'#status': 'status'},
+        )
         if 'Item' not in response:
             return build_response(
                 StatusCodes.NOT_FOUND,
                 Headers.CORS,
                 {"message": "Blog not found"}
             )
-        
+
         blog = response['Item']
-        
-        # Calculate basic stats (in a real app, you'd track these metrics)
-        # For now, we'll simulate some stats based on blog data
-        created_date = datetime.fromisoformat(blog.get('created_at', '').replace('Z', '+00:00'))
-        published_date = None
-        if blog.get('published_at'):
-            published_date = datetime.fromisoformat(blog.get('published_at', '').replace('Z', '+00:00'))
-        
-        # Simulate engagement metrics (replace with real analytics)
-        days_since_published = 0
-        if published_date:
-            days_since_published = (datetime.now() - published_date.replace(tzinfo=None)).days
-        
-        # Simulate realistic metrics based on content length and age
-        content_length = len(blog.get('content', ''))
-        base_views = min(content_length // 100, 50) + (days_since_published * 2)
-        
+        daily = get_post_views(aws.dynamodb(), analytics_table, stats_table, blog_id, days)
+
+        visitors = HyperLogLog()
+        referrers = Counter()
+        for summary in daily.values():
+            visitors.merge(summary['visitors'])
+            referrers.update(summary['referrers'])
+        views = [summary['views'] for summary in daily.values()]
+        total_views = sum(views)
+
         stats = {
             "blogId": blog_id,
             "title": blog.get('title', ''),
             "status": blog.get('status', ''),
             "createdAt": blog.get('created_at', ''),
             "publishedAt": blog.get('published_at'),
+            "windowDays": days,
             "metrics": {
-                "totalViews": max(base_views, 0),
-                "uniqueVisitors": max(int(base_views * 0.7), 0),
-                "avgReadTime": f"{min(content_length // 200, 10):.1f} min",
-                "bounceRate": f"{max(30, 100 - (content_length // 50))}%",
-                "socialShares": max(int(base_views * 0.1), 0),
-                "comments": max(int(base_views * 0.05), 0)
+                "totalViews": total_views,
+                "uniqueVisitors": visitors.estimate(),
+                "avgReadTime": f"{int(blog.get('reading_time') or 0)} min",
+                # Not tracked per post: bounces need whole-session paths, and
+                # there is no share or comment event in the analytics stream
+                "bounceRate": "n/a",
+                "socialShares": 0,
+                "comments": 0
             },
             "performance": {
-                "viewsThisWeek": max(int(base_views * 0.3), 0),
-                "viewsThisMonth": max(int(base_views * 0.8), 0),
+                "viewsThisWeek": sum(views[-7:]),
+                "viewsThisMonth": sum(views[-30:]),
                 "topReferrers": [
-                    {"source": "Direct", "visits": int(base_views * 0.4)},
-                    {"source": "Google", "visits": int(base_views * 0.3)},
-                    {"source": "Social Media", "visits": int(base_views * 0.2)},
-                    {"source": "Other", "visits": int(base_views * 0.1)}
+                    {
+                        "source": source,
+                        "visits": count,
+                        "percentage": round(count * 100 / total_views, 1) if total_views else 0
+                    }
+                    for source, count in referrers.most_common()
                 ]
-            }
+            },
+            "dailyViews": [
+                {"date": day, "views": summary['views'], "visitors": summary['visitors'].estimate()}
+                for day, summary in daily.items()
+            ]
         }
-        
+
         return build_response(
             StatusCodes.OK,
             Headers.CORS,
             stats
         )
-        
+
     except Exception as e:
         logger.error(f"Error getting blog stats: {e}")
         raise
 
 
-def get_dashboard_stats(table):
-    """Get overall dashboard statistics"""
+def get_dashboard_stats(stats_table, scope=GLOBAL_SCOPE):
+    """Get overall dashboard statistics from the maintained aggregate item"""
     try:
-        # Scan all blogs for dashboard stats
-        response = table.scan(
-            ProjectionExpression='id, #status, created_at, published_at',
-            ExpressionAttributeNames={'#status': 'status'}
-        )
-        
-        blogs = response.get('Items', [])
-        
-        # Calculate stats
-        total_blogs = len(blogs)
-        published_blogs = len([b for b in blogs if b.get('status') == 'published'])
-        draft_blogs = len([b for b in blogs if b.get('status') == 'draft'])
-        
-        # Calculate publishing trends (last 30 days)
-        thirty_days_ago = datetime.now() - timedelta(days=30)
-        recent_blogs = []
-        
-        for blog in blogs:
-            if blog.get('published_at'):
-                try:
-                    pub_date = datetime.fromisoformat(blog.get('published_at', '').replace('Z', '+00:00'))
-                    if pub_date.replace(tzinfo=None) >= thirty_days_ago:
-                        recent_blogs.append(blog)
-                except:
-                    continue
-        
-        # Simulate total reach metrics
-        total_estimated_views = sum([
-            max(len(blog.get('content', '')) // 100, 10) for blog in blogs
-        ])
-        
+        response = stats_table.get_item(Key={'scope': scope})
+        aggregate = response.get('Item', {})
+        histogram = monthly_histogram(aggregate)
+
+        published_blogs = int(aggregate.get('published', 0))
+        this_month_start = datetime.utcnow().replace(day=1)
+        this_month = this_month_start.strftime('%Y-%m')
+        last_month = (this_month_start - timedelta(days=1)).strftime('%Y-%m')
+        blogs_this_month = histogram.get(this_month, 0)
+        blogs_last_month = histogram.get(last_month, 0)
+
+        # Average over the current and two previous months (~13 weeks)
+        since = _months_ago(this_month_start, 2)
+        recent_count = sum(count for month, count in histogram.items() if month >= since)
+
+        growth_rate = "0%"
+        if blogs_last_month:
+            growth_rate = f"{(blogs_this_month - blogs_last_month) * 100 / blogs_last_month:+.0f}%"
+        elif blogs_this_month:
+            growth_rate = "+100%"
+
         stats = {
             "overview": {
-                "totalBlogs": total_blogs,
+                "totalBlogs": int(aggregate.get('total', 0)),
                 "publishedBlogs": published_blogs,
-                "draftBlogs": draft_blogs,
-                "totalViews": total_estimated_views,
-                "avgViewsPerBlog": int(total_estimated_views / max(published_blogs, 1))
+                "draftBlogs": int(aggregate.get('draft', 0)),
             },
             "trends": {
-                "blogsThisMonth": len(recent_blogs),
-                "publishingRate": f"{len(recent_blogs) / 4:.1f} per week",
-                "growthRate": f"+{min(len(recent_blogs) * 5, 50)}%" if recent_blogs else "0%"
+                "blogsThisMonth": blogs_this_month,
+                "blogsLastMonth": blogs_last_month,
+                "publishingRate": f"{recent_count / 13:.1f} per week",
+                "growthRate": growth_rate
             },
-            "topPerformers": [
-                {
-                    "id": blog['id'],
-                    "title": blog.get('title', 'Untitled'),
-                    "views": max(len(blog.get('content', '')) // 50, 20),
-                    "status": blog.get('status', 'draft')
-                }
-                for blog in sorted(blogs, key=lambda x: len(x.get('content', '')), reverse=True)[:5]
-            ]
+            "publishedByMonth": histogram
         }
-        
+
         return build_response(
             StatusCodes.OK,
             Headers.CORS,
             stats
         )
-        
+
     except Exception as e:
         logger.error(f"Error getting dashboard stats: {e}")
-        raise
\ No newline at end of file
+        raise
+
+
+def _months_ago(month_start, months):
+    """YYYY-MM string ``months`` calendar months before ``month_start``."""
+    year, month = month_start.year, month_start.month - months
+    while month < 1:
+        month += 12
+        year -= 1
+    return f"{year:04d}-{month:02d}"
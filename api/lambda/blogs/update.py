@@ -1,13 +1,14 @@
 import os
 import json
 from datetime import datetime
-import boto3
+from common import aws
 from boto3.dynamodb.conditions import Key
-from common.utils import build_response
+from common.utils import build_response, build_excerpt, estimate_reading_time
 from common.contsants import StatusCodes, Headers
+from common.snapshots import write_blog_snapshot
+from common.blog_stats import apply_stats_delta
 import logging
 
-dynamodb = boto3.resource("dynamodb")
 logger = logging.getLogger(__name__)
 
 
@@ -54,7 +55,7 @@ def lambda_handler(event, context):
         title = body.get("title", "").strip()
         content = body.get("content", "").strip()
         tags = body.get("tags", [])
-        reading_time = body.get("reading_time", 1)
+        reading_time = body.get("reading_time") or estimate_reading_time(content)
         blog_status = body.get("status", "draft")
         images = body.get("images", [])
         
@@ -75,7 +76,7 @@ def lambda_handler(event, context):
                 {"message": "Content is required for published posts."},
             )
         
-        table = dynamodb.Table(BLOGS_TABLE)
+        table = aws.dynamodb().Table(BLOGS_TABLE)
         
         # Check if blog exists and user owns it
         try:
@@ -117,10 +118,11 @@ def lambda_handler(event, context):
             published_at_value = f"draft_{now}"
         
         # Prepare update expression
-        update_expression = "SET title = :title, content = :content, tags = :tags, reading_time = :reading_time, images = :images, updated_at = :updated_at, #status = :status, status_published_at = :status_published_at, published_at = :published_at, author_index = :author_index"
+        update_expression = "SET title = :title, content = :content, excerpt = :excerpt, tags = :tags, reading_time = :reading_time, images = :images, updated_at = :updated_at, #status = :status, status_published_at = :status_published_at, published_at = :published_at, author_index = :author_index"
         expression_attribute_values = {
             ":title": title,
             ":content": content or "<p></p>",
+            ":excerpt": build_excerpt(content),
             ":tags": tags,
             ":reading_time": reading_time,
             ":images": images,
@@ -135,12 +137,23 @@ def lambda_handler(event, context):
         }
         
         # Perform the update
-        table.update_item(
+        updated = table.update_item(
             Key={"id": blog_id},
             UpdateExpression=update_expression,
             ExpressionAttributeValues=expression_attribute_values,
             ExpressionAttributeNames=expression_attribute_names,
+            ReturnValues="ALL_NEW",
         )
+
+        stats_table_name = os.getenv("BLOG_STATS_TABLE")
+        if stats_table_name:
+            apply_stats_delta(aws.dynamodb().Table(stats_table_name), user_id, existing_blog, updated["Attributes"])
+
+        # Refresh the snapshot (or drop it when unpublished)
+        media_bucket = os.getenv("MEDIA_BUCKET")
+        if media_bucket and (blog_status == "published" or existing_blog.get("status") == "published"):
+            if not write_blog_snapshot(media_bucket, updated["Attributes"]):
+                logger.error(f"Failed to refresh snapshot for blog {blog_id}")
         
         logger.info(f"Blog {blog_id} updated successfully by user {user_id}")
         
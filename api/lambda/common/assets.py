@@ -0,0 +1,248 @@
+"""
+Content-addressed media storage.
+
+Files are stored once under ``media/<sha256>.<ext>``. A key only ever
+holds one set of bytes, so objects are never overwritten and are served
+with a one-year ``Cache-Control: immutable``: browsers and CDNs can keep
+them forever. Storing bytes that are already there is a no-op, so
+re-uploading the same image or resume costs one HEAD.
+
+Names that must stay stable (the profile image, the resume) are small
+JSON pointers under ``pointers/<name>.json`` naming the current content
+key; a re-upload only rewrites the pointer. A pointer is the asset's
+whole manifest (key, content type, size, last modified), so readers can
+describe the asset from that one read without touching the object.
+"""
+
+import base64
+import binascii
+import hashlib
+import json
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+from common import aws, images
+from common.s3 import BASE64_CHUNK_CHARS, get_s3_public_url, get_s3_upload_urls, put_s3_file
+from common.uploads import UploadError, finalize_upload
+
+logger = logging.getLogger(__name__)
+
+CONTENT_PREFIX = "media/"
+POINTER_PREFIX = "pointers/"
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Pointers change on every upload; clients must always revalidate them
+POINTER_CACHE_CONTROL = "no-cache"
+READ_CHUNK_BYTES = 1024 * 1024
+MAX_LOOKUP_WORKERS = 8
+
+CONTENT_EXTENSIONS = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/gif": ".gif",
+    "image/webp": ".webp",
+    "image/svg+xml": ".svg",
+    "application/pdf": ".pdf",
+}
+
+_SHA256_HEX = re.compile(r"^[0-9a-f]{64}$")
+
+
+def parse_sha256(value) -> Optional[str]:
+    """Normalize a client-supplied hex SHA-256; None if absent, UploadError if malformed."""
+    if not value:
+        return None
+    value = str(value).strip().lower()
+    if not _SHA256_HEX.match(value):
+        raise UploadError("sha256 must be 64 hex characters")
+    return value
+
+
+def sha256_checksum(sha256: str) -> str:
+    """The base64 form S3 uses in ``x-amz-checksum-sha256``."""
+    return base64.b64encode(bytes.fromhex(sha256)).decode("ascii")
+
+
+def content_key(sha256: str, content_type: str) -> str:
+    return f"{CONTENT_PREFIX}{sha256}{CONTENT_EXTENSIONS.get(content_type, '')}"
+
+
+def is_content_key(key: str) -> bool:
+    return bool(key) and key.startswith(CONTENT_PREFIX)
+
+
+def is_immutable_key(key: str) -> bool:
+    """Content keys and the variants generated from them; neither is ever rewritten."""
+    return is_content_key(key) or bool(key) and key.startswith(images.VARIANTS_PREFIX + CONTENT_PREFIX)
+
+
+def asset_url(bucket: str, key: str, sign: Callable[[str, str], Optional[str]]) -> Optional[str]:
+    """
+    Download URL for ``key``. Immutable keys are publicly readable and
+    cached for a year, so they get their stable unsigned URL: a presigned
+    one would change every hour and defeat that cache. Legacy mutable
+    keys still go through ``sign(bucket, key)``.
+    """
+    if is_immutable_key(key):
+        return get_s3_public_url(bucket, key)
+    return sign(bucket, key)
+
+
+def _stored(key: str, sha256: str, content_type: str, size: int, last_modified: Optional[datetime],
+            deduplicated: bool) -> Dict:
+    return {
+        "key": key,
+        "sha256": sha256,
+        "contentType": content_type,
+        "size": size,
+        "lastModified": last_modified,
+        "deduplicated": deduplicated,
+    }
+
+
+def find_content(bucket: str, sha256: str, content_type: str) -> Optional[Dict]:
+    """The stored object for these bytes, or None if they were never uploaded."""
+    key = content_key(sha256, content_type)
+    try:
+        head = aws.s3().head_object(Bucket=bucket, Key=key)
+    except ClientError as e:
+        if e.response["Error"]["Code"] in ("404", "NoSuchKey"):
+            return None
+        raise
+    return _stored(key, sha256, content_type, head.get("ContentLength"), head.get("LastModified"),
+                   deduplicated=True)
+
+
+def _object_sha256(bucket: str, key: str, checksum: Optional[str]) -> str:
+    # A single-part upload's checksum covers the whole object; multipart ones end in "-<parts>"
+    if checksum and "-" not in checksum:
+        return base64.b64decode(checksum).hex()
+    digest = hashlib.sha256()
+    for chunk in aws.s3().get_object(Bucket=bucket, Key=key)["Body"].iter_chunks(READ_CHUNK_BYTES):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def store_staged(bucket: str, upload_key: str, staged: Dict) -> Dict:
+    """
+    Move a checked staging object (see ``uploads.staged_upload``) to its
+    content key, or just drop it if those bytes are already stored.
+    """
+    content_type = staged["contentType"]
+    sha256 = _object_sha256(bucket, upload_key, staged.get("checksumSha256"))
+    existing = find_content(bucket, sha256, content_type)
+    if existing:
+        aws.s3().delete_object(Bucket=bucket, Key=upload_key)
+        return existing
+    key = content_key(sha256, content_type)
+    result = finalize_upload(bucket, upload_key, key, content_type, cache_control=IMMUTABLE_CACHE_CONTROL)
+    return _stored(key, sha256, content_type, staged["size"], result.get("lastModified"), deduplicated=False)
+
+
+def store_base64(bucket: str, encoded: str, content_type: str) -> Dict:
+    """Store a base64-encoded file at its content key unless those bytes are already stored."""
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        for start in range(0, len(encoded), BASE64_CHUNK_CHARS):
+            chunk = base64.b64decode(encoded[start:start + BASE64_CHUNK_CHARS], validate=True)
+            digest.update(chunk)
+            size += len(chunk)
+    except binascii.Error as e:
+        raise ValueError(f"Invalid base64 content: {e}")
+    sha256 = digest.hexdigest()
+
+    existing = find_content(bucket, sha256, content_type)
+    if existing:
+        return existing
+    key = content_key(sha256, content_type)
+    if not put_s3_file(bucket, key, encoded, content_type, IMMUTABLE_CACHE_CONTROL, encoding="base64"):
+        raise RuntimeError(f"Failed to store {key}")
+    return _stored(key, sha256, content_type, size, datetime.now(timezone.utc), deduplicated=False)
+
+
+def upload_headers(sha256: str, content_type: str) -> Dict[str, str]:
+    """
+    Headers a presigned PUT of these bytes must send. S3 rejects a body
+    with another SHA-256, and stores the cache policy with the object.
+    """
+    return {
+        "Content-Type": content_type,
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+        "x-amz-checksum-sha256": sha256_checksum(sha256),
+    }
+
+
+def presign_content_uploads(bucket: str, files: List[Tuple[str, str]], expires_in: int = 3600) -> List[Dict]:
+    """
+    Presign PUTs of (sha256, content_type) files to their content keys.
+
+    Returns ``{fileName, contentType, exists, presignedUrl, uploadHeaders}``
+    per file; files that are already stored get ``exists: True`` and no URL,
+    so the browser skips their upload.
+    """
+    if not files:
+        return []
+    with ThreadPoolExecutor(max_workers=min(MAX_LOOKUP_WORKERS, len(files))) as pool:
+        found = list(pool.map(lambda file: find_content(bucket, *file), files))
+
+    keys = [content_key(sha256, content_type) for sha256, content_type in files]
+    headers = {}
+    missing = []
+    for key, (sha256, content_type), existing in zip(keys, files, found):
+        if not existing:
+            headers[key] = {
+                name.lower(): value for name, value in upload_headers(sha256, content_type).items()
+                if name != "Content-Type"
+            }
+            missing.append((key, content_type))
+    urls = get_s3_upload_urls(bucket, missing, expires_in, headers=headers)
+
+    return [
+        {
+            "fileName": key,
+            "contentType": content_type,
+            "exists": bool(existing),
+            "presignedUrl": None if existing else urls[key],
+            "uploadHeaders": None if existing else upload_headers(sha256, content_type),
+        }
+        for key, (sha256, content_type), existing in zip(keys, files, found)
+    ]
+
+
+def pointer_key(name: str) -> str:
+    return f"{POINTER_PREFIX}{name}.json"
+
+
+def write_pointer(bucket: str, name: str, stored: Dict) -> None:
+    """Point the stable name ``name`` at a stored object."""
+    last_modified = stored.get("lastModified")
+    pointer = {
+        "key": stored["key"],
+        "sha256": stored["sha256"],
+        "contentType": stored["contentType"],
+        "size": stored.get("size"),
+        "lastModified": last_modified.isoformat() if last_modified else None,
+    }
+    if not put_s3_file(bucket, pointer_key(name), json.dumps(pointer), "application/json", POINTER_CACHE_CONTROL):
+        raise RuntimeError(f"Failed to update the {name} pointer")
+    logger.info(f"Pointed {name} at {stored['key']}")
+
+
+def read_pointer(bucket: str, name: str) -> Optional[Dict]:
+    """The current target of ``name``, or None if it was never written."""
+    try:
+        body = aws.s3().get_object(Bucket=bucket, Key=pointer_key(name))["Body"].read()
+    except ClientError as e:
+        if e.response["Error"]["Code"] not in ("404", "NoSuchKey", "403", "AccessDenied"):
+            logger.warning(f"Could not read the {name} pointer: {e}")
+        return None
+    try:
+        return json.loads(body)
+    except ValueError:
+        logger.warning(f"Ignoring malformed {name} pointer")
+        return None
@@ -0,0 +1,119 @@
+"""
+Shared boto3 session, clients and resources for the Lambda container.
+
+Everything is created on first use and then reused by every invocation
+the container serves, so only a cold start pays for loading service
+models, resolving credentials and opening TLS connections. All clients
+share one explicit botocore configuration:
+
+- ``max_pool_connections`` sized for the thread pools in ``common.scan``
+  and the analytics readers (botocore's default of 10 would make extra
+  threads queue for a connection);
+- TCP keep-alive, so pooled connections survive the idle time between
+  invocations instead of being dropped and re-established;
+- connect/read timeouts well below the function timeout, so a stalled
+  call is retried rather than hanging the invocation;
+- ``adaptive`` retries, which add client-side rate limiting on top of
+  the standard exponential backoff when DynamoDB throttles.
+
+Each setting can be overridden through the environment.
+
+Clients are thread-safe once built, but building them from one session
+is not, so creation happens under a lock. Resources (``dynamodb()`` and
+its Tables) are not thread-safe at all: code that fans a table's calls
+out over threads shares ``thread_safe(table)`` instead.
+"""
+
+import functools
+import os
+import threading
+
+import boto3
+from botocore.config import Config
+
+CLIENT_CONFIG = Config(
+    max_pool_connections=int(os.getenv("AWS_MAX_POOL_CONNECTIONS", "32")),
+    tcp_keepalive=True,
+    connect_timeout=float(os.getenv("AWS_CONNECT_TIMEOUT", "3")),
+    read_timeout=float(os.getenv("AWS_READ_TIMEOUT", "20")),
+    retries={
+        "mode": "adaptive",
+        "max_attempts": int(os.getenv("AWS_MAX_ATTEMPTS", "5")),
+    },
+)
+
+# SigV4 for every presigned S3 URL and POST policy; older signatures are
+# rejected by newer regions
+SERVICE_CONFIGS = {
+    "s3": CLIENT_CONFIG.merge(Config(signature_version="s3v4")),
+}
+
+_lock = threading.Lock()
+_session = None
+_clients = {}
+_resources = {}
+
+
+def session() -> boto3.session.Session:
+    """The container's boto3 session."""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = boto3.session.Session()
+    return _session
+
+
+def resource(service: str):
+    """Cached boto3 resource for ``service``."""
+    if service not in _resources:
+        session()
+        with _lock:
+            if service not in _resources:
+                _resources[service] = _session.resource(service, config=SERVICE_CONFIGS.get(service, CLIENT_CONFIG))
+    return _resources[service]
+
+
+def client(service: str):
+    """Cached low-level client for ``service``."""
+    if service not in _clients:
+        session()
+        with _lock:
+            if service not in _clients:
+                _clients[service] = _session.client(service, config=SERVICE_CONFIGS.get(service, CLIENT_CONFIG))
+    return _clients[service]
+
+
+def dynamodb():
+    """DynamoDB service resource (``.Table``, ``batch_get_item``, ``batch_write_item``)."""
+    return resource("dynamodb")
+
+
+class ThreadSafeTable:
+    """
+    A Table's actions (``query``, ``scan``, ``update_item``, ...) called on
+    the client behind it. That client is thread-safe, and it takes and
+    returns the same Python values and conditions as the Table does.
+    """
+
+    def __init__(self, table):
+        self.name = table.name
+        self.client = table.meta.client
+
+    def __getattr__(self, action: str):
+        return functools.partial(getattr(self.client, action), TableName=self.name)
+
+
+def thread_safe(table):
+    """``table`` for use from several threads; test doubles without a client are returned as is."""
+    if getattr(getattr(table, "meta", None), "client", None) is None:
+        return table
+    return ThreadSafeTable(table)
+
+
+def s3():
+    return client("s3")
+
+
+def cognito():
+    return client("cognito-idp")
@@ -0,0 +1,88 @@
+"""
+Aggregate blog counters maintained on every write.
+
+One item per scope (``global`` and ``author#<sub>``) holds total, published
+and draft counts plus a ``published#YYYY-MM`` counter per month. Writers
+apply deltas with atomic ADD updates, so the dashboard reads a single item
+instead of scanning the Blogs table.
+"""
+
+import logging
+from collections import defaultdict
+from typing import Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+GLOBAL_SCOPE = "global"
+MONTH_PREFIX = "published#"
+COUNTERS = ("total", "published", "draft")
+
+
+def author_scope(author: str) -> str:
+    return f"author#{author}"
+
+
+def _contribution(blog: Optional[dict]) -> Dict[str, int]:
+    """Counters a single blog item adds to its scopes."""
+    if not blog:
+        return {}
+    status = blog.get("status", "draft")
+    counts = {"total": 1, status: 1}
+    published_at = blog.get("published_at") or ""
+    if status == "published" and len(published_at) >= 7:
+        counts[f"{MONTH_PREFIX}{published_at[:7]}"] = 1
+    return counts
+
+
+def stats_delta(before: Optional[dict], after: Optional[dict]) -> Dict[str, int]:
+    """Counter changes for a blog moving from ``before`` to ``after`` (None = absent)."""
+    delta = defaultdict(int)
+    for name, value in _contribution(after).items():
+        delta[name] += value
+    for name, value in _contribution(before).items():
+        delta[name] -= value
+    return {name: value for name, value in delta.items() if value}
+
+
+def apply_stats_delta(stats_table, author: str, before: Optional[dict], after: Optional[dict]) -> bool:
+    """Atomically ADD the delta to the global and author aggregates."""
+    delta = stats_delta(before, after)
+    if not delta:
+        return True
+
+    names = {f"#c{i}": name for i, name in enumerate(delta)}
+    values = {f":c{i}": value for i, value in enumerate(delta.values())}
+    update_expression = "ADD " + ", ".join(f"#c{i} :c{i}" for i in range(len(delta)))
+
+    ok = True
+    for scope in (GLOBAL_SCOPE, author_scope(author)):
+        try:
+            stats_table.update_item(
+                Key={"scope": scope},
+                UpdateExpression=update_expression,
+                ExpressionAttributeNames=names,
+                ExpressionAttributeValues=values,
+            )
+        except Exception as e:
+            logger.error(f"Failed to update blog stats for {scope}: {e}")
+            ok = False
+    return ok
+
+
+def compute_aggregates(blogs: Iterable[dict]) -> Dict[str, Dict[str, int]]:
+    """Recompute every scope's counters from scratch."""
+    aggregates = defaultdict(lambda: defaultdict(int))
+    for blog in blogs:
+        for scope in (GLOBAL_SCOPE, author_scope(blog.get("author", "unknown"))):
+            for name, value in _contribution(blog).items():
+                aggregates[scope][name] += value
+    return {scope: dict(counters) for scope, counters in aggregates.items()}
+
+
+def monthly_histogram(aggregate: dict) -> Dict[str, int]:
+    """Extract ``{YYYY-MM: count}`` from an aggregate item, oldest first."""
+    return {
+        name[len(MONTH_PREFIX):]: int(value)
+        for name, value in sorted(aggregate.items())
+        if name.startswith(MONTH_PREFIX) and int(value)
+    }
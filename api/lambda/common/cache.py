@@ -0,0 +1,190 @@
+"""
+In-memory caches that live for the lifetime of a warm Lambda container.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class _LruCache:
+    """
+    Thread-safe LRU map with hit/miss counters. Entries are
+    ``(value, stamp)`` pairs; each subclass decides from the stamp
+    whether an entry is still fresh enough to serve.
+    """
+
+    def __init__(self, max_entries: int, clock: Callable[[], float] = time.time):
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, key, is_fresh: Callable[[tuple], bool]) -> Optional[tuple]:
+        """Return the entry for ``key`` if ``is_fresh(entry)``; a stale one is dropped."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and is_fresh(entry):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            if entry:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def _peek(self, key) -> Optional[tuple]:
+        """The entry for ``key`` without touching its recency or the counters."""
+        with self._lock:
+            return self._entries.get(key)
+
+    def _store(self, key, entry: tuple) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """Return hit/miss counters for logging."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "hitRate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+class PresignedUrlCache(_LruCache):
+    """
+    Process-wide LRU cache of presigned URLs keyed by (bucket, key, expires_in).
+
+    A cached URL is only served while more than the refresh margin of its
+    validity remains; otherwise it is re-signed, so clients never receive a
+    URL that is about to expire.
+    """
+
+    def __init__(self, max_entries: int = 1024, refresh_margin: int = 300, clock: Callable[[], float] = time.time):
+        super().__init__(max_entries, clock)
+        self.refresh_margin = refresh_margin
+
+    def _margin_for(self, expires_in: int) -> int:
+        # Short-lived URLs (e.g. the 5 minute resume link) would never be
+        # reusable with the full margin, so cap it at half their lifetime.
+        return min(self.refresh_margin, expires_in // 2)
+
+    def get(self, bucket: str, key: str, expires_in: int) -> Optional[str]:
+        """Return a cached URL that is still fresh, or None."""
+        now = self._clock()
+        margin = self._margin_for(expires_in)
+        entry = self._lookup((bucket, key, expires_in), lambda entry: entry[1] - now > margin)
+        return entry[0] if entry else None
+
+    def remaining(self, bucket: str, key: str, expires_in: int) -> Optional[int]:
+        """Seconds the cached URL for ``key`` stays valid, or None if none is cached."""
+        entry = self._peek((bucket, key, expires_in))
+        if not entry:
+            return None
+        return max(int(entry[1] - self._clock()), 0)
+
+    def put(self, bucket: str, key: str, expires_in: int, url: str, signed_at: Optional[float] = None) -> None:
+        """Store a URL signed at ``signed_at`` (defaults to now)."""
+        expires_at = (signed_at if signed_at is not None else self._clock()) + expires_in
+        self._store((bucket, key, expires_in), (url, expires_at))
+
+    def get_or_sign(self, bucket: str, key: str, expires_in: int,
+                    signer: Callable[[str, str, int], Optional[str]]) -> Optional[str]:
+        """Return a cached URL or sign a new one with ``signer(bucket, key, expires_in)``."""
+        url = self.get(bucket, key, expires_in)
+        if url:
+            return url
+        signed_at = self._clock()
+        url = signer(bucket, key, expires_in)
+        if url:
+            self.put(bucket, key, expires_in, url, signed_at=signed_at)
+        return url
+
+    def validity_epoch(self, expires_in: int = 3600) -> int:
+        """
+        Index of the current window in which every URL this cache hands out
+        stays valid. Mixing it into an ETag keeps a revalidated (304) body
+        from outliving the presigned URLs embedded in it.
+        """
+        return int(self._clock() // max(self._margin_for(expires_in) // 2, 1))
+
+
+class DayRollupCache(_LruCache):
+    """
+    Process-wide cache of per-day aggregates keyed by ``YYYY-MM-DD``.
+
+    A closed day never changes, so it is kept until evicted by newer days;
+    ``None`` records a closed day with no traffic. Open days (today, and
+    yesterday right after midnight) are only reused for ``live_ttl``
+    seconds, so repeated dashboard refreshes don't re-read them but new
+    page views still show up within that window.
+    """
+
+    def __init__(self, max_days: int = 400, live_ttl: int = 60, clock: Callable[[], float] = time.time):
+        super().__init__(max_days, clock)
+        self.live_ttl = live_ttl
+
+    def get_many(self, days: List[str]) -> Tuple[Dict[str, Optional[dict]], List[str]]:
+        """
+        Split ``days`` into ``({day: aggregate or None}, missing days)``.
+        Open entries older than ``live_ttl`` count as missing.
+        """
+        now = self._clock()
+
+        def is_fresh(entry):
+            return entry[1] is None or now - entry[1] < self.live_ttl
+
+        found, missing = {}, []
+        for day in days:
+            entry = self._lookup(day, is_fresh)
+            if entry:
+                found[day] = entry[0]
+            else:
+                missing.append(day)
+        return found, missing
+
+    def put(self, day: str, aggregate: Optional[dict], closed_before: str) -> None:
+        """Store a day's aggregate; days before ``closed_before`` never expire."""
+        loaded_at = None if day < closed_before else self._clock()
+        self._store(day, (aggregate, loaded_at))
+
+
+class ExpiringCache(_LruCache):
+    """
+    Process-wide LRU cache whose entries are served for ``ttl`` seconds.
+
+    ``None`` is a valid cached value (e.g. "no such object"), so lookups
+    return ``(found, value)``. ``put`` accepts a shorter ``ttl`` for such
+    negative entries, so something created later shows up quickly.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: int = 300, clock: Callable[[], float] = time.time):
+        super().__init__(max_entries, clock)
+        self.ttl = ttl
+
+    def get(self, key) -> Tuple[bool, object]:
+        """Return ``(True, value)`` for a fresh entry, else ``(False, None)``."""
+        now = self._clock()
+        entry = self._lookup(key, lambda entry: entry[1] > now)
+        return (True, entry[0]) if entry else (False, None)
+
+    def put(self, key, value, ttl: Optional[int] = None) -> None:
+        """Store ``value`` for ``ttl`` seconds (defaults to the cache's ttl)."""
+        expires_at = self._clock() + (self.ttl if ttl is None else ttl)
+        self._store(key, (value, expires_at))
@@ -1,7 +1,9 @@
 class StatusCodes:
     OK = 200
     CREATED = 201
+    FOUND = 302
     BAD_REQUEST = 400
+    NOT_MODIFIED = 304
     NOT_FOUND = 404
     INTERNAL_SERVER_ERROR = 500
     UNAUTHORIZED = 401
@@ -16,3 +18,38 @@ class Headers:
         "Access-Control-Allow-Methods": "*",
         "Content-Type": "application/json"
     }
+    NO_STORE = "no-store"
+    # Cache-Control per public GET route. Bodies embed presigned image URLs,
+    # so max-age + stale-while-revalidate must stay within the presign
+    # cache's validity window (half its 300s refresh margin by default).
+    CACHE_POLICIES = {
+        "get-blogs": "public, max-age=60, stale-while-revalidate=90",
+        "get-blog": "public, max-age=60, stale-while-revalidate=90",
+        # Snapshots carry unsigned URLs, so they can be served stale for longer
+        "blog-snapshot": "public, max-age=60, stale-while-revalidate=600",
+    }
+
+    @classmethod
+    def for_route(cls, route, etag=None):
+        """CORS headers plus the route's caching policy and validator."""
+        headers = {**cls.CORS, "Cache-Control": cls.CACHE_POLICIES.get(route, cls.NO_STORE)}
+        if etag:
+            headers["ETag"] = etag
+            headers["Access-Control-Expose-Headers"] = "ETag"
+        return headers
+
+
+class BlogFields:
+    ALL = (
+        "id", "author", "title", "content", "excerpt", "tags", "reading_time", "images",
+        "created_at", "updated_at", "status", "status_published_at", "author_index", "published_at",
+    )
+    # Everything a feed card renders; leaves out the full HTML content
+    CARD = (
+        "id", "author", "title", "excerpt", "tags", "reading_time", "images",
+        "created_at", "updated_at", "status", "published_at",
+    )
+    PROJECTIONS = {
+        "card": CARD,
+        "full": None,
+    }
@@ -1,17 +1,18 @@
 import os
 import json
-import boto3
 import logging
 from urllib.parse import unquote
 
 from common.contsants import StatusCodes, Headers
 from common.utils import build_response
+from common import aws
+from common.s3 import guess_image_content_type
+from common.assets import parse_sha256, presign_content_uploads
+from common.uploads import UploadError
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-s3_client = boto3.client('s3')
-
 
 def lambda_handler(event, context):
     logger.info(f"Received event: {event}")
@@ -41,24 +42,33 @@ def lambda_handler(event, context):
     file_name = unquote(file_name)
 
     # Determine content type based on file extension
-    content_type = 'image/jpeg'  # default
-    file_lower = file_name.lower()
-    if file_lower.endswith('.png'):
-        content_type = 'image/png'
-    elif file_lower.endswith('.gif'):
-        content_type = 'image/gif'
-    elif file_lower.endswith('.webp'):
-        content_type = 'image/webp'
-    elif file_lower.endswith(('.jpg', '.jpeg')):
-        content_type = 'image/jpeg'
-    elif file_lower.endswith('.svg'):
-        content_type = 'image/svg+xml'
-    
+    content_type = guess_image_content_type(file_name)
+
+    try:
+        sha256 = parse_sha256(query_params.get("sha256"))
+    except UploadError as e:
+        return build_response(StatusCodes.BAD_REQUEST, Headers.CORS, {"error": str(e)})
+
+    # Clients that send the file's SHA-256 upload to its content-addressed
+    # key instead of fileName, and skip the upload if it is already stored
+    if sha256:
+        try:
+            upload = presign_content_uploads(media_bucket, [(sha256, content_type)])[0]
+        except Exception as e:
+            logger.error(f"Error generating presigned URL: {str(e)}")
+            return build_response(
+                StatusCodes.INTERNAL_SERVER_ERROR,
+                Headers.CORS,
+                {"error": str(e)},
+            )
+        upload["publicUrl"] = f"https://{media_bucket}.s3.amazonaws.com/{upload['fileName']}"
+        return build_response(StatusCodes.OK, Headers.CORS, upload)
+
     logger.info(f"Generating presigned URL for {file_name} with content type {content_type}")
 
     try:
         # Generate presigned URL for PUT operation (upload)
-        presigned_url = s3_client.generate_presigned_url(
+        presigned_url = aws.s3().generate_presigned_url(
             'put_object',
             Params={
                 'Bucket': media_bucket,
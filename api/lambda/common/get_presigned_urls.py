@@ -0,0 +1,138 @@
+import os
+import json
+import logging
+from urllib.parse import unquote
+
+from common.contsants import StatusCodes, Headers
+from common.utils import build_response
+from common.s3 import guess_image_content_type, get_s3_upload_urls, get_s3_file_urls
+from common.assets import parse_sha256, presign_content_uploads
+from common.uploads import UploadError
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+MAX_FILES_PER_REQUEST = 50
+
+
+def lambda_handler(event, context):
+    """Issue presigned PUT and GET URLs for a batch of file names in one call."""
+    logger.info(f"Received event: {event}")
+
+    # Handle OPTIONS request for CORS
+    if event.get('httpMethod') == 'OPTIONS':
+        return build_response(StatusCodes.OK, Headers.CORS, {})
+
+    media_bucket = os.getenv("MEDIA_BUCKET")
+    if not media_bucket:
+        logger.error("MEDIA_BUCKET env variable is not set")
+        return build_response(
+            StatusCodes.INTERNAL_SERVER_ERROR,
+            Headers.CORS,
+            {"error": "MEDIA_BUCKET env variable not set"},
+        )
+
+    try:
+        data = json.loads(event.get("body") or "{}")
+    except json.JSONDecodeError:
+        logger.error("Invalid JSON payload")
+        return build_response(
+            StatusCodes.BAD_REQUEST,
+            Headers.CORS,
+            {"error": "Invalid JSON payload"},
+        )
+
+    # Clients that hash their files send [{fileName, sha256}] and upload to content-addressed keys
+    content_files = data.get("files")
+    if content_files and isinstance(content_files, list):
+        return content_addressed_urls(media_bucket, content_files)
+
+    file_names = data.get("fileNames") or data.get("file_names")
+    if not file_names or not isinstance(file_names, list):
+        logger.error("fileNames list is required")
+        return build_response(
+            StatusCodes.BAD_REQUEST,
+            Headers.CORS,
+            {"error": "fileNames list is required"},
+        )
+
+    if len(file_names) > MAX_FILES_PER_REQUEST:
+        return build_response(
+            StatusCodes.BAD_REQUEST,
+            Headers.CORS,
+            {"error": f"At most {MAX_FILES_PER_REQUEST} files per request"},
+        )
+
+    file_names = [unquote(name) for name in file_names if isinstance(name, str) and name]
+    files = [(name, guess_image_content_type(name)) for name in file_names]
+
+    logger.info(f"Generating presigned URLs for {len(files)} files")
+
+    try:
+        upload_urls = get_s3_upload_urls(media_bucket, files, expires_in=3600)
+        download_urls = get_s3_file_urls(media_bucket, file_names, expires_in=3600)
+
+        return build_response(
+            StatusCodes.OK,
+            Headers.CORS,
+            {
+                "files": [
+                    {
+                        "fileName": name,
+                        "contentType": content_type,
+                        "presignedUrl": upload_urls[name],
+                        "downloadUrl": download_urls[name],
+                        "publicUrl": f"https://{media_bucket}.s3.amazonaws.com/{name}",
+                    }
+                    for name, content_type in files
+                ]
+            },
+        )
+    except Exception as e:
+        logger.error(f"Error generating presigned URLs: {str(e)}")
+        return build_response(
+            StatusCodes.INTERNAL_SERVER_ERROR,
+            Headers.CORS,
+            {"error": str(e)},
+        )
+
+
+def content_addressed_urls(media_bucket, content_files):
+    """
+    Presigned PUT and GET URLs for files identified by their SHA-256. The
+    fileName of each entry only decides its content type; files that are
+    already stored come back with exists: true and no upload URL.
+    """
+    if len(content_files) > MAX_FILES_PER_REQUEST:
+        return build_response(
+            StatusCodes.BAD_REQUEST,
+            Headers.CORS,
+            {"error": f"At most {MAX_FILES_PER_REQUEST} files per request"},
+        )
+
+    try:
+        files = [
+            (parse_sha256(entry.get("sha256")), guess_image_content_type(unquote(entry.get("fileName") or "")))
+            for entry in content_files if isinstance(entry, dict)
+        ]
+        if not files or not all(sha256 for sha256, _ in files):
+            raise UploadError("Every file needs a fileName and sha256")
+    except UploadError as e:
+        return build_response(StatusCodes.BAD_REQUEST, Headers.CORS, {"error": str(e)})
+
+    logger.info(f"Generating content-addressed presigned URLs for {len(files)} files")
+
+    try:
+        uploads = presign_content_uploads(media_bucket, files, expires_in=3600)
+        download_urls = get_s3_file_urls(media_bucket, [upload["fileName"] for upload in uploads], expires_in=3600)
+        for upload in uploads:
+            upload["downloadUrl"] = download_urls[upload["fileName"]]
+            upload["publicUrl"] = f"https://{media_bucket}.s3.amazonaws.com/{upload['fileName']}"
+        return build_response(StatusCodes.OK, Headers.CORS, {"files": uploads})
+    except Exception as e:
+        logger.error(f"Error generating presigned URLs: {str(e)}")
+        return build_response(
+            StatusCodes.INTERNAL_SERVER_ERROR,
+            Headers.CORS,
+            {"error": str(e)},
+        )
@@ -0,0 +1,119 @@
+"""
+HyperLogLog sketches for counting unique visitors.
+
+A sketch keeps ``m = 2 ** precision`` one-byte registers, so its size is
+fixed however many sessions it has seen. Sketches built from disjoint or
+overlapping sets merge by taking the register-wise maximum. The merged
+sketch estimates the size of the union exactly as if it had seen every
+session itself, so per-day sketches can be combined for any range.
+
+Error bound: the relative standard error of the estimate is
+``1.04 / sqrt(m)``. With the default precision of 12 (4096 registers)
+that is about 1.6%, so roughly 95% of estimates land within 3.3% of the
+true count. Small cardinalities (below ``2.5 * m``) use linear counting,
+which is close to exact in the range a portfolio site sees; right at the
+switch-over (around 10k for the default precision) the spread roughly
+doubles to about 3%.
+"""
+
+import hashlib
+import math
+import zlib
+from typing import Iterable, Optional, Tuple
+
+DEFAULT_PRECISION = 12
+FORMAT_VERSION = 1
+# 2 ** -rank for every possible register value, so estimate() only sums lookups
+_INVERSE_POWERS = tuple(2.0 ** -rank for rank in range(66))
+
+
+def _hash64(value: str) -> int:
+    # Python's hash() is salted per process; sketches must agree across Lambdas
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HyperLogLog:
+    """Mergeable cardinality sketch over string values."""
+
+    def __init__(self, precision: int = DEFAULT_PRECISION, registers: Optional[bytearray] = None):
+        if not 4 <= precision <= 16:
+            raise ValueError("precision must be between 4 and 16")
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = registers if registers is not None else bytearray(self.m)
+        if len(self.registers) != self.m:
+            raise ValueError(f"expected {self.m} registers, got {len(self.registers)}")
+
+    @classmethod
+    def of(cls, values: Iterable[str], precision: int = DEFAULT_PRECISION) -> "HyperLogLog":
+        sketch = cls(precision)
+        sketch.update(values)
+        return sketch
+
+    @property
+    def relative_error(self) -> float:
+        """Relative standard error of :meth:`estimate`."""
+        return 1.04 / math.sqrt(self.m)
+
+    def position(self, value: str) -> Tuple[int, int]:
+        """The register ``value`` maps to and the rank it would raise it to."""
+        hashed = _hash64(value)
+        index = hashed >> (64 - self.precision)
+        rest = hashed & ((1 << (64 - self.precision)) - 1)
+        # Position of the leftmost 1-bit in the remaining 64 - p bits
+        return index, (64 - self.precision) - rest.bit_length() + 1
+
+    def add(self, value: str) -> None:
+        index, rank = self.position(value)
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def update(self, values: Iterable[str]) -> None:
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        """Fold ``other`` into this sketch in place and return it."""
+        if other.precision != self.precision:
+            raise ValueError("cannot merge sketches of different precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def copy(self) -> "HyperLogLog":
+        return HyperLogLog(self.precision, bytearray(self.registers))
+
+    def estimate(self) -> int:
+        """Estimated number of distinct values added."""
+        zeros = self.registers.count(0)
+        if zeros == self.m:
+            return 0
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        raw = alpha * self.m * self.m / sum(map(_INVERSE_POWERS.__getitem__, self.registers))
+        if raw <= 2.5 * self.m and zeros:
+            # Linear counting is far more accurate for small cardinalities
+            return round(self.m * math.log(self.m / zeros))
+        return round(raw)
+
+    def __eq__(self, other) -> bool:
+        return (isinstance(other, HyperLogLog) and self.precision == other.precision
+                and self.registers == other.registers)
+
+    def to_bytes(self) -> bytes:
+        """Serialize for a DynamoDB Binary attribute; sparse days compress to a few bytes."""
+        return bytes((FORMAT_VERSION, self.precision)) + zlib.compress(bytes(self.registers))
+
+    @classmethod
+    def from_bytes(cls, data) -> "HyperLogLog":
+        """Load a sketch from ``to_bytes`` output or the Binary boto3 returns for it."""
+        data = bytes(getattr(data, "value", data))
+        if not data or data[0] != FORMAT_VERSION:
+            raise ValueError("unsupported HyperLogLog serialization")
+        return cls(data[1], bytearray(zlib.decompress(data[2:])))
+
+
+def merge_all(sketches: Iterable[HyperLogLog], precision: int = DEFAULT_PRECISION) -> HyperLogLog:
+    """Union of any number of sketches, e.g. one per day of a range."""
+    merged = HyperLogLog(precision)
+    for sketch in sketches:
+        merged.merge(sketch)
+    return merged
@@ -0,0 +1,167 @@
+"""
+Responsive image variants.
+
+``media.variants`` writes width-stepped AVIF, WebP and JPEG copies of
+every image uploaded under ``media/``, ``posts/`` or ``public/`` to
+``variants/<source key>/<width>.<ext>``, followed by a ``manifest.json``
+recording the source's and each copy's intrinsic size. This module holds
+that key layout and turns manifests into srcset-ready structures for API
+responses; it does not need Pillow, so the read path stays light.
+
+Manifests are cached per warm container. A missing manifest (variants
+not generated yet, or an image type without variants) is only cached
+briefly, so new uploads pick up their variants within a minute.
+"""
+
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+from common import aws
+from common.cache import ExpiringCache
+
+logger = logging.getLogger(__name__)
+
+VARIANTS_PREFIX = "variants/"
+MANIFEST_NAME = "manifest.json"
+SOURCE_PREFIXES = ("media/", "posts/", "public/")
+SOURCE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".gif", ".webp")
+
+VARIANT_WIDTHS = (320, 640, 960, 1280, 1920)
+# Preference order for <picture> sources; the last one is the fallback
+VARIANT_FORMATS = ("avif", "webp", "jpeg")
+FORMAT_CONTENT_TYPES = {
+    "avif": "image/avif",
+    "webp": "image/webp",
+    "jpeg": "image/jpeg",
+    "png": "image/png",
+    "gif": "image/gif",
+}
+FORMAT_EXTENSIONS = {"jpeg": "jpg"}
+
+MANIFEST_CACHE_SECONDS = int(os.getenv("IMAGE_MANIFEST_CACHE_SECONDS", "300"))
+MISSING_MANIFEST_CACHE_SECONDS = 60
+MAX_MANIFEST_READERS = 8
+
+manifest_cache = ExpiringCache(max_entries=2048, ttl=MANIFEST_CACHE_SECONDS)
+
+
+def wants_variants(key: str) -> bool:
+    """True for uploaded images that get responsive variants."""
+    return bool(key) and key.startswith(SOURCE_PREFIXES) and key.lower().endswith(SOURCE_EXTENSIONS)
+
+
+def variant_prefix(key: str) -> str:
+    return f"{VARIANTS_PREFIX}{key}/"
+
+
+def variant_key(key: str, width: int, fmt: str) -> str:
+    return f"{variant_prefix(key)}{width}.{FORMAT_EXTENSIONS.get(fmt, fmt)}"
+
+
+def manifest_key(key: str) -> str:
+    return f"{variant_prefix(key)}{MANIFEST_NAME}"
+
+
+def _read_manifest(bucket: str, key: str) -> Optional[dict]:
+    try:
+        body = aws.s3().get_object(Bucket=bucket, Key=manifest_key(key))["Body"].read()
+    except ClientError as e:
+        if e.response["Error"]["Code"] not in ("404", "NoSuchKey", "403", "AccessDenied"):
+            logger.warning(f"Could not read image manifest for {key}: {e}")
+        return None
+    except BotoCoreError as e:
+        logger.warning(f"Could not read image manifest for {key}: {e}")
+        return None
+    try:
+        return json.loads(body)
+    except ValueError:
+        logger.warning(f"Ignoring malformed image manifest for {key}")
+        return None
+
+
+def load_manifests(bucket: str, keys: Iterable[str]) -> Dict[str, Optional[dict]]:
+    """Variant manifests for ``keys`` (None where there is none), reading uncached ones in parallel."""
+    manifests, missing = {}, []
+    for key in dict.fromkeys(keys):
+        if not wants_variants(key):
+            manifests[key] = None
+            continue
+        found, manifest = manifest_cache.get((bucket, key))
+        if found:
+            manifests[key] = manifest
+        else:
+            missing.append(key)
+
+    if missing:
+        if len(missing) == 1:
+            loaded = [_read_manifest(bucket, missing[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=min(MAX_MANIFEST_READERS, len(missing))) as pool:
+                loaded = list(pool.map(lambda key: _read_manifest(bucket, key), missing))
+        for key, manifest in zip(missing, loaded):
+            manifest_cache.put((bucket, key), manifest,
+                               ttl=None if manifest else MISSING_MANIFEST_CACHE_SECONDS)
+            manifests[key] = manifest
+    return manifests
+
+
+def manifest_versions(bucket: str, keys: List[str]) -> List[str]:
+    """
+    One validator part per key: the source ETag its manifest was built
+    from, or "-" while there is none yet. Mixing these into a response
+    ETag stops a 304 from keeping a body built before the variants existed.
+    """
+    manifests = load_manifests(bucket, keys)
+    return [str(manifests[key].get("etag") or "+") if manifests.get(key) else "-" for key in keys]
+
+
+def image_source(url: str, manifest: Optional[dict], sign: Callable[[str], Optional[str]]) -> Dict:
+    """
+    srcset-ready description of one image.
+
+    ``url``, ``width``, ``height`` and ``format`` describe the original;
+    ``variants`` lists every generated copy as ``{url, width, height,
+    format}`` and ``sources`` groups them per format, best first, as
+    ``{type, srcset}`` for ``<picture><source>``. Without a manifest the
+    size is unknown and both lists are empty.
+    """
+    if not manifest:
+        return {"url": url, "width": None, "height": None, "format": None, "sources": [], "variants": []}
+
+    variants = []
+    for variant in sorted(manifest.get("variants", []), key=lambda v: v["width"]):
+        variant_url = sign(variant["key"])
+        if variant_url:
+            variants.append({
+                "url": variant_url,
+                "width": variant["width"],
+                "height": variant["height"],
+                "format": variant["format"],
+            })
+
+    sources = []
+    for fmt in VARIANT_FORMATS:
+        srcset = ", ".join(f"{v['url']} {v['width']}w" for v in variants if v["format"] == fmt)
+        if srcset:
+            sources.append({"type": FORMAT_CONTENT_TYPES[fmt], "srcset": srcset})
+
+    return {
+        "url": url,
+        "width": manifest.get("width"),
+        "height": manifest.get("height"),
+        "format": manifest.get("format"),
+        "sources": sources,
+        "variants": variants,
+    }
+
+
+def image_sources(bucket: str, keys: List[str], urls: List[str],
+                  sign: Callable[[str], Optional[str]]) -> List[Dict]:
+    """``image_source`` for each (key, url) pair, with one batched manifest load."""
+    manifests = load_manifests(bucket, keys)
+    return [image_source(url, manifests.get(key), sign) for key, url in zip(keys, urls)]
@@ -0,0 +1,147 @@
+"""
+Per-post view metrics read from the Analytics ``page_path_timestamp_index``.
+
+A post's page views are fetched with a bounded Query on its path and folded
+into one summary per UTC day. Closed days never change again, so their
+summaries, with unique sessions as a HyperLogLog sketch, are cached in
+the blog stats table under ``views#<id>#<day>``; repeat loads only query
+the days that are missing, which is normally just today.
+"""
+
+import logging
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from boto3.dynamodb.conditions import Key
+
+from analytics.records import PAGE_VIEW_FILTER, decode_record, projection
+from common.hyperloglog import HyperLogLog
+from common.traffic import traffic_source
+
+logger = logging.getLogger(__name__)
+
+VIEWS_PREFIX = "views#"
+PAGE_PATH_INDEX = "page_path_timestamp_index"
+BATCH_GET_LIMIT = 100
+BATCH_GET_RETRIES = 3
+
+
+def post_path(blog_id: str) -> str:
+    """Page path the frontend tracks for a post."""
+    return f"/blog/{blog_id}"
+
+
+def day_scope(blog_id: str, day: str) -> str:
+    return f"{VIEWS_PREFIX}{blog_id}#{day}"
+
+
+def window_days(days: int, today: Optional[str] = None) -> List[str]:
+    """The last ``days`` UTC dates ending with ``today``, oldest first."""
+    end = datetime.strptime(today, "%Y-%m-%d") if today else datetime.now(timezone.utc)
+    return [(end - timedelta(days=offset)).strftime("%Y-%m-%d") for offset in range(days - 1, -1, -1)]
+
+
+def empty_day() -> dict:
+    return {"views": 0, "visitors": HyperLogLog(), "referrers": Counter()}
+
+
+def summarize_views(items) -> Dict[str, dict]:
+    """Fold raw page view items into ``{day: summary}``."""
+    summaries = {}
+    for item in items:
+        day = item.get("timestamp", "")[:10]
+        summary = summaries.setdefault(day, empty_day())
+        summary["views"] += 1
+        if item.get("session_id"):
+            summary["visitors"].add(item["session_id"])
+        summary["referrers"][traffic_source(item)] += 1
+    return summaries
+
+
+def query_post_views(analytics_table, blog_id: str, since_day: str):
+    """Yield the post's page views from ``since_day`` onwards, following pagination."""
+    kwargs = {
+        "IndexName": PAGE_PATH_INDEX,
+        "KeyConditionExpression": Key("page_path").eq(post_path(blog_id)) & Key("timestamp").gte(since_day),
+        "FilterExpression": PAGE_VIEW_FILTER,
+        **projection("timestamp", "session_id", "referrer"),
+    }
+    response = analytics_table.query(**kwargs)
+    yield from map(decode_record, response.get("Items", []))
+    while "LastEvaluatedKey" in response:
+        response = analytics_table.query(ExclusiveStartKey=response["LastEvaluatedKey"], **kwargs)
+        yield from map(decode_record, response.get("Items", []))
+
+
+def _from_item(item: dict) -> dict:
+    if item.get("visitors") is not None:
+        visitors = HyperLogLog.from_bytes(item["visitors"])
+    else:
+        # Summaries cached before sketches stored the session ids themselves
+        visitors = HyperLogLog.of(item.get("sessions") or ())
+    return {
+        "views": int(item.get("views", 0)),
+        "visitors": visitors,
+        "referrers": Counter({source: int(count) for source, count in (item.get("referrers") or {}).items()}),
+    }
+
+
+def _to_item(blog_id: str, day: str, summary: dict) -> dict:
+    return {
+        "scope": day_scope(blog_id, day),
+        "views": summary["views"],
+        "referrers": dict(summary["referrers"]),
+        "visitors": summary["visitors"].to_bytes(),
+    }
+
+
+def load_cached_days(dynamodb, table_name: str, blog_id: str, days: List[str]) -> Dict[str, dict]:
+    """BatchGet the cached summaries for ``days``; missing days are simply absent."""
+    cached = {}
+    for start in range(0, len(days), BATCH_GET_LIMIT):
+        request = {table_name: {"Keys": [{"scope": day_scope(blog_id, day)} for day in days[start:start + BATCH_GET_LIMIT]]}}
+        for _ in range(BATCH_GET_RETRIES):
+            response = dynamodb.batch_get_item(RequestItems=request)
+            for item in response.get("Responses", {}).get(table_name, []):
+                cached[item["scope"].rsplit("#", 1)[1]] = _from_item(item)
+            request = response.get("UnprocessedKeys")
+            if not request:
+                break
+        # Anything still unprocessed is treated as a miss and re-queried
+    return cached
+
+
+def store_days(stats_table, blog_id: str, summaries: Dict[str, dict]) -> None:
+    """Cache closed-day summaries; failures only cost a re-query next time."""
+    try:
+        with stats_table.batch_writer() as batch:
+            for day, summary in summaries.items():
+                batch.put_item(Item=_to_item(blog_id, day, summary))
+    except Exception as e:
+        logger.error(f"Failed to cache view summaries for blog {blog_id}: {e}")
+
+
+def get_post_views(dynamodb, analytics_table, stats_table, blog_id: str, days: int,
+                   today: Optional[str] = None) -> Dict[str, dict]:
+    """
+    Return ``{day: summary}`` for every day of the window, oldest first.
+
+    Cached closed days are read back in one BatchGet; the Query only covers
+    the span from the oldest uncached day to now.
+    """
+    window = window_days(days, today)
+    today = window[-1]
+    closed = window[:-1]
+
+    cached = load_cached_days(dynamodb, stats_table.name, blog_id, closed) if closed else {}
+    missing = [day for day in window if day not in cached]
+    queried = summarize_views(query_post_views(analytics_table, blog_id, missing[0]))
+    logger.info(f"Blog {blog_id} views: {len(cached)} cached days, queried from {missing[0]}")
+
+    fresh = {day: queried.get(day, empty_day()) for day in missing}
+    to_cache = {day: summary for day, summary in fresh.items() if day != today}
+    if to_cache:
+        store_days(stats_table, blog_id, to_cache)
+
+    return {day: cached.get(day) or fresh[day] for day in window}
@@ -0,0 +1,469 @@
+"""
+Daily web analytics rollups maintained on every tracked page view.
+
+A day's rollup holds its view count, a ``hour#HH`` counter per hour,
+``page#<path>`` and ``source#<source>`` counters, the latest
+``title#<path>`` of each page and a HyperLogLog sketch of its unique
+visitors, so the dashboard reads a few items per day instead of the raw
+events.
+
+While a day is open the tracker spreads it over small items, so no item
+grows with the day's traffic or takes every write:
+
+- ``<day>#<n>`` counter shards (``ROLLUP_SHARDS``); each batch of page
+  views is ADDed to one of them with a single update;
+- ``<day>#v<n>`` visitor shards (``VISITOR_SHARDS``), each holding a
+  slice of the day's sketch registers as ``r<index>`` numbers. A session
+  raises its register with a conditional SET, so visitors take the size
+  of the sketch however many sessions the day sees.
+
+Paths are normalised before they become attribute names, and anything
+that cannot be a route of the site counts as ``(other)``. DynamoDB bills
+an update at the item's full size and rejects items over 400 KB, so a
+counter shard whose updates cost more than ``MAX_SHARD_UNITS`` write
+units stops taking new page attributes and counts its pages as
+``(other)`` as well.
+
+Once a day has closed, readers compact it: its shards (and the
+``sessions`` set items written before sharding carry) are folded into one
+``<day>`` item marked ``compacted``, keeping its busiest
+``MAX_COMPACTED_PAGES`` pages, and the shards are deleted. Readers ignore
+the shards of a compacted day.
+"""
+
+import logging
+import re
+import zlib
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+from botocore.exceptions import ClientError
+
+from common.cache import ExpiringCache
+from common.hyperloglog import DEFAULT_PRECISION, HyperLogLog
+from common.scan import consumed_units
+from common.traffic import traffic_source
+
+logger = logging.getLogger(__name__)
+
+HOUR_PREFIX = "hour#"
+PAGE_PREFIX = "page#"
+SOURCE_PREFIX = "source#"
+TITLE_PREFIX = "title#"
+REGISTER_PREFIX = "r"
+SHARD_SEPARATOR = "#"
+VISITOR_SHARD_PREFIX = "v"
+
+# Readers read every shard below these counts, so they may grow but never shrink
+ROLLUP_SHARDS = 8
+VISITOR_SHARDS = 8
+REGISTERS_PER_SHARD = (1 << DEFAULT_PRECISION) // VISITOR_SHARDS
+
+OTHER_PAGE = "(other)"
+MAX_PATH_LENGTH = 128
+MAX_PATH_SEGMENTS = 4
+MAX_TITLE_LENGTH = 200
+# A write unit per KB: past this a counter shard only takes fixed-size counters
+MAX_SHARD_UNITS = 32
+# DynamoDB's ValidationException text for an update that would pass 400 KB
+ITEM_TOO_LARGE_MESSAGE = "Item size has exceeded the maximum allowed size"
+MAX_COMPACTED_PAGES = 500
+
+BATCH_GET_LIMIT = 100
+BATCH_GET_RETRIES = 3
+DAY_SECONDS = 24 * 60 * 60
+
+_PATH_SEGMENT = re.compile(r"^[A-Za-z0-9._~%@:+-]{1,64}$")
+
+# What this container has learnt from its writes: counter shards that
+# outgrew MAX_SHARD_UNITS, and register values already stored, so a
+# returning session costs no write
+full_shards = ExpiringCache(max_entries=256, ttl=DAY_SECONDS)
+known_registers = ExpiringCache(max_entries=8192, ttl=DAY_SECONDS)
+
+
+def counter_key(day: str, shard: int) -> str:
+    return f"{day}{SHARD_SEPARATOR}{shard}"
+
+
+def visitor_key(day: str, shard: int) -> str:
+    return f"{day}{SHARD_SEPARATOR}{VISITOR_SHARD_PREFIX}{shard}"
+
+
+def shard_keys(day: str) -> List[str]:
+    """Every key the tracker can write an open day's counters and registers to."""
+    return ([counter_key(day, shard) for shard in range(ROLLUP_SHARDS)]
+            + [visitor_key(day, shard) for shard in range(VISITOR_SHARDS)])
+
+
+def normalize_path(path) -> str:
+    """
+    The page a tracked path is counted under: without query string,
+    fragment or empty segments, or ``OTHER_PAGE`` for anything that could
+    not be a route of the site (too long, too deep, unexpected characters).
+    """
+    if not isinstance(path, str):
+        return OTHER_PAGE
+    segments = [segment for segment in re.split(r"[?#]", path, 1)[0].split("/") if segment]
+    if not segments:
+        return "/"
+    if len(segments) > MAX_PATH_SEGMENTS or not all(map(_PATH_SEGMENT.match, segments)):
+        return OTHER_PAGE
+    path = "/" + "/".join(segments)
+    return path if len(path) <= MAX_PATH_LENGTH else OTHER_PAGE
+
+
+def empty_rollup(day: str) -> dict:
+    return {
+        "day": day,
+        "views": 0,
+        "hours": Counter(),
+        "pages": Counter(),
+        "titles": {},
+        "sources": Counter(),
+        "visitors": HyperLogLog(),
+    }
+
+
+def _hour_of(record: dict) -> str:
+    # Raw events carry ``hour`` as YYYY-MM-DD-HH; fall back to the timestamp
+    hour = record.get("hour") or ""
+    if len(hour) == 13:
+        return hour[-2:]
+    return (record.get("timestamp") or "")[11:13]
+
+
+def _title_of(record: dict, page_path: str) -> Optional[str]:
+    title = record.get("page_title")
+    if page_path == OTHER_PAGE or not title or not isinstance(title, str):
+        return None
+    return title[:MAX_TITLE_LENGTH]
+
+
+def add_event(rollup: dict, record: dict) -> None:
+    """Fold one page view into an in-memory rollup."""
+    page_path = normalize_path(record.get("page_path") or "/")
+    rollup["views"] += 1
+    hour = _hour_of(record)
+    if hour:
+        rollup["hours"][hour] += 1
+    rollup["pages"][page_path] += 1
+    title = _title_of(record, page_path)
+    if title:
+        rollup["titles"][page_path] = title
+    rollup["sources"][traffic_source(record)] += 1
+    if record.get("session_id"):
+        rollup["visitors"].add(record["session_id"])
+
+
+def merge_rollup(rollup: dict, other: dict) -> dict:
+    """Fold ``other`` (another part of the same day) into ``rollup`` and return it."""
+    rollup["views"] += other["views"]
+    for label in ("hours", "pages", "sources"):
+        rollup[label].update(other[label])
+    rollup["titles"].update(other["titles"])
+    rollup["visitors"].merge(other["visitors"])
+    return rollup
+
+
+def compute_rollups(items: Iterable[dict]) -> Dict[str, dict]:
+    """Build ``{day: rollup}`` from raw page view items."""
+    rollups = {}
+    for item in items:
+        day = item.get("date") or (item.get("timestamp") or "")[:10]
+        if day not in rollups:
+            rollups[day] = empty_rollup(day)
+        add_event(rollups[day], item)
+    return rollups
+
+
+def day_batches(records: Iterable[dict]) -> Dict[str, dict]:
+    """
+    Group page views by day into the counter deltas for one counter shard
+    and the highest rank each touched visitor register needs.
+    """
+    sketch = HyperLogLog()
+    days = {}
+    for record in records:
+        day = days.get(record["date"])
+        if day is None:
+            # Event ids are random, so batches spread evenly over the shards
+            shard = zlib.crc32(str(record.get("id", "")).encode("utf-8")) % ROLLUP_SHARDS
+            day = days[record["date"]] = {
+                "shard": shard, "counters": Counter(), "pages": Counter(), "titles": {}, "registers": {},
+            }
+        page_path = normalize_path(record.get("page_path") or "/")
+        day["counters"]["views"] += 1
+        day["counters"][f"{SOURCE_PREFIX}{traffic_source(record)}"] += 1
+        hour = _hour_of(record)
+        if hour:
+            day["counters"][f"{HOUR_PREFIX}{hour}"] += 1
+        day["pages"][page_path] += 1
+        title = _title_of(record, page_path)
+        if title:
+            day["titles"][page_path] = title
+        if record.get("session_id"):
+            index, rank = sketch.position(record["session_id"])
+            day["registers"][index] = max(rank, day["registers"].get(index, 0))
+    return days
+
+
+def counter_update(day: str, batch: dict, fold_pages: bool = False) -> dict:
+    """``update_item`` kwargs that ADD a day batch to its counter shard."""
+    pages, titles = batch["pages"], batch["titles"]
+    if fold_pages:
+        pages, titles = Counter({OTHER_PAGE: sum(pages.values())}), {}
+    counters = Counter(batch["counters"])
+    counters.update({f"{PAGE_PREFIX}{path}": count for path, count in pages.items()})
+
+    names, values, adds, sets = {}, {}, [], []
+    for i, (name, count) in enumerate(counters.items()):
+        names[f"#c{i}"] = name
+        values[f":c{i}"] = count
+        adds.append(f"#c{i} :c{i}")
+    for i, (path, title) in enumerate(titles.items()):
+        names[f"#t{i}"] = f"{TITLE_PREFIX}{path}"
+        values[f":t{i}"] = title
+        sets.append(f"#t{i} = :t{i}")
+    expression = "ADD " + ", ".join(adds)
+    if sets:
+        expression += " SET " + ", ".join(sets)
+    return {
+        "Key": {"day": counter_key(day, batch["shard"])},
+        "UpdateExpression": expression,
+        "ExpressionAttributeNames": names,
+        "ExpressionAttributeValues": values,
+    }
+
+
+def register_update(day: str, index: int, rank: int) -> dict:
+    """``update_item`` kwargs that raise one visitor register to at least ``rank``."""
+    return {
+        "Key": {"day": visitor_key(day, index // REGISTERS_PER_SHARD)},
+        "UpdateExpression": "SET #r = :rank",
+        "ConditionExpression": "attribute_not_exists(#r) OR #r < :rank",
+        "ExpressionAttributeNames": {"#r": f"{REGISTER_PREFIX}{index}"},
+        "ExpressionAttributeValues": {":rank": rank},
+    }
+
+
+def _error_code(e: ClientError) -> str:
+    return e.response.get("Error", {}).get("Code", "")
+
+
+def _too_large(e: ClientError) -> bool:
+    message = e.response.get("Error", {}).get("Message", "")
+    return _error_code(e) == "ValidationException" and ITEM_TOO_LARGE_MESSAGE in message
+
+
+def _apply_counters(rollup_table, day: str, batch: dict) -> bool:
+    update = counter_update(day, batch)
+    shard = update["Key"]["day"]
+    full, _ = full_shards.get(shard)
+    if full:
+        update = counter_update(day, batch, fold_pages=True)
+    try:
+        response = rollup_table.update_item(ReturnConsumedCapacity="TOTAL", **update)
+    except ClientError as e:
+        if full or not _too_large(e):
+            logger.error(f"Failed to update analytics rollup {shard}: {e}")
+            return False
+        logger.warning(f"Analytics rollup {shard} reached the item size limit")
+        full_shards.put(shard, True)
+        return _apply_counters(rollup_table, day, batch)
+    except Exception as e:
+        logger.error(f"Failed to update analytics rollup {shard}: {e}")
+        return False
+    if not full and consumed_units(response) > MAX_SHARD_UNITS:
+        logger.warning(f"Analytics rollup {shard} is over {MAX_SHARD_UNITS} KB; counting new pages as {OTHER_PAGE}")
+        full_shards.put(shard, True)
+    return True
+
+
+def _raise_register(rollup_table, day: str, index: int, rank: int) -> bool:
+    found, known = known_registers.get((day, index))
+    if found and known >= rank:
+        return True
+    try:
+        rollup_table.update_item(**register_update(day, index, rank))
+    except ClientError as e:
+        # A failed condition means the register is already at least this high
+        if _error_code(e) != "ConditionalCheckFailedException":
+            logger.error(f"Failed to update visitor register {index} of {day}: {e}")
+            return False
+    except Exception as e:
+        logger.error(f"Failed to update visitor register {index} of {day}: {e}")
+        return False
+    known_registers.put((day, index), rank)
+    return True
+
+
+def apply_rollups(rollup_table, records: Iterable[dict]) -> bool:
+    """
+    Add tracked page views to their days' rollups: one counter update per
+    day, plus one conditional update per visitor register they raise.
+    """
+    ok = True
+    for day, batch in day_batches(records).items():
+        ok = _apply_counters(rollup_table, day, batch) and ok
+        for index, rank in batch["registers"].items():
+            ok = _raise_register(rollup_table, day, index, rank) and ok
+    return ok
+
+
+def capped_pages(pages: Counter) -> Counter:
+    """The busiest ``MAX_COMPACTED_PAGES`` pages, with the rest counted as ``OTHER_PAGE``."""
+    if len(pages) <= MAX_COMPACTED_PAGES:
+        return Counter(pages)
+    kept = Counter(dict(pages.most_common(MAX_COMPACTED_PAGES)))
+    kept[OTHER_PAGE] += sum(pages.values()) - sum(kept.values())
+    return kept
+
+
+def to_item(rollup: dict, compacted: bool = True) -> dict:
+    """
+    Flatten a rollup into the stored ``<day>`` item. ``compacted`` tells
+    readers it already includes every shard of the day.
+    """
+    item = {"day": rollup["day"], "views": rollup["views"]}
+    pages = capped_pages(rollup["pages"])
+    titles = {path: title for path, title in rollup["titles"].items() if path in pages}
+    for prefix, values in ((HOUR_PREFIX, rollup["hours"]), (PAGE_PREFIX, pages),
+                           (SOURCE_PREFIX, rollup["sources"]), (TITLE_PREFIX, titles)):
+        for name, value in values.items():
+            item[f"{prefix}{name}"] = value
+    item["visitors"] = rollup["visitors"].to_bytes()
+    if compacted:
+        item["compacted"] = True
+    return item
+
+
+def from_item(item: dict) -> dict:
+    """Rebuild a rollup from a stored ``<day>`` item or counter shard."""
+    rollup = empty_rollup(item["day"].split(SHARD_SEPARATOR, 1)[0])
+    rollup["views"] = int(item.get("views", 0))
+    if item.get("visitors") is not None:
+        rollup["visitors"] = HyperLogLog.from_bytes(item["visitors"])
+    # Session ids items written before visitor shards still carry
+    rollup["visitors"].update(item.get("sessions") or ())
+    targets = ((HOUR_PREFIX, rollup["hours"]), (PAGE_PREFIX, rollup["pages"]), (SOURCE_PREFIX, rollup["sources"]))
+    for name, value in item.items():
+        if name.startswith(TITLE_PREFIX):
+            rollup["titles"][name[len(TITLE_PREFIX):]] = value
+            continue
+        for prefix, counter in targets:
+            if name.startswith(prefix):
+                counter[name[len(prefix):]] = int(value)
+                break
+    return rollup
+
+
+def _add_registers(sketch: HyperLogLog, item: dict) -> None:
+    for name, value in item.items():
+        if name.startswith(REGISTER_PREFIX) and name[len(REGISTER_PREFIX):].isdigit():
+            index = int(name[len(REGISTER_PREFIX):])
+            sketch.registers[index] = max(sketch.registers[index], int(value))
+
+
+def assemble_rollup(day: str, item: Optional[dict], shards: Dict[str, dict]) -> dict:
+    """A day's rollup from its ``<day>`` item (if any) and the shard items found for it."""
+    rollup = from_item(item) if item else empty_rollup(day)
+    for key, shard in shards.items():
+        if key.split(SHARD_SEPARATOR, 1)[1].startswith(VISITOR_SHARD_PREFIX):
+            _add_registers(rollup["visitors"], shard)
+        else:
+            merge_rollup(rollup, from_item(shard))
+    return rollup
+
+
+def _batch_get(dynamodb, table_name: str, keys: List[str]) -> Dict[str, dict]:
+    found = {}
+    for start in range(0, len(keys), BATCH_GET_LIMIT):
+        request = {table_name: {"Keys": [{"day": key} for key in keys[start:start + BATCH_GET_LIMIT]]}}
+        for _ in range(BATCH_GET_RETRIES):
+            response = dynamodb.batch_get_item(RequestItems=request)
+            for item in response.get("Responses", {}).get(table_name, []):
+                found[item["day"]] = item
+            request = response.get("UnprocessedKeys")
+            if not request:
+                break
+        else:
+            raise RuntimeError(f"{len(request[table_name]['Keys'])} rollup items were left unprocessed")
+    return found
+
+
+def compact_rollup(rollup_table, rollup: dict, keys: List[str]) -> bool:
+    """Fold a closed day into its one ``<day>`` item, then delete its shard items ``keys``."""
+    try:
+        rollup_table.put_item(
+            Item=to_item(rollup),
+            ConditionExpression="attribute_not_exists(#compacted)",
+            ExpressionAttributeNames={"#compacted": "compacted"},
+        )
+    except ClientError as e:
+        if _error_code(e) == "ConditionalCheckFailedException":
+            # Another reader compacted it first
+            return True
+        logger.error(f"Failed to compact analytics rollup for {rollup['day']}: {e}")
+        return False
+    except Exception as e:
+        logger.error(f"Failed to compact analytics rollup for {rollup['day']}: {e}")
+        return False
+    try:
+        with rollup_table.batch_writer() as batch:
+            for key in keys:
+                batch.delete_item(Key={"day": key})
+    except Exception as e:
+        # Harmless: readers ignore the shards of a compacted day
+        logger.warning(f"Failed to delete the shards of {rollup['day']}: {e}")
+    return True
+
+
+def load_rollups(dynamodb, table_name: str, days: List[str], compact_before: Optional[str] = None) -> Dict[str, dict]:
+    """
+    Read the rollups for ``days``; days without traffic are absent.
+
+    One BatchGet covers the ``<day>`` items, and a second the shards of
+    the days that are not compacted. Days earlier than ``compact_before``
+    that still have shards (or a session id set) are compacted as a side
+    effect.
+    """
+    items = _batch_get(dynamodb, table_name, days)
+    pending = {day for day in days if not items.get(day, {}).get("compacted")}
+    shard_items = _batch_get(dynamodb, table_name, [key for day in days if day in pending for key in shard_keys(day)])
+
+    rollups = {}
+    to_compact = []
+    for day in days:
+        item = items.get(day)
+        shards = {key: shard_items[key] for key in shard_keys(day) if key in shard_items} if day in pending else {}
+        if not item and not shards:
+            continue
+        rollups[day] = assemble_rollup(day, item, shards)
+        if compact_before and day < compact_before and day in pending:
+            to_compact.append((rollups[day], list(shards)))
+    if to_compact:
+        rollup_table = dynamodb.Table(table_name)
+        for rollup, keys in to_compact:
+            compact_rollup(rollup_table, rollup, keys)
+    return rollups
+
+
+def compare_rollups(expected: dict, actual: Optional[dict]) -> List[str]:
+    """Describe every counter where a stored rollup disagrees with one computed from raw events."""
+    actual = actual or empty_rollup(expected["day"])
+    problems = []
+    if expected["views"] != actual["views"]:
+        problems.append(f"views: raw {expected['views']}, rollup {actual['views']}")
+    for label in ("hours", "pages", "sources"):
+        wanted, stored = expected[label], actual[label]
+        if label == "pages":
+            # Compacted days keep only their busiest pages
+            wanted, stored = capped_pages(wanted), capped_pages(stored)
+        for name in sorted(set(wanted) | set(stored)):
+            if wanted[name] != stored[name]:
+                problems.append(f"{label} {name}: raw {wanted[name]}, rollup {stored[name]}")
+    # Sketches hash deterministically, so the same sessions give identical registers
+    if expected["visitors"] != actual["visitors"]:
+        problems.append(f"visitors: raw ~{expected['visitors'].estimate()}, rollup ~{actual['visitors'].estimate()}")
+    return problems
@@ -2,56 +2,163 @@
 This package contains all the basic operations for S3.
 """
 
-import boto3
 from botocore.exceptions import ClientError
-from typing import Optional, List
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Optional, List, Dict, Tuple, Iterator, Union
+from datetime import datetime, timezone
+from urllib.parse import quote
+import base64
+import binascii
+import hashlib
+import hmac
 import logging
 import os
+import re
+from common import aws
+from common.cache import PresignedUrlCache
 logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO'))
 
-s3_client = boto3.client('s3')
+# Shared across invocations of a warm container
+presigned_url_cache = PresignedUrlCache(
+    max_entries=int(os.getenv('PRESIGN_CACHE_MAX_ENTRIES', '1024')),
+    refresh_margin=int(os.getenv('PRESIGN_CACHE_REFRESH_MARGIN', '300')),
+)
+
+# Uploads above the threshold go up as a multipart upload of PART_SIZE parts,
+# at most MAX_UPLOAD_WORKERS at a time, so only that many parts (plus the
+# one being filled) are ever held in memory
+MULTIPART_THRESHOLD = 8 * 1024 * 1024
+PART_SIZE = 8 * 1024 * 1024
+MAX_UPLOAD_WORKERS = 4
+# Base64 characters decoded per step; a multiple of 4 so chunks decode alone
+BASE64_CHUNK_CHARS = 4 * 256 * 1024
 
 
 def get_s3_file(bucket: str, key: str) -> Optional[str]:
     """Retrieve a file's content from S3 as a UTF-8 string."""
     try:
-        s3_obj = s3_client.get_object(Bucket=bucket, Key=key)
+        s3_obj = aws.s3().get_object(Bucket=bucket, Key=key)
         return s3_obj['Body'].read().decode('utf-8')
     except ClientError as e:
         logging.error(f"Error fetching {key} from bucket {bucket}: {e}")
         return None
 
 
-def put_s3_file(bucket: str, key: str, content: str, content_type: str = None) -> bool:
-    """Upload a string content to S3."""
+def put_s3_file(bucket: str, key: str, content: Union[str, bytes], content_type: str = None,
+                cache_control: str = None, encoding: str = 'utf-8') -> bool:
+    """
+    Upload content to S3. Bytes are stored as-is; a str is converted with
+    ``encoding``, either a text codec such as 'utf-8' or 'base64' for
+    binary files sent inside JSON.
+    """
+    if isinstance(content, str):
+        if encoding == 'base64':
+            return put_s3_base64(bucket, key, content, content_type, cache_control)
+        content = content.encode(encoding)
+    return put_s3_bytes(bucket, key, content, content_type, cache_control)
+
+
+def _extra_args(content_type: str = None, cache_control: str = None) -> dict:
+    extra_args = {}
+    if content_type:
+        extra_args['ContentType'] = content_type
+    if cache_control:
+        extra_args['CacheControl'] = cache_control
+    return extra_args
+
+
+def put_s3_bytes(bucket: str, key: str, data: bytes, content_type: str = None, cache_control: str = None) -> bool:
+    """Upload binary data, as a multipart upload of memoryview slices when it is large."""
+    extra_args = _extra_args(content_type, cache_control)
     try:
-        # Check if content is base64 encoded
-        if isinstance(content, str):
-            try:
-                # Try to decode as base64
-                import base64
-                content = base64.b64decode(content)
-            except Exception:
-                # If not base64, encode as UTF-8
-                content = content.encode('utf-8')
-        
-        extra_args = {}
-        if content_type:
-            extra_args['ContentType'] = content_type
-            
-        s3_client.put_object(Bucket=bucket, Key=key, Body=content, **extra_args)
+        if len(data) <= MULTIPART_THRESHOLD:
+            aws.s3().put_object(Bucket=bucket, Key=key, Body=data, **extra_args)
+        else:
+            view = memoryview(data)
+            parts = (view[start:start + PART_SIZE] for start in range(0, len(view), PART_SIZE))
+            _multipart_upload(bucket, key, parts, extra_args)
+        return True
+    except ClientError as e:
+        logging.error(f"Error putting file to {bucket}/{key}: {e}")
+        return False
+
+
+def put_s3_base64(bucket: str, key: str, encoded: str, content_type: str = None, cache_control: str = None) -> bool:
+    """
+    Decode base64 text and upload the bytes. Large payloads are decoded a
+    chunk at a time straight into multipart parts, so the decoded file is
+    never held in memory whole. Raises ValueError for invalid base64.
+    """
+    # Decoded size is 3 bytes per 4 characters, less the padding
+    if len(encoded) * 3 // 4 <= MULTIPART_THRESHOLD:
+        return put_s3_bytes(bucket, key, _b64decode(encoded), content_type, cache_control)
+    if len(encoded) % 4:
+        raise ValueError("Invalid base64 content: length is not a multiple of 4")
+    try:
+        _multipart_upload(bucket, key, _decoded_parts(encoded), _extra_args(content_type, cache_control))
         return True
     except ClientError as e:
         logging.error(f"Error putting file to {bucket}/{key}: {e}")
         return False
 
 
+def _b64decode(encoded: str) -> bytes:
+    try:
+        return base64.b64decode(encoded, validate=True)
+    except binascii.Error as e:
+        raise ValueError(f"Invalid base64 content: {e}")
+
+
+def _decoded_parts(encoded: str) -> Iterator[bytes]:
+    """Yield PART_SIZE pieces of the decoded bytes (the last one shorter)."""
+    buffer = bytearray()
+    for start in range(0, len(encoded), BASE64_CHUNK_CHARS):
+        buffer += _b64decode(encoded[start:start + BASE64_CHUNK_CHARS])
+        while len(buffer) >= PART_SIZE:
+            yield bytes(buffer[:PART_SIZE])
+            del buffer[:PART_SIZE]
+    if buffer:
+        yield bytes(buffer)
+
+
+def _multipart_upload(bucket: str, key: str, parts: Iterator[bytes], extra_args: dict) -> None:
+    """
+    Upload parts (each at least 5 MB except the last) concurrently. The
+    next part is only pulled from ``parts`` once fewer than
+    MAX_UPLOAD_WORKERS are in flight. Aborts the upload on any failure.
+    """
+    s3 = aws.s3()
+    upload_id = s3.create_multipart_upload(Bucket=bucket, Key=key, **extra_args)['UploadId']
+
+    def upload_part(number, body):
+        response = s3.upload_part(Bucket=bucket, Key=key, UploadId=upload_id, PartNumber=number, Body=body)
+        return {'PartNumber': number, 'ETag': response['ETag']}
+
+    try:
+        completed = []
+        with ThreadPoolExecutor(max_workers=MAX_UPLOAD_WORKERS, thread_name_prefix='s3-part') as executor:
+            in_flight = set()
+            for number, body in enumerate(parts, start=1):
+                if len(in_flight) >= MAX_UPLOAD_WORKERS:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    completed.extend(future.result() for future in done)
+                in_flight.add(executor.submit(upload_part, number, body))
+            completed.extend(future.result() for future in wait(in_flight)[0])
+        s3.complete_multipart_upload(
+            Bucket=bucket, Key=key, UploadId=upload_id,
+            MultipartUpload={'Parts': sorted(completed, key=lambda part: part['PartNumber'])},
+        )
+    except Exception:
+        s3.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+        raise
+
+
 def delete_s3_file(bucket: str, key: str) -> bool:
     """Delete a file from S3."""
     if not key:
         return False
     try:
-        s3_client.delete_object(Bucket=bucket, Key=key)
+        aws.s3().delete_object(Bucket=bucket, Key=key)
         return True
     except ClientError as e:
         logging.error(f"Error deleting file {key} from bucket {bucket}: {e}")
@@ -61,7 +168,7 @@ def delete_s3_file(bucket: str, key: str) -> bool:
 def list_s3_files(bucket: str, prefix: str = '') -> List[str]:
     """List all file keys in a bucket with an optional prefix."""
     try:
-        paginator = s3_client.get_paginator('list_objects_v2')
+        paginator = aws.s3().get_paginator('list_objects_v2')
         result = []
         for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
             contents = page.get('Contents', [])
@@ -85,7 +192,7 @@ def list_s3_files_by_suffix(bucket: str, suffix: str) -> List[str]:
 def get_s3_file_url(bucket: str, key: str, expires_in: int = 3600) -> Optional[str]:
     """Generate a presigned URL for downloading a file."""
     try:
-        return s3_client.generate_presigned_url(
+        return aws.s3().generate_presigned_url(
             'get_object',
             Params={'Bucket': bucket, 'Key': key},
             ExpiresIn=expires_in
@@ -95,10 +202,193 @@ def get_s3_file_url(bucket: str, key: str, expires_in: int = 3600) -> Optional[s
         return None
 
 
+def get_s3_public_url(bucket: str, key: str) -> str:
+    """Return the unsigned URL of an object readable through the bucket policy."""
+    return f"https://{bucket}.s3.amazonaws.com/{quote(key, safe='/~')}"
+
+
+def get_cached_s3_file_url(bucket: str, key: str, expires_in: int = 3600) -> Optional[str]:
+    """Generate a presigned download URL, reusing a cached one while it is still fresh."""
+    return presigned_url_cache.get_or_sign(bucket, key, expires_in, get_fast_s3_file_url)
+
+
+CONTENT_TYPES = {
+    '.png': 'image/png',
+    '.gif': 'image/gif',
+    '.webp': 'image/webp',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.svg': 'image/svg+xml',
+}
+
+
+def guess_image_content_type(file_name: str) -> str:
+    """Return the image content type for a file name, defaulting to JPEG."""
+    extension = os.path.splitext(file_name.lower())[1]
+    return CONTENT_TYPES.get(extension, 'image/jpeg')
+
+
+_DNS_COMPATIBLE_BUCKET = re.compile(r'^[a-z0-9][a-z0-9\-]{1,61}[a-z0-9]$')
+_signing_keys = {}
+
+
+def _hmac_sha256(key: bytes, msg: str) -> bytes:
+    return hmac.new(key, msg.encode('utf-8'), hashlib.sha256).digest()
+
+
+def _derive_signing_key(secret_key: str, datestamp: str, region: str) -> bytes:
+    """Derive (and memoize for the day) the SigV4 signing key for S3."""
+    cache_key = (secret_key, datestamp, region)
+    signing_key = _signing_keys.get(cache_key)
+    if signing_key is None:
+        k_date = _hmac_sha256(('AWS4' + secret_key).encode('utf-8'), datestamp)
+        k_region = _hmac_sha256(k_date, region)
+        k_service = _hmac_sha256(k_region, 's3')
+        signing_key = _hmac_sha256(k_service, 'aws4_request')
+        # Only the current day's key is ever useful again
+        _signing_keys.clear()
+        _signing_keys[cache_key] = signing_key
+    return signing_key
+
+
+def _uri_encode(value: str) -> str:
+    return quote(value, safe='-_.~')
+
+
+class SigV4QuerySigner:
+    """
+    Presign S3 URLs with AWS Signature Version 4 query authentication.
+
+    The date/region/service signing key is derived once per signer, so a
+    batch of keys only costs one canonical request hash and one HMAC each.
+    URLs are identical to botocore's ``generate_presigned_url`` output for
+    an s3v4 client signing at the same instant.
+    """
+
+    def __init__(self, access_key: str, secret_key: str, region: str,
+                 session_token: Optional[str] = None, now: Optional[datetime] = None):
+        now = now or datetime.now(timezone.utc)
+        self.access_key = access_key
+        self.session_token = session_token
+        self.region = region
+        self.amz_date = now.strftime('%Y%m%dT%H%M%SZ')
+        datestamp = now.strftime('%Y%m%d')
+        self.scope = f"{datestamp}/{region}/s3/aws4_request"
+        self.signing_key = _derive_signing_key(secret_key, datestamp, region)
+
+    def _host_and_path(self, bucket: str, key: str) -> Tuple[str, str]:
+        encoded_key = quote(key, safe='/~')
+        if _DNS_COMPATIBLE_BUCKET.match(bucket):
+            return f"{bucket}.s3.amazonaws.com", f"/{encoded_key}"
+        host = 's3.amazonaws.com' if self.region == 'us-east-1' else f"s3.{self.region}.amazonaws.com"
+        return host, f"/{bucket}/{encoded_key}"
+
+    def presign(self, bucket: str, key: str, expires_in: int = 3600,
+                method: str = 'GET', content_type: Optional[str] = None,
+                headers: Optional[Dict[str, str]] = None) -> str:
+        """
+        Return a presigned URL for ``method`` on ``bucket/key``. Any extra
+        ``headers`` are signed, so the request must send them unchanged.
+        """
+        host, path = self._host_and_path(bucket, key)
+
+        headers = {name.lower(): value for name, value in (headers or {}).items()}
+        headers['host'] = host
+        if content_type:
+            headers['content-type'] = content_type
+        signed_headers = ';'.join(sorted(headers))
+        canonical_headers = ''.join(f"{name}:{headers[name]}\n" for name in sorted(headers))
+
+        params = [
+            ('X-Amz-Algorithm', 'AWS4-HMAC-SHA256'),
+            ('X-Amz-Credential', f"{self.access_key}/{self.scope}"),
+            ('X-Amz-Date', self.amz_date),
+            ('X-Amz-Expires', str(expires_in)),
+            ('X-Amz-SignedHeaders', signed_headers),
+        ]
+        if self.session_token:
+            params.append(('X-Amz-Security-Token', self.session_token))
+        query = '&'.join(f"{_uri_encode(k)}={_uri_encode(v)}" for k, v in params)
+        canonical_query = '&'.join(f"{_uri_encode(k)}={_uri_encode(v)}" for k, v in sorted(params))
+
+        canonical_request = '\n'.join([
+            method, path, canonical_query, canonical_headers, signed_headers, 'UNSIGNED-PAYLOAD'
+        ])
+        string_to_sign = '\n'.join([
+            'AWS4-HMAC-SHA256',
+            self.amz_date,
+            self.scope,
+            hashlib.sha256(canonical_request.encode('utf-8')).hexdigest(),
+        ])
+        signature = hmac.new(self.signing_key, string_to_sign.encode('utf-8'), hashlib.sha256).hexdigest()
+        return f"https://{host}{path}?{query}&X-Amz-Signature={signature}"
+
+
+def get_s3_signer(now: Optional[datetime] = None) -> Optional[SigV4QuerySigner]:
+    """Build a signer from the container's current credentials, or None if unavailable."""
+    credentials = aws.session().get_credentials()
+    if credentials is None:
+        return None
+    frozen = credentials.get_frozen_credentials()
+    region = aws.s3().meta.region_name or 'us-east-1'
+    return SigV4QuerySigner(frozen.access_key, frozen.secret_key, region, frozen.token, now=now)
+
+
+def get_fast_s3_file_url(bucket: str, key: str, expires_in: int = 3600) -> Optional[str]:
+    """Generate a presigned download URL with the local SigV4 signer."""
+    signer = get_s3_signer()
+    if signer is None:
+        return get_s3_file_url(bucket, key, expires_in)
+    return signer.presign(bucket, key, expires_in)
+
+
+def get_s3_file_urls(bucket: str, keys: List[str], expires_in: int = 3600) -> Dict[str, str]:
+    """Generate presigned download URLs for many keys with one signing key."""
+    signer = get_s3_signer()
+    if signer is None:
+        return {key: get_s3_file_url(bucket, key, expires_in) for key in keys}
+    return {key: signer.presign(bucket, key, expires_in) for key in keys}
+
+
+# Signed PUT headers and the put_object parameters botocore signs them from
+PUT_HEADER_PARAMS = {
+    'cache-control': 'CacheControl',
+    'x-amz-checksum-sha256': 'ChecksumSHA256',
+}
+
+
+def get_s3_upload_urls(bucket: str, files: List[Tuple[str, str]], expires_in: int = 3600,
+                       headers: Optional[Dict[str, Dict[str, str]]] = None) -> Dict[str, str]:
+    """
+    Generate presigned PUT URLs for many (key, content_type) pairs with one
+    signing key. ``headers`` maps a key to extra headers (see
+    ``PUT_HEADER_PARAMS``) its upload must send.
+    """
+    headers = headers or {}
+    signer = get_s3_signer()
+    if signer is None:
+        return {
+            key: aws.s3().generate_presigned_url(
+                'put_object',
+                Params={
+                    'Bucket': bucket, 'Key': key, 'ContentType': content_type,
+                    **{PUT_HEADER_PARAMS[name]: value for name, value in headers.get(key, {}).items()},
+                },
+                ExpiresIn=expires_in
+            )
+            for key, content_type in files
+        }
+    return {
+        key: signer.presign(bucket, key, expires_in, method='PUT', content_type=content_type,
+                            headers=headers.get(key))
+        for key, content_type in files
+    }
+
+
 def download_s3_file_to_local(bucket: str, key: str, local_path: str) -> bool:
     """Download a file from S3 and save it to a local path."""
     try:
-        s3_client.download_file(bucket, key, local_path)
+        aws.s3().download_file(bucket, key, local_path)
         return True
     except ClientError as e:
         logging.error(f"Error downloading {bucket}/{key} to {local_path}: {e}")
@@ -108,7 +398,7 @@ def download_s3_file_to_local(bucket: str, key: str, local_path: str) -> bool:
 def upload_local_file_to_s3(local_path: str, bucket: str, key: str) -> bool:
     """Upload a local file to S3."""
     try:
-        s3_client.upload_file(local_path, bucket, key)
+        aws.s3().upload_file(local_path, bucket, key)
         return True
     except ClientError as e:
         logging.error(f"Error uploading {local_path} to {bucket}/{key}: {e}")
@@ -118,7 +408,7 @@ def upload_local_file_to_s3(local_path: str, bucket: str, key: str) -> bool:
 def s3_file_exists(bucket: str, key: str) -> bool:
     """Check if a file exists in S3."""
     try:
-        s3_client.head_object(Bucket=bucket, Key=key)
+        aws.s3().head_object(Bucket=bucket, Key=key)
         return True
     except ClientError as e:
         if e.response['Error']['Code'] == "404":
@@ -130,7 +420,7 @@ def s3_file_exists(bucket: str, key: str) -> bool:
 def get_s3_file_metadata(bucket: str, key: str) -> Optional[dict]:
     """Get metadata for a file in S3."""
     try:
-        response = s3_client.head_object(Bucket=bucket, Key=key)
+        response = aws.s3().head_object(Bucket=bucket, Key=key)
         return response
     except ClientError as e:
         logging.error(f"Error getting metadata for {bucket}/{key}: {e}")
@@ -0,0 +1,159 @@
+"""
+Parallel segmented DynamoDB scans for full-table passes.
+
+``parallel_scan`` splits a Scan into ``TotalSegments`` segments, reads them
+concurrently on a thread pool and streams items back through a generator.
+Pages are handed over through a bounded queue, so a slow consumer applies
+back-pressure instead of letting every segment buffer the table in memory.
+``parallel_pages`` exposes the same machinery for any set of paginated
+reads, such as one Query per day.
+Table resources are not thread-safe, so the segments share the client
+behind the table (``aws.thread_safe``) instead.
+"""
+
+import functools
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Optional
+
+from common import aws
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SEGMENTS = 4
+_DONE = object()
+
+
+class CapacityThrottle:
+    """
+    Token bucket over consumed capacity units shared by all segments.
+
+    Each page reports what it consumed; once the budget for the current
+    second is spent, callers sleep until enough has been refilled.
+    """
+
+    def __init__(self, units_per_second: float, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.units_per_second = float(units_per_second)
+        self._clock = clock
+        self._sleep = sleep
+        self._available = self.units_per_second
+        self._updated = clock()
+        self._lock = threading.Lock()
+        self.consumed = 0.0
+
+    def consume(self, units: float) -> None:
+        """Charge ``units`` and block while the bucket is in debt."""
+        with self._lock:
+            now = self._clock()
+            self._available = min(self.units_per_second,
+                                  self._available + (now - self._updated) * self.units_per_second)
+            self._updated = now
+            self._available -= units
+            self.consumed += units
+            wait = -self._available / self.units_per_second if self._available < 0 else 0
+        if wait:
+            self._sleep(wait)
+
+
+def consumed_units(response: dict) -> float:
+    """Capacity units a call made with ``ReturnConsumedCapacity='TOTAL'`` used (0 if not reported)."""
+    capacity = response.get("ConsumedCapacity") or {}
+    return float(capacity.get("CapacityUnits", 0))
+
+
+def _segment_pages(table, segment: int, total_segments: int, throttle: Optional[CapacityThrottle],
+                   scan_kwargs: dict) -> Iterator[list]:
+    kwargs = dict(scan_kwargs, Segment=segment, TotalSegments=total_segments)
+    if throttle:
+        kwargs["ReturnConsumedCapacity"] = "TOTAL"
+    while True:
+        response = table.scan(**kwargs)
+        if throttle:
+            throttle.consume(consumed_units(response))
+        yield response.get("Items", [])
+        if "LastEvaluatedKey" not in response:
+            return
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def _drain(producer: Callable[[], Iterable[list]], pages: queue.Queue, stop: threading.Event) -> None:
+    try:
+        for page in producer():
+            if stop.is_set():
+                break
+            _put(pages, page, stop)
+    except Exception as e:
+        logger.error(f"Page producer failed: {e}")
+        _put(pages, e, stop)
+    finally:
+        _put(pages, _DONE, stop)
+
+
+def _put(pages: queue.Queue, value, stop: threading.Event) -> None:
+    # Blocks while the buffer is full, but gives up once the consumer is gone
+    while not stop.is_set():
+        try:
+            pages.put(value, timeout=0.1)
+            return
+        except queue.Full:
+            continue
+
+
+def parallel_pages(producers: List[Callable[[], Iterable[list]]], max_workers: Optional[int] = None,
+                   max_buffered_pages: Optional[int] = None) -> Iterator[list]:
+    """
+    Run each producer (a callable returning an iterable of pages) on a thread
+    pool and yield their pages as they arrive.
+
+    At most ``max_buffered_pages`` pages (default: two per worker) wait in
+    memory; producers block until the consumer catches up. A failing
+    producer re-raises its exception here after the others are stopped.
+    """
+    if not producers:
+        return
+    max_workers = max_workers or len(producers)
+    pages = queue.Queue(maxsize=max_buffered_pages or 2 * max_workers)
+    stop = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pages")
+    for producer in producers:
+        executor.submit(_drain, producer, pages, stop)
+
+    try:
+        remaining = len(producers)
+        while remaining:
+            page = pages.get()
+            if page is _DONE:
+                remaining -= 1
+            elif isinstance(page, Exception):
+                raise page
+            else:
+                yield page
+    finally:
+        # Also runs when the caller stops iterating early
+        stop.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def parallel_scan(table, total_segments: int = DEFAULT_SEGMENTS, max_buffered_pages: Optional[int] = None,
+                  throttle: Optional[CapacityThrottle] = None, **scan_kwargs) -> Iterator[dict]:
+    """
+    Yield every item of ``table`` read by ``total_segments`` concurrent segments.
+
+    ``scan_kwargs`` are passed to each Scan unchanged (ProjectionExpression,
+    FilterExpression, ExpressionAttributeNames, ...). At most
+    ``max_buffered_pages`` pages (default: two per segment) are held in
+    memory at once. Items arrive in no particular order. A failing segment
+    re-raises its exception here after the other segments are stopped.
+    """
+    total_segments = max(int(total_segments), 1)
+    table = aws.thread_safe(table)
+    producers = [
+        functools.partial(_segment_pages, table, segment, total_segments, throttle, scan_kwargs)
+        for segment in range(total_segments)
+    ]
+    for page in parallel_pages(producers, max_buffered_pages=max_buffered_pages):
+        yield from page
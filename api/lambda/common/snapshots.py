@@ -0,0 +1,77 @@
+"""
+Pre-rendered JSON snapshots of published blog posts.
+
+A snapshot is the get-blog response body for a post, stored in the media
+bucket under a stable key so readers (or a CDN) can fetch it as a static
+object instead of going through Lambda, DynamoDB and presigning.
+"""
+
+import logging
+
+from common.cache import ExpiringCache
+from common.contsants import Headers
+from common.s3 import put_s3_file, delete_s3_file, get_s3_file, get_s3_public_url, s3_file_exists
+from common.utils import dumps, extract_s3_key_from_url
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_PREFIX = "public/snapshots/blogs/"
+# Matches the snapshot's own max-age, so a cached answer is never staler than the object
+SNAPSHOT_EXISTS_CACHE_SECONDS = 60
+
+snapshot_exists_cache = ExpiringCache(max_entries=1024, ttl=SNAPSHOT_EXISTS_CACHE_SECONDS)
+
+
+def snapshot_key(blog_id: str) -> str:
+    return f"{SNAPSHOT_PREFIX}{blog_id}.json"
+
+
+def snapshot_url(media_bucket: str, blog_id: str) -> str:
+    return get_s3_public_url(media_bucket, snapshot_key(blog_id))
+
+
+def render_snapshot(item: dict, media_bucket: str) -> str:
+    """
+    Render a post as get-blog would return it. Images use public object URLs
+    rather than presigned ones, since a snapshot outlives any signature.
+    """
+    snapshot = dict(item)
+    images = []
+    for image_ref in item.get("images") or []:
+        key = extract_s3_key_from_url(image_ref) if image_ref else None
+        if key:
+            images.append(get_s3_public_url(media_bucket, key))
+    snapshot["images"] = images
+    return dumps(snapshot)
+
+
+def write_blog_snapshot(media_bucket: str, item: dict) -> bool:
+    """Write the snapshot of a published post, or remove it for any other status."""
+    if item.get("status") != "published":
+        return delete_blog_snapshot(media_bucket, item["id"])
+    return put_s3_file(
+        media_bucket,
+        snapshot_key(item["id"]),
+        render_snapshot(item, media_bucket).encode("utf-8"),
+        content_type="application/json",
+        cache_control=Headers.CACHE_POLICIES["blog-snapshot"],
+    )
+
+
+def read_blog_snapshot(media_bucket: str, blog_id: str):
+    """Return the snapshot JSON string, or None if the post has none."""
+    return get_s3_file(media_bucket, snapshot_key(blog_id))
+
+
+def blog_snapshot_exists(media_bucket: str, blog_id: str) -> bool:
+    """Whether the post has a snapshot, remembered per warm container for a minute."""
+    cache_key = (media_bucket, blog_id)
+    found, exists = snapshot_exists_cache.get(cache_key)
+    if not found:
+        exists = s3_file_exists(media_bucket, snapshot_key(blog_id))
+        snapshot_exists_cache.put(cache_key, exists)
+    return exists
+
+
+def delete_blog_snapshot(media_bucket: str, blog_id: str) -> bool:
+    return delete_s3_file(media_bucket, snapshot_key(blog_id))
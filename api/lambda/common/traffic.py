@@ -0,0 +1,23 @@
+"""
+Helpers shared by the analytics handlers for classifying page views.
+"""
+
+SEARCH_ENGINES = ("google",)
+SOCIAL_NETWORKS = ("facebook", "twitter", "linkedin", "instagram")
+
+
+def classify_referrer(referrer) -> str:
+    """Bucket a raw referrer into the traffic source shown on the dashboards."""
+    referrer = (referrer or "").strip().lower()
+    if not referrer:
+        return "Direct"
+    if any(engine in referrer for engine in SEARCH_ENGINES):
+        return "Organic Search"
+    if any(social in referrer for social in SOCIAL_NETWORKS):
+        return "Social Media"
+    return "Referral"
+
+
+def traffic_source(record: dict) -> str:
+    """Traffic source of an event, using the category stored at ingest when present."""
+    return record.get("source") or classify_referrer(record.get("referrer"))
@@ -1,15 +1,19 @@
 import os
 import json
-import boto3
 import logging
 
 from common.contsants import StatusCodes, Headers
 from common.utils import build_response
-from common.s3 import put_s3_file, get_s3_file_url
+from common.s3 import get_s3_file_url, guess_image_content_type
+from common import assets
+from common.uploads import IMAGE_TYPES, UploadError, staged_upload, start_upload
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+UPLOAD_KIND = "media"
+MAX_MEDIA_BYTES = int(os.getenv("MAX_MEDIA_BYTES", str(10 * 1024 * 1024)))
+
 
 def lambda_handler(event, context):
     logger.info(f"Received event: {event}")
@@ -25,6 +29,7 @@ def lambda_handler(event, context):
 
     payload = event.get("body")
 
+    data = {}
     file_content = None
     file_name = None
 
@@ -42,6 +47,10 @@ def lambda_handler(event, context):
                 {"error": "Invalid JSON payload"},
             )
 
+    action = data.get("action")
+    if action in ("start", "finalize"):
+        return direct_upload(media_bucket, action, file_name, data)
+
     if not file_content:
         logger.error("File content is required")
         return build_response(
@@ -59,12 +68,76 @@ def lambda_handler(event, context):
         )
 
     try:
-        put_s3_file(media_bucket, file_name, file_content)
-        file_url = get_s3_file_url(media_bucket, file_name)
+        stored = assets.store_base64(media_bucket, file_content, guess_image_content_type(file_name))
+        return uploaded_response(media_bucket, stored)
+    except ValueError as e:
+        logger.error(f"Rejected file upload: {str(e)}")
+        return build_response(
+            StatusCodes.BAD_REQUEST,
+            Headers.CORS,
+            {"error": str(e)},
+        )
+    except Exception as e:
+        logger.error(f"Error uploading file: {str(e)}")
         return build_response(
-            StatusCodes.CREATED,
+            StatusCodes.INTERNAL_SERVER_ERROR,
             Headers.CORS,
-            {"message": "File uploaded successfully", "file_url": file_url},
+            {"error": str(e)},
+        )
+
+
+def uploaded_response(media_bucket, stored):
+    """Describe a file stored under its content-addressed key"""
+    return build_response(
+        StatusCodes.CREATED,
+        Headers.CORS,
+        {
+            "message": "File uploaded successfully",
+            "key": stored["key"],
+            "file_url": assets.asset_url(media_bucket, stored["key"], get_s3_file_url),
+            "exists": stored["deduplicated"],
+        },
+    )
+
+
+def direct_upload(media_bucket, action, file_name, data):
+    """
+    Two-phase upload of a file of file_name's type: "start" presigns a POST
+    to a staging key the browser sends the file to, "finalize" checks it
+    and copies it to its content-addressed key, so the file never passes
+    through this function
+    """
+    if not file_name:
+        logger.error("File name is required")
+        return build_response(
+            StatusCodes.BAD_REQUEST,
+            Headers.CORS,
+            {"error": "File name is required"},
+        )
+
+    try:
+        if action == "start":
+            content_type = guess_image_content_type(file_name)
+            sha256 = assets.parse_sha256(data.get("sha256"))
+            if sha256 and content_type in IMAGE_TYPES:
+                existing = assets.find_content(media_bucket, sha256, content_type)
+                if existing:
+                    return uploaded_response(media_bucket, existing)
+            upload = start_upload(
+                media_bucket, UPLOAD_KIND, content_type, data.get("size"), MAX_MEDIA_BYTES, IMAGE_TYPES,
+                checksum_sha256=assets.sha256_checksum(sha256) if sha256 else None,
+            )
+            return build_response(StatusCodes.OK, Headers.CORS, upload)
+
+        upload_key = data.get("upload_key") or data.get("uploadKey")
+        staged = staged_upload(media_bucket, UPLOAD_KIND, upload_key, MAX_MEDIA_BYTES, IMAGE_TYPES)
+        return uploaded_response(media_bucket, assets.store_staged(media_bucket, upload_key, staged))
+    except UploadError as e:
+        logger.error(f"Rejected upload of {file_name}: {str(e)}")
+        return build_response(
+            StatusCodes.BAD_REQUEST,
+            Headers.CORS,
+            {"error": str(e)},
         )
     except Exception as e:
         logger.error(f"Error uploading file: {str(e)}")
@@ -0,0 +1,149 @@
+"""
+Two-phase direct-to-S3 uploads.
+
+``start_upload`` hands the browser a presigned POST policy for a fresh
+staging key under ``uploads/<kind>/``. S3 itself enforces the content
+type and size range, so the file never passes through API Gateway or
+Lambda. ``finalize_upload`` then checks the staged object (a HEAD plus
+its first few bytes for the file signature) and server-side copies it
+into place. Abandoned staging objects are expired by the media bucket's
+lifecycle rule.
+"""
+
+import logging
+import uuid
+from typing import Dict, Iterable, Optional
+
+from botocore.exceptions import ClientError
+
+from common import aws
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_PREFIX = "uploads/"
+UPLOAD_EXPIRES_IN = 900
+SIGNATURE_BYTES = 16
+
+# Leading bytes each accepted type must start with
+FILE_SIGNATURES = {
+    "application/pdf": (b"%PDF-",),
+    "image/jpeg": (b"\xff\xd8\xff",),
+    "image/png": (b"\x89PNG\r\n\x1a\n",),
+    "image/gif": (b"GIF87a", b"GIF89a"),
+    "image/webp": (b"RIFF",),
+}
+IMAGE_TYPES = ("image/jpeg", "image/png", "image/gif", "image/webp")
+
+
+class UploadError(ValueError):
+    """An upload request or staged object the caller has to fix."""
+
+
+def _matches_signature(content_type: str, head: bytes) -> bool:
+    signatures = FILE_SIGNATURES.get(content_type)
+    if signatures is None:
+        # No known signature (e.g. SVG); the type and size checks still apply
+        return True
+    if content_type == "image/webp" and head[8:12] != b"WEBP":
+        return False
+    return head.startswith(signatures)
+
+
+def start_upload(bucket: str, kind: str, content_type: str, size, max_bytes: int,
+                 allowed_types: Iterable[str], checksum_sha256: Optional[str] = None) -> Dict:
+    """
+    Presign a POST of one file of ``content_type`` to a new staging key.
+
+    The browser sends ``fields`` plus the file as multipart/form-data to
+    ``url``; S3 rejects anything with another content type or outside
+    1..max_bytes bytes. With ``checksum_sha256`` (base64, as S3 expects
+    it) S3 also rejects bytes with a different SHA-256.
+    """
+    if content_type not in allowed_types:
+        raise UploadError(f"Unsupported content type {content_type!r}; expected one of {', '.join(allowed_types)}")
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        raise UploadError("File size is required")
+    if not 0 < size <= max_bytes:
+        raise UploadError(f"File must be between 1 byte and {max_bytes // (1024 * 1024)} MB")
+
+    upload_key = f"{UPLOAD_PREFIX}{kind}/{uuid.uuid4().hex}"
+    fields = {"Content-Type": content_type}
+    if checksum_sha256:
+        fields.update({"x-amz-checksum-algorithm": "SHA256", "x-amz-checksum-sha256": checksum_sha256})
+    post = aws.s3().generate_presigned_post(
+        bucket,
+        upload_key,
+        Fields=fields,
+        Conditions=[{name: value} for name, value in fields.items()] + [["content-length-range", 1, max_bytes]],
+        ExpiresIn=UPLOAD_EXPIRES_IN,
+    )
+    return {
+        "uploadKey": upload_key,
+        "url": post["url"],
+        "fields": post["fields"],
+        "expiresIn": UPLOAD_EXPIRES_IN,
+    }
+
+
+def staged_upload(bucket: str, kind: str, upload_key: str, max_bytes: int,
+                  allowed_types: Iterable[str]) -> Dict:
+    """
+    Check a staged object and return its ``contentType``, ``size`` and
+    ``checksumSha256`` (base64, or None if it was uploaded without one).
+
+    Staged objects that fail the checks are deleted.
+    """
+    if not upload_key or not upload_key.startswith(f"{UPLOAD_PREFIX}{kind}/") or ".." in upload_key:
+        raise UploadError("Invalid upload key")
+    s3 = aws.s3()
+    try:
+        head = s3.head_object(Bucket=bucket, Key=upload_key, ChecksumMode="ENABLED")
+    except ClientError as e:
+        if e.response["Error"]["Code"] in ("404", "NoSuchKey"):
+            raise UploadError("Upload not found; it may have expired")
+        raise
+
+    content_type = head.get("ContentType")
+    size = head.get("ContentLength", 0)
+    problem = None
+    if content_type not in allowed_types:
+        problem = f"Unsupported content type {content_type!r}"
+    elif not 0 < size <= max_bytes:
+        problem = f"File must be between 1 byte and {max_bytes // (1024 * 1024)} MB"
+    else:
+        first_bytes = s3.get_object(Bucket=bucket, Key=upload_key,
+                                    Range=f"bytes=0-{SIGNATURE_BYTES - 1}")["Body"].read()
+        if not _matches_signature(content_type, first_bytes):
+            problem = f"File content does not look like {content_type}"
+    if problem:
+        s3.delete_object(Bucket=bucket, Key=upload_key)
+        raise UploadError(problem)
+    return {"contentType": content_type, "size": size, "checksumSha256": head.get("ChecksumSHA256")}
+
+
+def finalize_upload(bucket: str, upload_key: str, final_key: str, content_type: str,
+                    cache_control: Optional[str] = None) -> Dict:
+    """
+    Copy a checked staging object to ``final_key`` and delete the staging copy.
+
+    The copy happens inside S3, so readers of ``final_key`` only ever see
+    the old or the new object. Returns the new object's ``lastModified``.
+    """
+    s3 = aws.s3()
+    extra_args = {"CacheControl": cache_control} if cache_control else {}
+    response = s3.copy_object(
+        Bucket=bucket,
+        Key=final_key,
+        CopySource={"Bucket": bucket, "Key": upload_key},
+        MetadataDirective="REPLACE",
+        ContentType=content_type,
+        **extra_args,
+    )
+    try:
+        s3.delete_object(Bucket=bucket, Key=upload_key)
+    except ClientError as e:
+        # The lifecycle rule removes it eventually
+        logger.warning(f"Could not delete staged upload {upload_key}: {e}")
+    return {"key": final_key, "lastModified": response.get("CopyObjectResult", {}).get("LastModified")}
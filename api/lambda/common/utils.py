@@ -1,15 +1,113 @@
 
+import base64
+import hashlib
 import json
+import html
+import math
+import re
 import logging
+from decimal import Decimal
+
+from boto3.dynamodb.types import Binary
+
+from common import assets
+from common.contsants import StatusCodes
+from common.images import image_source, image_sources
+
+try:
+    import orjson
+except ImportError:  # optional fast backend
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
+_HTML_TAG = re.compile(r"<[^>]+>")
+_WHITESPACE = re.compile(r"\s+")
+
+
+class RawJSON:
+    """
+    An already-encoded JSON document that ``build_response`` passes through
+    untouched, so a cached or pre-rendered body is never encoded twice.
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value.decode("utf-8") if isinstance(value, (bytes, bytearray)) else value
+
+
+def _json_default(obj):
+    """Encode the types boto3's DynamoDB resource hands back."""
+    if isinstance(obj, Decimal):
+        return int(obj) if obj == obj.to_integral_value() else float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj) if all(isinstance(v, str) for v in obj) else list(obj)
+    if isinstance(obj, Binary):
+        obj = obj.value
+    if isinstance(obj, (bytes, bytearray)):
+        return base64.b64encode(obj).decode("ascii")
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj):
+    """Serialize DynamoDB items to a compact JSON string, using orjson when installed."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=_json_default).decode("utf-8")
+        except TypeError:
+            # orjson is stricter (e.g. non-str dict keys); fall back to the stdlib
+            pass
+    return json.dumps(obj, default=_json_default, separators=(",", ":"))
+
+
+def get_header(event, name):
+    """Case-insensitive lookup of a request header."""
+    name = name.lower()
+    for key, value in (event.get("headers") or {}).items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def compute_etag(*parts):
+    """Return a strong ETag for the given version components."""
+    digest = hashlib.sha256("\x1f".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(event, etag):
+    """True if the request's If-None-Match header matches ``etag``."""
+    if_none_match = get_header(event, "If-None-Match")
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def not_modified_response(headers):
+    return {
+        "statusCode": StatusCodes.NOT_MODIFIED,
+        "headers": headers,
+        "body": ""
+    }
+
+
+def redirect_response(location, headers):
+    return {
+        "statusCode": StatusCodes.FOUND,
+        "headers": {**headers, "Location": location},
+        "body": ""
+    }
+
 
 def build_response(status_code, headers, body=None):
-    if not body:
-        data = json.dumps({})
+    if isinstance(body, RawJSON):
+        data = body.value
+    elif not body:
+        data = "{}"
     else:
-        data = json.dumps(body)
+        data = dumps(body)
     return {
         "statusCode": status_code,
         "headers": headers,
@@ -17,6 +115,68 @@ def build_response(status_code, headers, body=None):
     }
 
 
+def build_projection(fields_param, allowed_fields, projections, default=None, always=("id",)):
+    """
+    Translate a ``fields=`` query parameter into DynamoDB projection kwargs.
+
+    ``fields_param`` is either a named projection (e.g. ``card``) or a
+    comma-separated list of attribute names.
+
+    Args:
+        fields_param (str): Raw query parameter value, may be None
+        allowed_fields (iterable): Attribute names a client may request
+        projections (dict): Named projections; a value of None means the full item
+        default (str): Named projection used when ``fields_param`` is empty
+        always (tuple): Attributes included in every projection
+
+    Returns:
+        dict: ``ProjectionExpression``/``ExpressionAttributeNames`` kwargs,
+        or an empty dict for the full item
+
+    Raises:
+        ValueError: If a requested field or projection name is unknown
+    """
+    fields_param = (fields_param or default or "").strip()
+    if not fields_param:
+        return {}
+
+    if fields_param in projections:
+        fields = projections[fields_param]
+        if fields is None:
+            return {}
+    else:
+        fields = [f.strip() for f in fields_param.split(",") if f.strip()]
+        unknown = [f for f in fields if f not in allowed_fields]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+    fields = list(dict.fromkeys([*always, *fields]))
+    return {
+        "ProjectionExpression": ", ".join(f"#{f}" for f in fields),
+        "ExpressionAttributeNames": {f"#{f}": f for f in fields},
+    }
+
+
+def html_to_text(html_content):
+    """Strip tags and collapse whitespace from editor HTML."""
+    text = html.unescape(_HTML_TAG.sub(" ", html_content or ""))
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def build_excerpt(html_content, max_length=240):
+    """Return a plain-text excerpt of a post for feed cards."""
+    text = html_to_text(html_content)
+    if len(text) <= max_length:
+        return text
+    return text[:max_length].rsplit(" ", 1)[0]
+
+
+def estimate_reading_time(html_content, words_per_minute=225):
+    """Estimate reading time in minutes, matching the frontend's calculation."""
+    words = len(html_to_text(html_content).split())
+    return max(math.ceil(words / words_per_minute), 1)
+
+
 def extract_s3_key_from_url(url_or_key):
     """
     Extract S3 key from a full S3 URL or return the key if already a key.
@@ -74,19 +234,34 @@ def extract_s3_key_from_url(url_or_key):
         return url_or_key
 
 
-def process_image_references(images_list, media_bucket, get_s3_file_url_func):
+def has_signed_images(images_list):
+    """True when any of these image references would get a presigned, expiring URL."""
+    if not isinstance(images_list, list):
+        return False
+    return any(
+        not assets.is_immutable_key(extract_s3_key_from_url(image_ref))
+        for image_ref in images_list if image_ref
+    )
+
+
+def process_image_references(images_list, media_bucket, get_s3_file_url_func, with_variants=False):
     """
-    Process a list of image references (URLs or keys) and convert them to presigned URLs.
+    Process a list of image references (URLs or keys) and convert them to download URLs.
     
     This is a centralized function to handle image processing consistently across all endpoints.
+    Content-addressed images and their variants get unsigned URLs (see
+    ``common.assets.asset_url``); only legacy keys are presigned.
     
     Args:
         images_list (list): List of image URLs or S3 keys
         media_bucket (str): S3 bucket name
         get_s3_file_url_func (callable): Function to generate presigned URLs
+        with_variants (bool): Return srcset-ready structures instead of plain URLs
         
     Returns:
-        list: List of presigned URLs
+        list: List of presigned URLs, or with ``with_variants`` one dict per
+        image with ``url``, ``width``, ``height``, ``format``, ``sources``
+        and ``variants`` (see ``common.images.image_source``)
         
     Examples:
         >>> from common.s3 import get_s3_file_url
@@ -98,6 +273,7 @@ def process_image_references(images_list, media_bucket, get_s3_file_url_func):
         return []
     
     presigned_urls = []
+    signed_keys = []
     
     for image_ref in images_list:
         if not image_ref:  # Skip empty strings/None
@@ -110,16 +286,24 @@ def process_image_references(images_list, media_bucket, get_s3_file_url_func):
             logger.warning(f"Skipping invalid image reference: {image_ref}")
             continue
         
-        # Generate presigned URL
+        # Public URL for immutable keys, presigned URL for legacy ones
         try:
-            presigned_url = get_s3_file_url_func(media_bucket, s3_key)
+            presigned_url = assets.asset_url(media_bucket, s3_key, get_s3_file_url_func)
             if presigned_url:
                 presigned_urls.append(presigned_url)
+                signed_keys.append(s3_key)
             else:
                 logger.warning(f"Failed to generate presigned URL for key: {s3_key}")
         except Exception as e:
             logger.error(f"Error generating presigned URL for key '{s3_key}': {e}")
             continue
     
-    return presigned_urls
-
+    if not with_variants:
+        return presigned_urls
+    
+    try:
+        return image_sources(media_bucket, signed_keys, presigned_urls,
+                             lambda key: assets.asset_url(media_bucket, key, get_s3_file_url_func))
+    except Exception as e:
+        logger.error(f"Error loading image variants: {e}")
+        return [image_source(url, None, None) for url in presigned_urls]
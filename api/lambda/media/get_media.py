@@ -1,13 +1,70 @@
 import os
 import json
-import boto3
+from functools import partial
+from botocore.exceptions import ClientError
+from common import aws
 from common.utils import build_response
 from common.contsants import StatusCodes, Headers
-from common.s3 import get_s3_file_url, s3_file_exists, get_s3_file_metadata
+from common.s3 import get_cached_s3_file_url, presigned_url_cache
+from common.cache import ExpiringCache
+from common.images import image_sources
+from common.assets import asset_url, is_immutable_key, read_pointer
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Uploads replace the pointer, so a warm container may serve the previous
+# file for up to this long after a new upload
+ASSET_CACHE_SECONDS = int(os.getenv("MEDIA_ASSET_CACHE_SECONDS", "60"))
+# A missing asset is looked up again soon, so a first upload shows up quickly
+MISSING_ASSET_CACHE_SECONDS = 10
+LEGACY_IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.gif', '.webp']
+
+asset_cache = ExpiringCache(max_entries=16, ttl=ASSET_CACHE_SECONDS)
+
+
+def legacy_asset(bucket, file_type, file_path):
+    """Describe a file uploaded to its fixed name before pointers existed, or None"""
+    if file_type == 'profile':
+        # Profile images were stored with the extension of their type
+        base_path = file_path.rsplit('.', 1)[0] if '.' in file_path else file_path
+        candidates = [f"{base_path}{ext}" for ext in LEGACY_IMAGE_EXTENSIONS]
+    else:
+        candidates = [file_path]
+
+    for key in candidates:
+        try:
+            head = aws.s3().head_object(Bucket=bucket, Key=key)
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey'):
+                continue
+            raise
+        return {
+            "key": key,
+            "contentType": head.get('ContentType'),
+            "size": head.get('ContentLength'),
+            "lastModified": head['LastModified'].isoformat() if head.get('LastModified') else None,
+        }
+    return None
+
+
+def describe_asset(bucket, file_type, file_path):
+    """
+    The key, contentType, size and lastModified of a media asset: from this
+    container's cache, else its pointer (one small read), else the old
+    fixed-name object. None (also cached, briefly) if there is neither
+    """
+    cache_key = (bucket, file_type)
+    found, asset = asset_cache.get(cache_key)
+    if found:
+        return asset
+
+    asset = read_pointer(bucket, file_type)
+    if not asset or not asset.get('key'):
+        asset = legacy_asset(bucket, file_type, file_path)
+    asset_cache.put(cache_key, asset, ttl=None if asset else MISSING_ASSET_CACHE_SECONDS)
+    return asset
+
 
 def lambda_handler(event, context):
     try:
@@ -60,70 +117,62 @@ def lambda_handler(event, context):
         config = file_configs[file_type]
         
         # Get file path from environment variable or use default
-        file_path = os.getenv(config['env_var'], config['default_path'])
+        configured_path = os.getenv(config['env_var'], config['default_path'])
         
-        # For profile images, find the actual file regardless of extension
-        if file_type == 'profile':
-            base_path = file_path.rsplit('.', 1)[0] if '.' in file_path else file_path
-            possible_extensions = ['.jpg', '.jpeg', '.png', '.gif', '.webp']
-            
-            # Try to find the file with any of the possible extensions
-            found_path = None
-            for ext in possible_extensions:
-                test_path = f"{base_path}{ext}"
-                if s3_file_exists(MEDIA_BUCKET, test_path):
-                    found_path = test_path
-                    break
-            
-            if not found_path:
-                logger.error(f"Profile image not found with any extension at {base_path}")
-                return build_response(
-                    StatusCodes.NOT_FOUND,
-                    Headers.CORS,
-                    {"message": "Profile image not found."},
-                )
-            
-            file_path = found_path
-        
-        logger.info(f"Looking for {file_type} file at: {file_path}")
-        
-        # Check if file exists
-        if not s3_file_exists(MEDIA_BUCKET, file_path):
-            logger.error(f"{file_type.capitalize()} file not found: {file_path}")
+        asset = describe_asset(MEDIA_BUCKET, file_type, configured_path)
+        if not asset:
+            logger.error(f"{file_type.capitalize()} file not found (no pointer and nothing at {configured_path})")
             return build_response(
                 StatusCodes.NOT_FOUND,
                 Headers.CORS,
-                {"message": f"{file_type.capitalize()} file not found."},
+                {"message": "Profile image not found." if file_type == 'profile' else f"{file_type.capitalize()} file not found."},
             )
+        file_path = asset['key']
         
-        # Generate presigned URL
-        presigned_url = get_s3_file_url(MEDIA_BUCKET, file_path, expires_in=config['expires_in'])
-        
-        if not presigned_url:
-            logger.error(f"Failed to generate presigned URL for {file_type}")
+        # Content-addressed files get their public URL; legacy files a presigned
+        # one, reusing a fresh one from this container
+        sign = partial(get_cached_s3_file_url, expires_in=config['expires_in'])
+        file_url = asset_url(MEDIA_BUCKET, file_path, sign)
+
+        # A cached presigned URL has already used part of its lifetime;
+        # public URLs of content-addressed files do not expire at all
+        if is_immutable_key(file_path):
+            expires_in = None
+        else:
+            expires_in = presigned_url_cache.remaining(MEDIA_BUCKET, file_path, config['expires_in'])
+            if expires_in is None:
+                expires_in = config['expires_in']
+        
+        if not file_url:
+            logger.error(f"Failed to generate URL for {file_type}")
             return build_response(
                 StatusCodes.INTERNAL_SERVER_ERROR,
                 Headers.CORS,
                 {"message": f"Failed to generate {file_type} URL."},
             )
         
-        # Get file metadata
-        metadata = get_s3_file_metadata(MEDIA_BUCKET, file_path)
-        last_modified = metadata.get('LastModified').isoformat() if metadata and metadata.get('LastModified') else None
-        
-        logger.info(f"Generated presigned URL for {file_type}")
+        logger.info(f"Generated URL for {file_type}")
         
         # Build response
         response_data = {
             "message": f"{file_type.capitalize()} URL generated successfully.",
-            config['response_key']: presigned_url,
-            "expiresIn": config['expires_in'],
-            "lastModified": last_modified
+            config['response_key']: file_url,
+            "expiresIn": expires_in,
+            "lastModified": asset.get('lastModified'),
+            "contentType": asset.get('contentType'),
+            "size": asset.get('size'),
         }
         
+        # Responsive variants of the profile image, when they have been generated
+        if file_type == 'profile':
+            response_data["image"] = image_sources(
+                MEDIA_BUCKET, [file_path], [file_url],
+                lambda key: asset_url(MEDIA_BUCKET, key, sign),
+            )[0]
+        
         # Add filename for downloadable files
         if config['filename_key']:
-            filename = os.path.basename(file_path)
+            filename = os.path.basename(configured_path)
             response_data[config['filename_key']] = filename
         
         return build_response(
@@ -1,14 +1,37 @@
 import os
 import json
 import logging
-from datetime import datetime
 from common.contsants import StatusCodes, Headers
 from common.utils import build_response
-from common.s3 import put_s3_file, get_s3_file_url, delete_s3_file, get_s3_file_metadata
+from common.s3 import get_s3_file_url
+from common import assets
+from common.uploads import IMAGE_TYPES, staged_upload, start_upload
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+UPLOAD_KIND = "profile"
+POINTER_NAME = "profile"
+MAX_PROFILE_IMAGE_BYTES = int(os.getenv("MAX_PROFILE_IMAGE_BYTES", str(5 * 1024 * 1024)))
+
+# Content types older clients send for the base64 upload
+CONTENT_TYPE_ALIASES = {'image/jpg': 'image/jpeg'}
+
+
+def uploaded_response(media_bucket, stored):
+    """Point the profile image at a stored object and describe it"""
+    assets.write_pointer(media_bucket, POINTER_NAME, stored)
+    return build_response(
+        StatusCodes.OK,
+        Headers.CORS,
+        {
+            "message": "Profile image uploaded successfully",
+            "imageUrl": assets.asset_url(media_bucket, stored["key"], get_s3_file_url),
+            "lastModified": stored["lastModified"].isoformat() if stored.get("lastModified") else None,
+            "exists": stored["deduplicated"],
+        },
+    )
+
 
 def lambda_handler(event, context):
     logger.info(f"Received event: {event}")
@@ -18,7 +41,6 @@ def lambda_handler(event, context):
         return build_response(StatusCodes.OK, Headers.CORS, {})
 
     media_bucket = os.getenv("MEDIA_BUCKET")
-    profile_image_path = os.getenv("PROFILE_IMAGE_PATH", "public/Adinath_Gore.jpg")
     
     if not media_bucket:
         logger.error("MEDIA_BUCKET env variable is not set")
@@ -38,9 +60,32 @@ def lambda_handler(event, context):
 
     try:
         data = json.loads(payload)
-        file_content = data.get("file_content") or data.get("fileContent")
         file_type = data.get("file_type") or data.get("fileType") or data.get("content_type") or data.get("contentType")
-        
+
+        # Two-phase upload: presign a POST to a staging key, the browser
+        # sends the file straight to S3, then finalize moves it to its
+        # content-addressed key. Clients that send the file's SHA-256 skip
+        # the upload entirely when those bytes are already stored.
+        action = data.get("action")
+        if action == "start":
+            sha256 = assets.parse_sha256(data.get("sha256"))
+            if sha256 and file_type in IMAGE_TYPES:
+                existing = assets.find_content(media_bucket, sha256, file_type)
+                if existing:
+                    return uploaded_response(media_bucket, existing)
+            upload = start_upload(
+                media_bucket, UPLOAD_KIND, file_type, data.get("size"), MAX_PROFILE_IMAGE_BYTES, IMAGE_TYPES,
+                checksum_sha256=assets.sha256_checksum(sha256) if sha256 else None,
+            )
+            return build_response(StatusCodes.OK, Headers.CORS, upload)
+        if action == "finalize":
+            upload_key = data.get("upload_key") or data.get("uploadKey")
+            staged = staged_upload(media_bucket, UPLOAD_KIND, upload_key, MAX_PROFILE_IMAGE_BYTES, IMAGE_TYPES)
+            return uploaded_response(media_bucket, assets.store_staged(media_bucket, upload_key, staged))
+
+        # Older clients send the whole file base64-encoded in the body
+        file_content = data.get("file_content") or data.get("fileContent")
+
         if not file_content:
             return build_response(
                 StatusCodes.BAD_REQUEST,
@@ -48,56 +93,13 @@ def lambda_handler(event, context):
                 {"error": "File content is required"},
             )
 
-        # Determine file extension from content type
-        extension_map = {
-            'image/jpeg': '.jpg',
-            'image/jpg': '.jpg',
-            'image/png': '.png',
-            'image/gif': '.gif',
-            'image/webp': '.webp'
-        }
-        
-        # Ensure we always use public/ folder
-        base_name = os.path.basename(profile_image_path).rsplit('.', 1)[0] if '.' in profile_image_path else os.path.basename(profile_image_path)
-        
-        # Determine extension
-        if file_type and file_type in extension_map:
-            extension = extension_map[file_type]
-        else:
-            # Default to .jpg if no valid type provided
-            extension = '.jpg'
-            logger.warning(f"No valid file type provided, defaulting to .jpg")
-        
-        # Construct final path ensuring it's in public/ folder
-        final_path = f"public/{base_name}{extension}"
-        
-        logger.info(f"Base name: {base_name}, Extension: {extension}, Final path: {final_path}")
-
-        # Delete existing file if it exists
-        try:
-            delete_s3_file(media_bucket, final_path)
-            logger.info(f"Deleted existing profile image at {final_path}")
-        except Exception as e:
-            logger.info(f"No existing file to delete or error deleting: {str(e)}")
+        file_type = CONTENT_TYPE_ALIASES.get(file_type, file_type)
+        if file_type not in IMAGE_TYPES:
+            # Default to JPEG if no valid type provided
+            logger.warning(f"No valid file type provided ({file_type}), defaulting to image/jpeg")
+            file_type = 'image/jpeg'
 
-        # Upload new file with content type
-        put_s3_file(media_bucket, final_path, file_content, content_type=file_type)
-        
-        # Get metadata including last modified date
-        metadata = get_s3_file_metadata(media_bucket, final_path)
-        last_modified = metadata.get('LastModified').isoformat() if metadata.get('LastModified') else None
-        
-        file_url = get_s3_file_url(media_bucket, final_path, expires_in=3600)
-        
-        return build_response(
-            StatusCodes.OK,
-            Headers.CORS,
-            {
-                "message": "Profile image uploaded successfully",
-                "imageUrl": file_url,
-                "lastModified": last_modified
-            },
-        )
+        return uploaded_response(media_bucket, assets.store_base64(media_bucket, file_content, file_type))
         
     except json.JSONDecodeError:
         logger.error("Invalid JSON payload")
@@ -106,6 +108,14 @@ def lambda_handler(event, context):
             Headers.CORS,
             {"error": "Invalid JSON payload"},
         )
+    except ValueError as e:
+        # UploadError (a ValueError), or file content that is not valid base64
+        logger.error(f"Rejected profile image upload: {str(e)}")
+        return build_response(
+            StatusCodes.BAD_REQUEST,
+            Headers.CORS,
+            {"error": str(e)},
+        )
     except Exception as e:
         logger.error(f"Error uploading profile image: {str(e)}")
         return build_response(
@@ -0,0 +1,172 @@
+"""
+Generate responsive variants for images uploaded to the media bucket.
+
+Invoked by S3 events for ``media/`` (content-addressed uploads, see
+``common.assets``), ``posts/`` (blog images uploaded to client-chosen
+names) and ``public/`` (the original profile image). Each new image
+is decoded once and stepped down through ``common.images.VARIANT_WIDTHS``
+(never upscaled); every width is encoded as AVIF, WebP and JPEG and
+stored under ``variants/<source key>/``. The manifest recording the
+intrinsic sizes is written last, so readers never see a partial set.
+Variants of content-addressed images never change, so they are cached
+as immutable too. Removing the source removes its variants.
+
+``build_variants`` has no S3 dependency, so
+``api/scripts/build_image_variants.py`` runs the same pipeline over a
+local directory.
+"""
+
+import io
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import unquote_plus
+
+from PIL import Image, ImageOps
+
+from common import assets, aws, images
+from common.s3 import list_s3_files, put_s3_file
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+SAVE_OPTIONS = {
+    "avif": {"quality": 55, "speed": 8},
+    "webp": {"quality": 80, "method": 4},
+    "jpeg": {"quality": 82, "optimize": True, "progressive": True},
+}
+VARIANT_CACHE_CONTROL = "public, max-age=86400"
+MAX_UPLOAD_WORKERS = 8
+
+# EXIF orientations that swap width and height
+_TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+
+
+def available_formats() -> List[str]:
+    """Variant formats this Pillow build can encode, in preference order."""
+    Image.init()
+    return [fmt for fmt in images.VARIANT_FORMATS if fmt.upper() in Image.SAVE]
+
+
+def target_widths(width: int) -> List[int]:
+    """Variant widths for a source ``width`` pixels wide, widest last."""
+    widths = [step for step in images.VARIANT_WIDTHS if step < width]
+    widest = min(width, images.VARIANT_WIDTHS[-1])
+    if widest not in widths:
+        widths.append(widest)
+    return widths
+
+
+def _encode(frame: Image.Image, fmt: str) -> bytes:
+    if fmt == "jpeg" and frame.mode == "RGBA":
+        flattened = Image.new("RGB", frame.size, (255, 255, 255))
+        flattened.paste(frame, mask=frame.getchannel("A"))
+        frame = flattened
+    buffer = io.BytesIO()
+    frame.save(buffer, format=fmt.upper(), **SAVE_OPTIONS.get(fmt, {}))
+    return buffer.getvalue()
+
+
+def build_variants(data: bytes, formats: Optional[Sequence[str]] = None) -> Tuple[Dict, List[Tuple[Dict, bytes]]]:
+    """
+    Decode an image and encode its width-stepped variants.
+
+    Returns ``(source, variants)``: the source's intrinsic ``width``,
+    ``height`` and ``format`` (after EXIF rotation), and one
+    ``({width, height, format, contentType, size}, body)`` pair per
+    variant. Animated images get no variants. Raises ``OSError`` for data
+    Pillow cannot decode.
+    """
+    formats = list(formats or available_formats())
+    with Image.open(io.BytesIO(data)) as image:
+        source_format = (image.format or "").lower()
+        width, height = image.size
+        if image.getexif().get(0x0112) in _TRANSPOSED_ORIENTATIONS:
+            width, height = height, width
+        source = {"width": width, "height": height, "format": source_format}
+        if getattr(image, "is_animated", False):
+            return source, []
+
+        widths = target_widths(width)
+        # JPEG can decode straight at 1/2..1/8 scale; ask for no less than the widest variant
+        scale = widths[-1] / width
+        requested = (max(int(image.size[0] * scale), 1), max(int(image.size[1] * scale), 1))
+        image.draft("RGB", requested)
+
+        has_alpha = image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+        frame = ImageOps.exif_transpose(image).convert("RGBA" if has_alpha else "RGB")
+
+    variants = []
+    # Step down from the widest, so each resize starts from the previous (smaller) frame
+    for variant_width in reversed(widths):
+        variant_height = max(round(height * variant_width / width), 1)
+        if frame.size != (variant_width, variant_height):
+            # reducing_gap box-filters large reductions first: much faster, visually the same
+            frame = frame.resize((variant_width, variant_height), Image.Resampling.LANCZOS, reducing_gap=2.0)
+        for fmt in formats:
+            body = _encode(frame, fmt)
+            variants.append(({
+                "width": variant_width,
+                "height": variant_height,
+                "format": fmt,
+                "contentType": images.FORMAT_CONTENT_TYPES[fmt],
+                "size": len(body),
+            }, body))
+    return source, variants
+
+
+def process_image(bucket: str, key: str) -> Optional[Dict]:
+    """Generate and store the variants and manifest of one source image."""
+    obj = aws.s3().get_object(Bucket=bucket, Key=key)
+    data = obj["Body"].read()
+    try:
+        source, variants = build_variants(data)
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        logger.warning(f"Skipping {key}: not a decodable image ({e})")
+        return None
+
+    cache_control = assets.IMMUTABLE_CACHE_CONTROL if assets.is_content_key(key) else VARIANT_CACHE_CONTROL
+
+    def upload(variant):
+        info, body = variant
+        variant_key = images.variant_key(key, info["width"], info["format"])
+        if not put_s3_file(bucket, variant_key, body, info["contentType"], cache_control):
+            raise RuntimeError(f"Failed to store variant {variant_key}")
+        return {"key": variant_key, **info}
+
+    with ThreadPoolExecutor(max_workers=MAX_UPLOAD_WORKERS) as pool:
+        entries = list(pool.map(upload, variants))
+
+    manifest = {"source": key, "etag": obj.get("ETag"), **source, "variants": entries}
+    put_s3_file(bucket, images.manifest_key(key), json.dumps(manifest), "application/json")
+    logger.info(f"Stored {len(entries)} variants of {key} ({source['width']}x{source['height']})")
+    return manifest
+
+
+def remove_variants(bucket: str, key: str) -> int:
+    """Delete every stored variant of a removed source image."""
+    keys = list_s3_files(bucket, images.variant_prefix(key))
+    for start in range(0, len(keys), 1000):
+        aws.s3().delete_objects(
+            Bucket=bucket,
+            Delete={"Objects": [{"Key": k} for k in keys[start:start + 1000]], "Quiet": True},
+        )
+    return len(keys)
+
+
+def lambda_handler(event, context):
+    processed = 0
+    for record in event.get("Records", []):
+        bucket = record["s3"]["bucket"]["name"]
+        key = unquote_plus(record["s3"]["object"]["key"])
+        if not images.wants_variants(key):
+            logger.info(f"Ignoring {key}")
+            continue
+
+        if record.get("eventName", "").startswith("ObjectRemoved"):
+            removed = remove_variants(bucket, key)
+            logger.info(f"Removed {removed} variant objects of {key}")
+        elif process_image(bucket, key):
+            processed += 1
+    return {"processed": processed}
@@ -1,4 +1,5 @@
 from common import s3
+from common.assets import read_pointer
 from common import utils
 from common.contsants import Headers, StatusCodes
 import os
@@ -14,7 +15,8 @@ def lambda_handler(event, context):
     """
     try:
         bucket = os.environ.get('RESUME_BUCKET') or os.environ.get('MEDIA_BUCKET')
-        resume_file = os.environ.get('RESUME_KEY', 'public/Adinath_Gore_Resume.pdf')
+        pointer = read_pointer(bucket, 'resume')
+        resume_file = pointer['key'] if pointer else os.environ.get('RESUME_KEY', 'public/Adinath_Gore_Resume.pdf')
         url = s3.get_s3_file_url(bucket, resume_file)
         if not url:
             return utils.build_response(StatusCodes.NOT_FOUND, Headers.CORS)
@@ -3,11 +3,33 @@ import json
 import logging
 from common.contsants import StatusCodes, Headers
 from common.utils import build_response
-from common.s3 import put_s3_file, get_s3_file_url, delete_s3_file, get_s3_file_metadata
+from common.s3 import get_s3_file_url
+from common import assets
+from common.uploads import staged_upload, start_upload
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+UPLOAD_KIND = "resume"
+POINTER_NAME = "resume"
+RESUME_TYPES = ("application/pdf",)
+MAX_RESUME_BYTES = int(os.getenv("MAX_RESUME_BYTES", str(10 * 1024 * 1024)))
+
+
+def uploaded_response(media_bucket, stored):
+    """Point the resume at a stored object and describe it"""
+    assets.write_pointer(media_bucket, POINTER_NAME, stored)
+    return build_response(
+        StatusCodes.OK,
+        Headers.CORS,
+        {
+            "message": "Resume uploaded successfully",
+            "downloadUrl": assets.asset_url(media_bucket, stored["key"], get_s3_file_url),
+            "lastModified": stored["lastModified"].isoformat() if stored.get("lastModified") else None,
+            "exists": stored["deduplicated"],
+        },
+    )
+
 
 def lambda_handler(event, context):
     logger.info(f"Received event: {event}")
@@ -17,7 +39,6 @@ def lambda_handler(event, context):
         return build_response(StatusCodes.OK, Headers.CORS, {})
 
     media_bucket = os.getenv("MEDIA_BUCKET")
-    resume_path = os.getenv("RESUME_KEY", "public/Adinath_Gore_Resume.pdf")
     
     if not media_bucket:
         logger.error("MEDIA_BUCKET env variable is not set")
@@ -37,6 +58,36 @@ def lambda_handler(event, context):
 
     try:
         data = json.loads(payload)
+
+        # Two-phase upload: presign a POST to a staging key, the browser
+        # sends the file straight to S3, then finalize moves it to its
+        # content-addressed key. Clients that send the file's SHA-256 skip
+        # the upload entirely when those bytes are already stored.
+        action = data.get("action")
+        if action == "start":
+            content_type = data.get("content_type") or data.get("contentType") or "application/pdf"
+            sha256 = assets.parse_sha256(data.get("sha256"))
+            if sha256 and content_type in RESUME_TYPES:
+                existing = assets.find_content(media_bucket, sha256, content_type)
+                if existing:
+                    return uploaded_response(media_bucket, existing)
+            upload = start_upload(
+                media_bucket,
+                UPLOAD_KIND,
+                content_type,
+                data.get("size"),
+                MAX_RESUME_BYTES,
+                RESUME_TYPES,
+                checksum_sha256=assets.sha256_checksum(sha256) if sha256 else None,
+            )
+            return build_response(StatusCodes.OK, Headers.CORS, upload)
+        if action == "finalize":
+            upload_key = data.get("upload_key") or data.get("uploadKey")
+            staged = staged_upload(media_bucket, UPLOAD_KIND, upload_key, MAX_RESUME_BYTES, RESUME_TYPES)
+            logger.info(f"Storing staged resume {upload_key} ({staged['size']} bytes)")
+            return uploaded_response(media_bucket, assets.store_staged(media_bucket, upload_key, staged))
+
+        # Older clients send the whole file base64-encoded in the body
         file_content = data.get("file_content") or data.get("fileContent")
         
         if not file_content:
@@ -46,33 +97,7 @@ def lambda_handler(event, context):
                 {"error": "File content is required"},
             )
 
-        logger.info(f"Uploading resume to: {resume_path}")
-
-        # Delete existing file if it exists
-        try:
-            delete_s3_file(media_bucket, resume_path)
-            logger.info(f"Deleted existing resume at {resume_path}")
-        except Exception as e:
-            logger.info(f"No existing file to delete or error deleting: {str(e)}")
-
-        # Upload new file with content type
-        put_s3_file(media_bucket, resume_path, file_content, content_type='application/pdf')
-        
-        # Get metadata including last modified date
-        metadata = get_s3_file_metadata(media_bucket, resume_path)
-        last_modified = metadata.get('LastModified').isoformat() if metadata.get('LastModified') else None
-        
-        file_url = get_s3_file_url(media_bucket, resume_path, expires_in=3600)
-        
-        return build_response(
-            StatusCodes.OK,
-            Headers.CORS,
-            {
-                "message": "Resume uploaded successfully",
-                "downloadUrl": file_url,
-                "lastModified": last_modified
-            },
-        )
+        return uploaded_response(media_bucket, assets.store_base64(media_bucket, file_content, 'application/pdf'))
         
     except json.JSONDecodeError:
         logger.error("Invalid JSON payload")
@@ -81,6 +106,14 @@ def lambda_handler(event, context):
             Headers.CORS,
             {"error": "Invalid JSON payload"},
         )
+    except ValueError as e:
+        # UploadError (a ValueError), or file content that is not valid base64
+        logger.error(f"Rejected resume upload: {str(e)}")
+        return build_response(
+            StatusCodes.BAD_REQUEST,
+            Headers.CORS,
+            {"error": str(e)},
+        )
     except Exception as e:
         logger.error(f"Error uploading resume: {str(e)}")
         return build_response(
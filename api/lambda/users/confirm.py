@@ -1,7 +1,7 @@
 
-import boto3
 import logging
 import os
+from common import aws
 from common.utils import build_response
 from common.contsants import Headers, StatusCodes
 import json
@@ -23,8 +23,7 @@ def lambda_handler(event, context):
         if not payload.get('username'):
             logger.error('username not set')
             return build_response(StatusCodes.BAD_REQUEST, Headers.CORS, {'message': 'username not set'})
-        client = boto3.client('cognito-idp')
-        client.admin_confirm_sign_up(
+        aws.cognito().admin_confirm_sign_up(
             UserPoolId=os.environ['USER_POOL_ID'],
             Username=payload['username']
         )
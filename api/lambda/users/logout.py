@@ -1,9 +1,8 @@
 import json
 import os
-import boto3
 from botocore.exceptions import ClientError
+from common import aws
 
-cognito_client = boto3.client('cognito-idp')
 USER_POOL_ID = os.environ.get('USER_POOL_ID')
 
 def lambda_handler(event, context):
@@ -44,7 +43,7 @@ def lambda_handler(event, context):
         
         # Global sign out - invalidates all tokens for the user
         try:
-            cognito_client.global_sign_out(
+            aws.cognito().global_sign_out(
                 AccessToken=access_token
             )
             
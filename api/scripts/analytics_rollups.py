@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Backfill and verify the daily web analytics rollups.
+
+The tracker keeps rollups current with atomic ADDs from the moment it is
+deployed with ANALYTICS_ROLLUP_TABLE; backfill builds the days before
+that from the raw events, and check compares stored rollups with counts
+recomputed from the raw events. Written days replace their shards, and
+closed days are stored compacted.
+
+    python api/scripts/analytics_rollups.py backfill --days 365
+    python api/scripts/analytics_rollups.py check --days 30 [--repair]
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import boto3
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda'))
+
+from analytics.web_analytics import closed_before, query_day  # noqa: E402
+from common import aws  # noqa: E402
+from common.rollups import (  # noqa: E402
+    compare_rollups, compute_rollups, empty_rollup, load_rollups, shard_keys, to_item,
+)
+
+
+def window(days, include_today):
+    """The last ``days`` UTC dates, oldest first, ending today or yesterday."""
+    end = datetime.now(timezone.utc) - timedelta(days=0 if include_today else 1)
+    return [(end - timedelta(days=offset)).strftime('%Y-%m-%d') for offset in range(days - 1, -1, -1)]
+
+
+def raw_rollups(analytics_table, dates, workers):
+    """Recompute each day's rollup from its raw page views."""
+    analytics_table = aws.thread_safe(analytics_table)
+
+    def rollup_for(date):
+        return compute_rollups(query_day(analytics_table, date)).get(date) or empty_rollup(date)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return dict(zip(dates, executor.map(rollup_for, dates)))
+
+
+def write_rollups(rollup_table, rollups):
+    """Replace each day's item and shards with its recomputed rollup."""
+    cutoff = closed_before()
+    with rollup_table.batch_writer() as batch:
+        for rollup in rollups:
+            if rollup['views']:
+                # An open day keeps taking shard updates, so it must not be marked compacted
+                batch.put_item(Item=to_item(rollup, compacted=rollup['day'] < cutoff))
+            else:
+                batch.delete_item(Key={'day': rollup['day']})
+            for key in shard_keys(rollup['day']):
+                batch.delete_item(Key={'day': key})
+
+
+def backfill(analytics_table, rollup_table, dates, workers):
+    """Overwrite the rollups of ``dates`` with counts from the raw events."""
+    rollups = raw_rollups(analytics_table, dates, workers)
+    write_rollups(rollup_table, rollups.values())
+    for date, rollup in rollups.items():
+        if rollup['views']:
+            print(f"{date}: {rollup['views']} views, ~{rollup['visitors'].estimate()} visitors")
+    print(f"Backfilled {len(dates)} days")
+
+
+def check(dynamodb, analytics_table, rollup_table, dates, workers, repair=False):
+    """Report days whose rollup disagrees with the raw events; returns True if all match."""
+    expected = raw_rollups(analytics_table, dates, workers)
+    stored = load_rollups(dynamodb, rollup_table.name, dates)
+    mismatched = []
+    for date in dates:
+        problems = compare_rollups(expected[date], stored.get(date))
+        if problems:
+            mismatched.append(expected[date])
+            print(f"{date}: " + '; '.join(problems))
+    print(f"{len(dates) - len(mismatched)}/{len(dates)} days consistent")
+    if mismatched and repair:
+        write_rollups(rollup_table, mismatched)
+        print(f"Repaired {len(mismatched)} days")
+    return not mismatched
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('command', choices=('backfill', 'check'))
+    parser.add_argument('--days', type=int, default=90, help='number of days to process')
+    parser.add_argument('--include-today', action='store_true',
+                        help="also process today, which the tracker may be updating concurrently")
+    parser.add_argument('--workers', type=int, default=8, help='concurrent per-day queries')
+    parser.add_argument('--repair', action='store_true', help='check: overwrite inconsistent days')
+    args = parser.parse_args()
+
+    dynamodb = boto3.resource('dynamodb')
+    analytics_table = dynamodb.Table(os.getenv('ANALYTICS_TABLE', 'portfolio-Analytics-dev'))
+    rollup_table = dynamodb.Table(os.getenv('ANALYTICS_ROLLUP_TABLE', 'portfolio-Analytics-Rollups-dev'))
+    dates = window(args.days, args.include_today)
+
+    if args.command == 'backfill':
+        backfill(analytics_table, rollup_table, dates, args.workers)
+    elif not check(dynamodb, analytics_table, rollup_table, dates, args.workers, args.repair):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
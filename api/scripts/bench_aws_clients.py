@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Compare cold and warm DynamoDB call latency with and without common.aws.
+
+Points the DynamoDB endpoint at a local keep-alive HTTP server that
+answers every request with one item, and delays each newly accepted
+connection by ``--handshake-ms`` to stand in for TCP + TLS setup. Each
+simulated invocation makes one GetItem:
+
+- per invocation: a new ``boto3.resource('dynamodb')`` every time, as
+  web_analytics and users/confirm used to do;
+- common.aws: the shared resource, built on the first invocation only.
+
+Reports the first (cold) call, the median warm call and how many
+connections each pattern opened.
+
+    python api/scripts/bench_aws_clients.py --invocations 50
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda'))
+
+import boto3  # noqa: E402
+
+from common import aws  # noqa: E402
+
+RESPONSE = b'{"Item": {"id": {"S": "bench"}, "views": {"N": "1"}}}'
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    handshake_seconds = 0.0
+    connections = 0
+
+    def setup(self):
+        Handler.connections += 1
+        time.sleep(self.handshake_seconds)
+        super().setup()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-amz-json-1.0')
+        self.send_header('Content-Length', str(len(RESPONSE)))
+        self.end_headers()
+        self.wfile.write(RESPONSE)
+
+    def log_message(self, *args):
+        pass
+
+
+def run(label, get_dynamodb, invocations):
+    Handler.connections = 0
+    timings = []
+    for _ in range(invocations):
+        started = time.perf_counter()
+        get_dynamodb().Table('bench').get_item(Key={'id': 'bench'})
+        timings.append((time.perf_counter() - started) * 1000)
+    print(f"{label:<16} cold {timings[0]:>7.1f} ms   warm median {statistics.median(timings[1:]):>6.2f} ms   "
+          f"{Handler.connections} connections")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--invocations', type=int, default=50)
+    parser.add_argument('--handshake-ms', type=float, default=20, help='delay per new connection')
+    args = parser.parse_args()
+
+    Handler.handshake_seconds = args.handshake_ms / 1000
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ.update({
+        'AWS_ENDPOINT_URL_DYNAMODB': f'http://127.0.0.1:{server.server_port}',
+        'AWS_DEFAULT_REGION': 'us-east-1',
+        'AWS_ACCESS_KEY_ID': 'bench',
+        'AWS_SECRET_ACCESS_KEY': 'bench',
+    })
+
+    run('per invocation', lambda: boto3.resource('dynamodb'), args.invocations)
+    run('common.aws', aws.dynamodb, args.invocations)
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark response encoding of a 50-post get-blogs feed payload.
+
+Compares the previous handler path (hand-converted Decimals, images
+double-encoded as a JSON string, then json.dumps) against
+common.utils.dumps with the stdlib backend and with orjson if installed.
+
+    python api/scripts/bench_json_encoder.py --iterations 500
+"""
+
+import argparse
+import copy
+import json
+import os
+import sys
+import time
+import uuid
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda'))
+
+from common import utils  # noqa: E402
+
+
+def make_feed(posts=50, content_words=1500):
+    """Build a feed payload shaped like the DynamoDB items get-blogs returns."""
+    paragraph = '<p>' + ' '.join(['serverless'] * 50) + '</p>'
+    content = paragraph * (content_words // 50)
+    blogs = []
+    for i in range(posts):
+        blogs.append({
+            'id': str(uuid.uuid4()),
+            'author': str(uuid.uuid4()),
+            'title': f'Post number {i}',
+            'content': content,
+            'excerpt': 'serverless ' * 20,
+            'tags': ['aws', 'lambda', 'python'],
+            'reading_time': Decimal(7),
+            'images': [
+                f'https://portfolio-mediabucket-dev.s3.amazonaws.com/posts/{i}/{n}.jpg'
+                '?X-Amz-Algorithm=AWS4-HMAC-SHA256&X-Amz-Signature=' + 'a' * 64
+                for n in range(3)
+            ],
+            'created_at': '2026-01-01T00:00:00',
+            'updated_at': '2026-01-02T00:00:00',
+            'status': 'published',
+            'published_at': '2026-01-01T00:00:00',
+        })
+    return {'blogs': blogs, 'lastKey': None}
+
+
+def legacy_encode(payload):
+    payload = copy.copy(payload)
+    payload['blogs'] = [dict(item) for item in payload['blogs']]
+    for item in payload['blogs']:
+        item['reading_time'] = int(item['reading_time'])
+        item['images'] = json.dumps(item['images'])
+    return json.dumps(payload)
+
+
+def stdlib_encode(payload):
+    saved, utils.orjson = utils.orjson, None
+    try:
+        return utils.dumps(payload)
+    finally:
+        utils.orjson = saved
+
+
+def bench(label, func, payload, iterations):
+    func(payload)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        body = func(payload)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<24} {elapsed / iterations * 1000:>8.3f} ms/response  {len(body):>9,} bytes")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=500)
+    parser.add_argument('--posts', type=int, default=50)
+    args = parser.parse_args()
+
+    payload = make_feed(args.posts)
+    bench('legacy (double-encoded)', legacy_encode, payload, args.iterations)
+    bench('utils.dumps (stdlib)', stdlib_encode, payload, args.iterations)
+    if utils.orjson is not None:
+        bench('utils.dumps (orjson)', utils.dumps, payload, args.iterations)
+    else:
+        print('orjson not installed; skipping fast backend')
+
+    card = {'blogs': [{k: v for k, v in b.items() if k != 'content'} for b in payload['blogs']], 'lastKey': None}
+    bench('utils.dumps (card)', utils.dumps, card, args.iterations)
+
+
+if __name__ == '__main__':
+    main()
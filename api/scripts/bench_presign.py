@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Check that common.s3.SigV4QuerySigner produces the same URLs as botocore
+and measure how many keys per second each signer can presign.
+
+Runs fully offline with dummy credentials:
+
+    python api/scripts/bench_presign.py --keys 2000
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from urllib.parse import parse_qs, urlparse
+
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'AKIDEXAMPLE')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'wJalrXUtnFEMI/K7MDENG+bPxRfiCYEXAMPLEKEY')
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda'))
+
+import boto3  # noqa: E402
+from botocore.config import Config  # noqa: E402
+
+from common.s3 import SigV4QuerySigner  # noqa: E402
+
+SAMPLE_KEYS = [
+    'posts/image.jpg',
+    'posts/with space/and+plus~tilde.png',
+    'posts/ünïcødé/文件.webp',
+    'public/Adinath_Gore.jpg',
+]
+
+
+def check_equivalence(region, bucket, session_token=None):
+    """Sign every sample key with botocore and the local signer at the same instant."""
+    session = boto3.session.Session(
+        aws_access_key_id=os.environ['AWS_ACCESS_KEY_ID'],
+        aws_secret_access_key=os.environ['AWS_SECRET_ACCESS_KEY'],
+        aws_session_token=session_token,
+        region_name=region,
+    )
+    client = session.client('s3', config=Config(signature_version='s3v4'))
+    credentials = session.get_credentials().get_frozen_credentials()
+    mismatches = 0
+    for key in SAMPLE_KEYS:
+        for method, operation, content_type in (('GET', 'get_object', None), ('PUT', 'put_object', 'image/png')):
+            params = {'Bucket': bucket, 'Key': key}
+            if content_type:
+                params['ContentType'] = content_type
+            expected = client.generate_presigned_url(operation, Params=params, ExpiresIn=3600)
+            amz_date = parse_qs(urlparse(expected).query)['X-Amz-Date'][0]
+            now = datetime.strptime(amz_date, '%Y%m%dT%H%M%SZ').replace(tzinfo=timezone.utc)
+            signer = SigV4QuerySigner(
+                credentials.access_key, credentials.secret_key, region, credentials.token, now=now
+            )
+            actual = signer.presign(bucket, key, 3600, method=method, content_type=content_type)
+            if actual != expected:
+                mismatches += 1
+                print(f"MISMATCH {region} {bucket} {method} {key}\n  botocore: {expected}\n  local:    {actual}")
+    return mismatches
+
+
+def bench(label, func, keys):
+    start = time.perf_counter()
+    func(keys)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {len(keys) / elapsed:>12,.0f} keys/s  ({elapsed * 1000:.1f} ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--keys', type=int, default=2000, help='number of keys to presign')
+    parser.add_argument('--bucket', default='portfolio-mediabucket-dev')
+    args = parser.parse_args()
+
+    mismatches = 0
+    for region in ('us-east-1', 'ap-south-1'):
+        for bucket in (args.bucket, 'dotted.bucket.name'):
+            mismatches += check_equivalence(region, bucket)
+            mismatches += check_equivalence(region, bucket, session_token='FQoGZXIvYXdzEXAMPLE/token+=')
+    print(f"Equivalence: {'OK' if not mismatches else f'{mismatches} mismatches'}")
+
+    keys = [f"posts/{i:06d}/image.jpg" for i in range(args.keys)]
+    session = boto3.session.Session()
+    client = session.client('s3', config=Config(signature_version='s3v4'))
+    credentials = session.get_credentials().get_frozen_credentials()
+    region = client.meta.region_name
+
+    bench('botocore', lambda ks: [
+        client.generate_presigned_url('get_object', Params={'Bucket': args.bucket, 'Key': k}, ExpiresIn=3600)
+        for k in ks
+    ], keys)
+
+    def local_batch(ks):
+        signer = SigV4QuerySigner(credentials.access_key, credentials.secret_key, region, credentials.token)
+        return [signer.presign(args.bucket, k, 3600) for k in ks]
+
+    bench('SigV4QuerySigner (batch)', local_batch, keys)
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Measure what repeated dashboard requests read with the daily rollup cache.
+
+Serves a 90 day range of generated rollups from an in-memory table with
+a fixed per-call latency, then calls get_analytics_data the way
+back-to-back dashboard refreshes in one warm container would: cold,
+warm within the live TTL (served from the recent response), and warm
+after it expired (closed days from the rollup cache, today re-read).
+Reports rollup items read and time per call, and checks every response
+matches one computed from every item.
+
+    python api/scripts/bench_rollup_cache.py --days 90
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda'))
+
+from analytics import web_analytics  # noqa: E402
+from common.rollups import add_event, empty_rollup, to_item  # noqa: E402
+
+TABLE = 'Analytics-Rollups'
+PATHS = ['/', '/about', '/projects', '/resume'] + [f'/blog/post-{i}' for i in range(20)]
+
+
+class FakeDynamoDB:
+    """BatchGet over generated, already compacted rollup items, counting keys read."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.keys_read = 0
+        self.items = {}
+
+    def item_for(self, day):
+        if day not in self.items:
+            rng = random.Random(day)
+            rollup = empty_rollup(day)
+            for _ in range(rng.randrange(200, 400)):
+                add_event(rollup, {
+                    'date': day,
+                    'timestamp': f'{day}T{rng.randrange(24):02d}:00:00Z',
+                    'page_path': rng.choice(PATHS),
+                    'session_id': f'{day}-{rng.randrange(150)}',
+                    'source': rng.choice(['Direct', 'Organic Search', 'Social Media', 'Referral']),
+                })
+            # Today is still open, so readers also look for its shards
+            self.items[day] = to_item(rollup, compacted=day < web_analytics.closed_before())
+        return self.items[day]
+
+    def batch_get_item(self, RequestItems):
+        time.sleep(self.latency)
+        keys = RequestItems[TABLE]['Keys']
+        self.keys_read += len(keys)
+        return {'Responses': {TABLE: [self.item_for(key['day']) for key in keys if '#' not in key['day']]}}
+
+    def Table(self, name):
+        raise AssertionError('generated rollups never need compaction')
+
+
+def timed_call(dynamodb, start_date, days):
+    before = dynamodb.keys_read
+    started = time.perf_counter()
+    result = web_analytics.get_analytics_data(dynamodb, TABLE, None, start_date, days)
+    return result, dynamodb.keys_read - before, (time.perf_counter() - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--refreshes', type=int, default=20)
+    parser.add_argument('--latency-ms', type=float, default=15, help='simulated BatchGetItem round trip')
+    args = parser.parse_args()
+
+    start_date = datetime.now(timezone.utc) - timedelta(days=args.days)
+    dynamodb = FakeDynamoDB(args.latency_ms / 1000)
+
+    # Reference result, recomputed from every item
+    expected = web_analytics.get_rollup_analytics_data(dynamodb, TABLE, None, start_date, args.days)
+    web_analytics.rollup_cache.clear()
+
+    result, keys, elapsed = timed_call(dynamodb, start_date, args.days)
+    assert result == expected
+    print(f"cold                      {keys:>4} items read  {elapsed:>7.1f} ms")
+
+    warm = [timed_call(dynamodb, start_date, args.days) for _ in range(args.refreshes)]
+    assert all(result == expected for result, _, _ in warm)
+    print(f"warm, within live TTL     {sum(k for _, k, _ in warm) / len(warm):>4.0f} items read  "
+          f"{sum(ms for _, _, ms in warm) / len(warm):>7.1f} ms avg over {args.refreshes}")
+
+    web_analytics.recent_responses.clear()
+    web_analytics.rollup_cache.live_ttl = 0
+    result, keys, elapsed = timed_call(dynamodb, start_date, args.days)
+    assert result == expected
+    print(f"warm, live TTL expired    {keys:>4} items read  {elapsed:>7.1f} ms")
+    print(f"cache: {web_analytics.rollup_cache.stats()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Check that base64 uploads through common.s3 run in bounded memory.
+
+Uploads random payloads given as base64 text, the way the legacy upload
+endpoints receive them, to an in-process S3 stand-in that keeps only a
+digest of each part it is sent (and waits a little per request, so part
+uploads overlap). Peak traced memory is reported for put_s3_file with
+encoding='base64' next to the previous decode-everything-then-put_object
+approach, at two payload sizes. The stored parts are checked against
+the original bytes. Exits non-zero if the streaming peak grows by more
+than the allowed ratio.
+
+    python api/scripts/bench_s3_upload.py --megabytes 16
+"""
+
+import argparse
+import base64
+import hashlib
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda'))
+
+from common import aws, s3  # noqa: E402
+
+
+class LocalS3:
+    """put_object and multipart calls, recording a digest per stored part."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.objects = {}
+        self._uploads = {}
+        self._lock = threading.Lock()
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        time.sleep(self.latency)
+        self.objects[Key] = [hashlib.sha256(Body).digest()]
+        return {'ETag': '"single"'}
+
+    def create_multipart_upload(self, Bucket, Key, **kwargs):
+        upload_id = f'upload-{len(self._uploads)}'
+        self._uploads[upload_id] = {}
+        return {'UploadId': upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        time.sleep(self.latency)
+        digest = hashlib.sha256(Body).digest()
+        with self._lock:
+            self._uploads[UploadId][PartNumber] = digest
+        return {'ETag': f'"{PartNumber}"'}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        parts = self._uploads.pop(UploadId)
+        numbers = [part['PartNumber'] for part in MultipartUpload['Parts']]
+        assert numbers == list(range(1, len(parts) + 1)), 'parts missing or out of order'
+        self.objects[Key] = [parts[number] for number in numbers]
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self._uploads.pop(UploadId, None)
+
+
+def legacy_put(bucket, key, encoded):
+    """The previous shape: decode the whole payload, then one put_object."""
+    aws.s3().put_object(Bucket=bucket, Key=key, Body=base64.b64decode(encoded))
+    return True
+
+
+def streaming_put(bucket, key, encoded):
+    return s3.put_s3_file(bucket, key, encoded, encoding='base64')
+
+
+def peak_mib(func, *args):
+    tracemalloc.start()
+    started = time.perf_counter()
+    assert func(*args)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 2**20, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--megabytes', type=int, default=16, help='decoded size of the smaller payload')
+    parser.add_argument('--scale', type=int, default=4, help='the larger payload is this many times bigger')
+    parser.add_argument('--latency-ms', type=float, default=20, help='simulated time per S3 request')
+    parser.add_argument('--max-growth', type=float, default=1.5, help='allowed streaming peak ratio')
+    args = parser.parse_args()
+
+    local = LocalS3(args.latency_ms / 1000)
+    aws._clients['s3'] = local
+
+    peaks = []
+    for megabytes in (args.megabytes, args.megabytes * args.scale):
+        raw = os.urandom(megabytes * 2**20)
+        encoded = base64.b64encode(raw).decode('ascii')
+        expected = [hashlib.sha256(raw[start:start + s3.PART_SIZE]).digest()
+                    for start in range(0, len(raw), s3.PART_SIZE)]
+
+        streaming, streaming_seconds = peak_mib(streaming_put, 'bench', 'streaming', encoded)
+        assert local.objects['streaming'] == expected, 'stored parts differ from the payload'
+        legacy, legacy_seconds = peak_mib(legacy_put, 'bench', 'legacy', encoded)
+        assert local.objects['legacy'] == [hashlib.sha256(raw).digest()]
+        peaks.append(streaming)
+        print(f"{megabytes:>5} MB payload  streaming peak {streaming:>6.1f} MiB in {streaming_seconds:.2f}s "
+              f"({len(expected)} parts)  decode-all peak {legacy:>6.1f} MiB in {legacy_seconds:.2f}s")
+        del raw, encoded
+
+    growth = peaks[1] / peaks[0]
+    print(f"streaming peak growth at {args.scale}x payload: {growth:.2f}x")
+    if growth > args.max_growth:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
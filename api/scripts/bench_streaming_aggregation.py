@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Check that web analytics aggregation runs in constant memory.
+
+Feeds get_real_analytics_data from an in-memory table that generates
+each Query page on demand, so the only thing that can grow with traffic
+is the aggregation itself. Peak traced memory is reported at N and 10N
+page views, next to the previous approach of materializing every item
+before processing. Exits non-zero if the streaming peak grows by more
+than the allowed KiB per extra 10k page views. That growth is an
+absolute difference, so it does not depend on the fixed baseline, and
+it only shrinks as the bounded rollups (days, pages, hours, visitor
+registers) fill up; materializing grows by several MiB per 10k views
+at any size.
+
+    python api/scripts/bench_streaming_aggregation.py --views 50000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda'))
+
+from analytics import web_analytics  # noqa: E402
+from analytics.records import DATE_SHARDS, SHARD_SEPARATOR  # noqa: E402
+
+# Small enough that every date shard fills whole pages in the smaller run
+PAGE_SIZE = 250
+PATHS = ['/', '/about', '/projects', '/resume'] + [f'/blog/post-{i}' for i in range(40)]
+REFERRERS = ['', 'https://www.google.com/', 'https://www.linkedin.com/', 'https://news.ycombinator.com/']
+
+
+class GeneratedTable:
+    """Serves ``views_per_day`` generated page views per date, split over the date shards."""
+
+    def __init__(self, views_per_day):
+        self.views_per_day = views_per_day
+
+    def query(self, KeyConditionExpression, ExclusiveStartKey=None, **kwargs):
+        key = KeyConditionExpression.get_expression()['values'][1]
+        date, sharded, _ = key.partition(SHARD_SEPARATOR)
+        # Nothing predates sharding here, so bare-day keys are empty
+        total = self.views_per_day // DATE_SHARDS if sharded else 0
+        offset = ExclusiveStartKey['offset'] if ExclusiveStartKey else 0
+        rng = random.Random(f'{key}-{offset}')
+        count = min(PAGE_SIZE, total - offset)
+        items = [{
+            'date': date,
+            'hour': f'{date}-{rng.randrange(24):02d}',
+            'session_id': f'{date}-{rng.randrange(self.views_per_day // 3 + 1)}',
+            'page_path': rng.choice(PATHS),
+            'page_title': 'Page',
+            'referrer': rng.choice(REFERRERS),
+        } for _ in range(count)]
+        response = {'Items': items}
+        if offset + count < total:
+            response['LastEvaluatedKey'] = {'offset': offset + count}
+        return response
+
+
+def materialized(table, start_date, days):
+    """The previous shape: collect every item, then process."""
+    items = [item for date in web_analytics.range_dates(start_date)
+             for item in web_analytics.query_day(table, date)]
+    return web_analytics.process_analytics_data(items, days)
+
+
+def peak_kib(func, *args):
+    tracemalloc.start()
+    result = func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--views', type=int, default=50000, help='page views in the smaller run')
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--max-kib-per-10k', type=float, default=1024,
+                        help='allowed streaming peak growth in KiB per extra 10k page views')
+    args = parser.parse_args()
+
+    start_date = datetime.now(timezone.utc) - timedelta(days=args.days - 1)
+    peaks, legacy_peaks, totals = {}, {}, {}
+    for views in (args.views, args.views * 10):
+        table = GeneratedTable(views // args.days)
+        # Measure a cold container, not days cached by the previous run
+        web_analytics.rollup_cache.clear()
+        streaming, result = peak_kib(web_analytics.get_real_analytics_data, table, start_date, args.days)
+        legacy, expected = peak_kib(materialized, table, start_date, args.days)
+        assert result == expected, 'streaming and materialized results differ'
+        peaks[views], legacy_peaks[views], totals[views] = streaming, legacy, result['totalPageViews']
+        print(f"{result['totalPageViews']:>9,} views  streaming peak {streaming:>9,.0f} KiB  "
+              f"materialized peak {legacy:>10,.0f} KiB")
+
+    small, large = args.views, args.views * 10
+    extra = max(totals[large] - totals[small], 1) / 10000
+    growth = (peaks[large] - peaks[small]) / extra
+    legacy_growth = (legacy_peaks[large] - legacy_peaks[small]) / extra
+    print(f"peak growth per extra 10k views: streaming {growth:,.0f} KiB  materialized {legacy_growth:,.0f} KiB")
+    if growth > args.max_kib_per_10k:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Run the responsive image variant pipeline over a local directory.
+
+Feeds every image in ``--source`` through media.variants.build_variants,
+the same code the S3-triggered Lambda runs, and reports per-image and
+overall throughput (images and source megapixels per second) plus the
+total size of each variant format next to the originals. With ``--out``
+the variants and a manifest per image are written in the bucket's
+``variants/<name>/`` layout for inspection.
+
+    python api/scripts/build_image_variants.py --source ~/Pictures/blog --out /tmp/variants
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda'))
+
+from common import images  # noqa: E402
+from media import variants  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--source', required=True, help='directory of images to process')
+    parser.add_argument('--out', help='directory to write variants and manifests to')
+    parser.add_argument('--formats', nargs='+', default=None,
+                        help=f"variant formats (default: the supported ones of {', '.join(images.VARIANT_FORMATS)})")
+    args = parser.parse_args()
+
+    formats = args.formats or variants.available_formats()
+    names = sorted(name for name in os.listdir(args.source) if name.lower().endswith(images.SOURCE_EXTENSIONS))
+    if not names:
+        sys.exit(f"No images found in {args.source}")
+    print(f"Formats: {', '.join(formats)}  widths: {', '.join(map(str, images.VARIANT_WIDTHS))}")
+
+    processed = 0
+    source_bytes = 0
+    megapixels = 0.0
+    format_bytes = Counter()
+    variant_count = 0
+    started = time.perf_counter()
+    for name in names:
+        with open(os.path.join(args.source, name), 'rb') as f:
+            data = f.read()
+        image_started = time.perf_counter()
+        try:
+            source, built = variants.build_variants(data, formats)
+        except Exception as e:
+            print(f"{name}: skipped ({e})")
+            continue
+        elapsed = time.perf_counter() - image_started
+
+        processed += 1
+        source_bytes += len(data)
+        megapixels += source['width'] * source['height'] / 1e6
+        variant_count += len(built)
+        for info, body in built:
+            format_bytes[info['format']] += len(body)
+        print(f"{name:<40} {source['width']:>5}x{source['height']:<5} {len(built):>3} variants "
+              f"in {elapsed * 1000:>7.1f} ms")
+
+        if args.out:
+            entries = []
+            for info, body in built:
+                key = images.variant_key(name, info['width'], info['format'])
+                path = os.path.join(args.out, key)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, 'wb') as f:
+                    f.write(body)
+                entries.append({'key': key, **info})
+            with open(os.path.join(args.out, images.manifest_key(name)), 'w') as f:
+                json.dump({'source': name, **source, 'variants': entries}, f, indent=2)
+
+    total = time.perf_counter() - started
+    print(f"\n{processed} of {len(names)} images, {variant_count} variants in {total:.2f}s: "
+          f"{processed / total:.1f} images/s, {megapixels / total:.1f} source MP/s")
+    print(f"originals {source_bytes / 2**20:>8.2f} MiB")
+    for fmt in formats:
+        print(f"{fmt:<9} {format_bytes[fmt] / 2**20:>8.2f} MiB across all widths")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Load-test how analytics ingest spreads over the date GSI partition keys.
+
+Drives the tracker's lambda_handler with batched page views against an
+in-memory DynamoDB and counts writes per ``date`` key, once unsharded
+(the bare ``YYYY-MM-DD`` key events were written under before sharding,
+one hot key per day) and once with the configured shard count. A GSI partition takes at most 1,000 write units a second, so
+the busiest key's share of ``--rate`` is what caps ingest. The stored
+items are then read back through web_analytics.query_day to check the
+scatter-gather returns every event in timestamp order.
+
+    python api/scripts/loadtest_date_shards.py --events 20000 --shards 4
+"""
+
+import argparse
+import json
+import os
+import sys
+import uuid
+from collections import Counter, defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda'))
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ['ANALYTICS_TABLE'] = 'Analytics'
+os.environ.pop('ANALYTICS_ROLLUP_TABLE', None)
+
+from analytics import analytics_tracker, records, web_analytics  # noqa: E402
+from common import aws  # noqa: E402
+
+GSI_PARTITION_WCU = 1000
+BATCH_SIZE = 20
+
+
+class FakeTable:
+    def __init__(self, name, by_key):
+        self.name = name
+        self.by_key = by_key
+
+    def query(self, KeyConditionExpression, **kwargs):
+        key = KeyConditionExpression.get_expression()['values'][1]
+        items = sorted(self.by_key.get(key, []), key=lambda item: item['timestamp'])
+        return {'Items': items}
+
+
+class FakeDynamoDB:
+    """Just enough of the resource for the tracker's BatchWriteItem path."""
+
+    def __init__(self):
+        self.by_key = defaultdict(list)
+
+    def Table(self, name):
+        return FakeTable(name, self.by_key)
+
+    def batch_write_item(self, RequestItems):
+        for requests in RequestItems.values():
+            for request in requests:
+                item = request['PutRequest']['Item']
+                self.by_key[item['date']].append(item)
+        return {'UnprocessedItems': {}}
+
+
+def unsharded_record(record):
+    """The item as the tracker stored it before sharding, keyed by the bare day."""
+    item = records.encode_record(record)
+    item['date'] = record['date']
+    return item
+
+
+def ingest(events, shards):
+    """Track ``events`` page views over ``shards`` date keys per day, or the legacy bare key if None."""
+    if shards:
+        records.DATE_SHARDS = shards
+        analytics_tracker.encode_record = records.encode_record
+    else:
+        analytics_tracker.encode_record = unsharded_record
+    dynamodb = FakeDynamoDB()
+    aws.dynamodb = lambda: dynamodb
+    for start in range(0, events, BATCH_SIZE):
+        batch = [{
+            'event_type': 'page_view',
+            'page_path': f'/blog/post-{n % 25}',
+            'session_id': str(uuid.uuid4()),
+        } for n in range(start, min(start + BATCH_SIZE, events))]
+        response = analytics_tracker.lambda_handler({'httpMethod': 'POST', 'body': json.dumps(batch)}, None)
+        assert response['statusCode'] == 204, response
+    return dynamodb
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--events', type=int, default=20000)
+    parser.add_argument('--shards', type=int, default=records.DATE_SHARDS)
+    parser.add_argument('--rate', type=float, default=2000, help='peak ingest in events/second to size against')
+    args = parser.parse_args()
+
+    for label, shards in (('unsharded', None), (f'{args.shards} shards', args.shards)):
+        dynamodb = ingest(args.events, shards)
+        writes = Counter({key: len(items) for key, items in dynamodb.by_key.items()})
+        hottest, count = writes.most_common(1)[0]
+        share = count / args.events
+        print(f"{label:<10} {len(writes)} keys, hottest {hottest} takes {share:.0%} "
+              f"-> {share * args.rate:,.0f} WCU/s on one GSI partition at {args.rate:,.0f} events/s "
+              f"(limit {GSI_PARTITION_WCU:,})")
+
+        days = {key.split(records.SHARD_SEPARATOR)[0] for key in writes}
+        table = dynamodb.Table(os.environ['ANALYTICS_TABLE'])
+        read = [item for day in sorted(days) for item in web_analytics.query_day(table, day)]
+        assert len(read) == args.events, f'read back {len(read)} of {args.events}'
+        stamps = [item['timestamp'] for item in read]
+        assert stamps == sorted(stamps), 'scatter-gather lost timestamp order'
+        assert all(record['date'] in days for record in read), 'shard suffix leaked into decoded date'
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Compare stored analytics item sizes before and after compact encoding.
+
+Sizes follow DynamoDB's item size rules: attribute name bytes plus value
+bytes (UTF-8 for strings, about one byte per two significant digits plus
+one for numbers, one byte for null). Write units are
+ceil(size / 1 KB) for the base table and again for each GSI, since both
+indexes project ALL attributes.
+
+    python api/scripts/measure_record_size.py
+"""
+
+import math
+import os
+import sys
+import uuid
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda'))
+
+from analytics.analytics_tracker import build_record  # noqa: E402
+from analytics.records import decode_record, encode_record  # noqa: E402
+
+GSI_COUNT = 2
+SAMPLES = {
+    'desktop chrome, search referral': (
+        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+        'Chrome/124.0.0.0 Safari/537.36',
+        'https://www.google.com/search?q=serverless+portfolio+blog&sourceid=chrome&ie=UTF-8',
+    ),
+    'iphone safari, linkedin': (
+        'Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) '
+        'Version/17.4 Mobile/15E148 Safari/604.1',
+        'https://www.linkedin.com/feed/update/urn:li:activity:7190000000000000000/',
+    ),
+    'firefox, direct': (
+        'Mozilla/5.0 (X11; Linux x86_64; rv:125.0) Gecko/20100101 Firefox/125.0',
+        '',
+    ),
+}
+
+
+def value_size(value):
+    if value is None or isinstance(value, bool):
+        return 1
+    if isinstance(value, (int, float, Decimal)):
+        digits = len(str(abs(value)).replace('.', '').strip('0')) or 1
+        return math.ceil(digits / 2) + 1
+    return len(str(value).encode('utf-8'))
+
+
+def item_size(item):
+    return sum(len(name.encode('utf-8')) + value_size(value) for name, value in item.items())
+
+
+def legacy_item(record):
+    """What the tracker stored before: every long-form field as-is."""
+    return {name: value for name, value in record.items() if name != 'source'}
+
+
+def main():
+    print(f"{'sample':<34} {'legacy':>8} {'compact':>8} {'saved':>6}   WCU legacy/compact")
+    totals = [0, 0]
+    for label, (user_agent, referrer) in SAMPLES.items():
+        record = build_record({
+            'event_type': 'page_view',
+            'page_path': '/blog/3f1c2a9e-4b7d-4e61-9a55-0c8d2f6b7e10',
+            'page_title': 'Building a serverless portfolio on AWS | Adinath',
+            'referrer': referrer,
+            'session_id': str(uuid.uuid4()),
+        }, user_agent, '203.0.113.42')
+        legacy, compact = legacy_item(record), encode_record(record)
+        assert decode_record(compact)['session_id'] == record['session_id']
+        before, after = item_size(legacy), item_size(compact)
+        totals[0] += before
+        totals[1] += after
+        wcu = [math.ceil(size / 1024) * (1 + GSI_COUNT) for size in (before, after)]
+        print(f"{label:<34} {before:>6} B {after:>6} B {1 - after / before:>6.0%}   {wcu[0]} / {wcu[1]}")
+
+    # Both stay under 1 KB, so per-write units are unchanged; storage is what shrinks
+    per_year = 365 * 1000 * (1 + GSI_COUNT) / len(SAMPLES) / 2**20
+    print(f"\nat 1,000 events/day, table + GSIs: {totals[0] * per_year:,.0f} MiB/year legacy, "
+          f"{totals[1] * per_year:,.0f} MiB/year compact")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Resumable data migrations over a DynamoDB table.
+
+Each migration scans its table in parallel segments and turns every
+matching item into a conditional update, which is applied concurrently
+under read and write capacity budgets. After each page has been fully
+applied, the segment's LastEvaluatedKey is written to a local checkpoint
+file. A rerun resumes from the checkpoint, and pages that were only half
+applied are replayed safely because every update is conditional.
+
+    python api/scripts/migrate.py --list
+    python api/scripts/migrate.py published_at_null --dry-run
+    python api/scripts/migrate.py published_at_null --segments 8 --write-units 100
+    MEDIA_BUCKET=portfolio-mediabucket-prod python api/scripts/migrate.py blog_snapshots
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from decimal import Decimal
+
+import boto3
+from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda'))
+
+from common import aws  # noqa: E402
+from common.scan import CapacityThrottle, consumed_units  # noqa: E402
+from common.s3 import s3_file_exists  # noqa: E402
+from common.snapshots import snapshot_key, write_blog_snapshot  # noqa: E402
+from common.utils import build_excerpt, dumps, estimate_reading_time  # noqa: E402
+
+
+class Migration:
+    """
+    A named transformation of one table.
+
+    ``scan_kwargs`` narrow the Scan (filter and projection); ``transform``
+    maps an item to the ``update_item`` kwargs that migrate it, or None to
+    leave it alone. Updates should carry a ConditionExpression that fails
+    once the item is migrated, so replays are no-ops.
+
+    Migrations that write somewhere other than the table pass ``apply``,
+    which is called with each transform result instead of ``update_item``
+    and returns False when there was nothing left to do.
+    """
+
+    def __init__(self, name, description, table_env, default_table, transform, scan_kwargs=None, apply=None):
+        self.name = name
+        self.description = description
+        self.table_env = table_env
+        self.default_table = default_table
+        self.transform = transform
+        self.scan_kwargs = scan_kwargs or {}
+        self.apply = apply
+
+    @property
+    def table_name(self):
+        return os.getenv(self.table_env, self.default_table)
+
+
+def fix_published_at(item):
+    """Give items written before the GSI schema change a published_at value."""
+    created_at = item.get('created_at', datetime.utcnow().isoformat())
+    # Published posts use created_at; drafts use the draft prefix
+    if item.get('status', 'draft') == 'published':
+        published_at_value = created_at
+    else:
+        published_at_value = f"draft_{created_at}"
+    return {
+        'Key': {'id': item['id']},
+        'UpdateExpression': 'SET published_at = :published_at, author_index = :author_index',
+        'ConditionExpression': Attr('published_at').not_exists() | Attr('published_at').attribute_type('NULL'),
+        'ExpressionAttributeValues': {
+            ':published_at': published_at_value,
+            ':author_index': f"{item.get('author', 'unknown')}_{published_at_value}",
+        },
+    }
+
+
+def backfill_excerpt(item):
+    """Add the excerpt and reading time the feed's card projection relies on."""
+    content = item.get('content') or ''
+    return {
+        'Key': {'id': item['id']},
+        'UpdateExpression': 'SET excerpt = :excerpt, reading_time = if_not_exists(reading_time, :reading_time)',
+        'ConditionExpression': Attr('excerpt').not_exists(),
+        'ExpressionAttributeValues': {
+            ':excerpt': build_excerpt(content),
+            ':reading_time': estimate_reading_time(content),
+        },
+    }
+
+
+def published_post(item):
+    return item if item.get('status') == 'published' else None
+
+
+def write_missing_snapshot(item):
+    """Write the snapshot of a post published before snapshots existed."""
+    media_bucket = os.getenv('MEDIA_BUCKET', 'portfolio-mediabucket-dev')
+    if s3_file_exists(media_bucket, snapshot_key(item['id'])):
+        return False
+    if not write_blog_snapshot(media_bucket, item):
+        raise RuntimeError(f"could not write {snapshot_key(item['id'])}")
+    return True
+
+
+MIGRATIONS = {
+    migration.name: migration for migration in (
+        Migration(
+            'published_at_null',
+            'Set published_at/author_index on blogs with a missing or NULL published_at',
+            'BLOGS_TABLE', 'portfolio-Blogs-dev', fix_published_at,
+            scan_kwargs={
+                'FilterExpression': Attr('published_at').not_exists() | Attr('published_at').attribute_type('NULL'),
+                'ProjectionExpression': 'id, author, #status, created_at, published_at',
+                'ExpressionAttributeNames': {'#status': 'status'},
+            },
+        ),
+        Migration(
+            'backfill_excerpt',
+            'Add excerpt and reading_time to blogs created before they were stored',
+            'BLOGS_TABLE', 'portfolio-Blogs-dev', backfill_excerpt,
+            scan_kwargs={
+                'FilterExpression': Attr('excerpt').not_exists(),
+                'ProjectionExpression': 'id, content',
+            },
+        ),
+        Migration(
+            'blog_snapshots',
+            'Write the missing snapshots of published blogs to MEDIA_BUCKET',
+            'BLOGS_TABLE', 'portfolio-Blogs-dev', published_post,
+            scan_kwargs={
+                'FilterExpression': Attr('status').eq('published'),
+            },
+            apply=write_missing_snapshot,
+        ),
+    )
+}
+
+
+class Checkpoint:
+    """Per-segment LastEvaluatedKey and completion state, saved atomically to a JSON file."""
+
+    def __init__(self, path, migration, table_name, total_segments, enabled=True):
+        self.path = path
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.state = {'migration': migration, 'table': table_name, 'total_segments': total_segments, 'segments': {}}
+        if os.path.exists(path):
+            with open(path) as f:
+                saved = json.load(f, parse_float=Decimal)
+            if (saved.get('migration'), saved.get('table'), saved.get('total_segments')) != \
+                    (migration, table_name, total_segments):
+                raise SystemExit(
+                    f"Checkpoint {path} is for {saved.get('migration')} on {saved.get('table')} with "
+                    f"{saved.get('total_segments')} segments; pass --reset or matching --segments"
+                )
+            self.state = saved
+
+    def segment(self, segment):
+        return self.state['segments'].get(str(segment), {'last_key': None, 'done': False})
+
+    def advance(self, segment, last_key):
+        with self._lock:
+            self.state['segments'][str(segment)] = {'last_key': last_key, 'done': last_key is None}
+            if self.enabled:
+                self._save()
+
+    def _save(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.checkpoint-')
+        with os.fdopen(fd, 'w') as f:
+            f.write(dumps(self.state))
+        os.replace(tmp_path, self.path)
+
+
+class Progress:
+    """Thread-safe counters with a periodic throughput line."""
+
+    def __init__(self, interval=5.0):
+        self.interval = interval
+        self.counts = {'scanned': 0, 'updated': 0, 'skipped': 0, 'failed': 0}
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._reported = self._started
+
+    def add(self, name, count=1):
+        with self._lock:
+            self.counts[name] += count
+            now = time.monotonic()
+            if now - self._reported >= self.interval:
+                self._reported = now
+                print(self.line())
+
+    def line(self):
+        elapsed = max(time.monotonic() - self._started, 1e-9)
+        counts = ', '.join(f"{name} {value:,}" for name, value in self.counts.items())
+        return f"[{elapsed:7.1f}s] {counts} ({self.counts['scanned'] / elapsed:,.0f} items/s scanned)"
+
+
+def apply_update(table, migration, update, write_throttle, progress, dry_run):
+    """Apply one conditional update; returns False only on a real failure."""
+    if dry_run:
+        progress.add('updated')
+        return True
+    if migration.apply:
+        try:
+            changed = migration.apply(update)
+        except Exception as e:
+            print(f"Applying {migration.name} to {update.get('id')} failed: {e}")
+            progress.add('failed')
+            return False
+        progress.add('updated' if changed else 'skipped')
+        return True
+    try:
+        response = table.update_item(ReturnConsumedCapacity='TOTAL', **update)
+        write_throttle.consume(consumed_units(response))
+        progress.add('updated')
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') == 'ConditionalCheckFailedException':
+            # Already migrated, e.g. replaying a half-applied page after a resume
+            write_throttle.consume(1)
+            progress.add('skipped')
+            return True
+        print(f"Update of {update['Key']} failed: {e}")
+        progress.add('failed')
+        return False
+    return True
+
+
+def run_segment(table, migration, segment, total_segments, checkpoint, writers,
+                read_throttle, write_throttle, progress, dry_run):
+    """Scan one segment from its checkpoint, applying each page before advancing it."""
+    state = checkpoint.segment(segment)
+    if state['done']:
+        return True
+    kwargs = dict(migration.scan_kwargs, Segment=segment, TotalSegments=total_segments,
+                  ReturnConsumedCapacity='TOTAL')
+    if state['last_key']:
+        kwargs['ExclusiveStartKey'] = state['last_key']
+
+    while True:
+        response = table.scan(**kwargs)
+        read_throttle.consume(consumed_units(response))
+        items = response.get('Items', [])
+        progress.add('scanned', len(items))
+
+        updates = [update for update in map(migration.transform, items) if update]
+        progress.add('skipped', len(items) - len(updates))
+        results = writers.map(
+            lambda update: apply_update(table, migration, update, write_throttle, progress, dry_run), updates)
+        if not all(list(results)):
+            print(f"Segment {segment} stopped; rerun to retry from its last checkpoint")
+            return False
+
+        last_key = response.get('LastEvaluatedKey')
+        checkpoint.advance(segment, last_key)
+        if not last_key:
+            return True
+        kwargs['ExclusiveStartKey'] = last_key
+
+
+def run_migration(migration, segments=4, workers=8, read_units=50, write_units=50,
+                  checkpoint_path=None, dry_run=False, reset=False):
+    # Scanned and updated from both thread pools
+    table = aws.thread_safe(boto3.resource('dynamodb').Table(migration.table_name))
+    checkpoint_path = checkpoint_path or f".migration-{migration.name}-{migration.table_name}.json"
+    if reset and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    # Dry runs read from the checkpoint but never move it
+    checkpoint = Checkpoint(checkpoint_path, migration.name, migration.table_name, segments, enabled=not dry_run)
+
+    print(f"{'[dry run] ' if dry_run else ''}{migration.name} on {migration.table_name}: "
+          f"{segments} segments, {workers} writers, {read_units} RCU/s, {write_units} WCU/s")
+    read_throttle = CapacityThrottle(read_units)
+    write_throttle = CapacityThrottle(write_units)
+    progress = Progress()
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='write') as writers, \
+            ThreadPoolExecutor(max_workers=segments, thread_name_prefix='scan') as readers:
+        futures = [
+            readers.submit(run_segment, table, migration, segment, segments, checkpoint, writers,
+                           read_throttle, write_throttle, progress, dry_run)
+            for segment in range(segments)
+        ]
+        ok = all(future.result() for future in futures)
+
+    print(progress.line())
+    if ok and not dry_run and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    print("Migration complete!" if ok else f"Migration incomplete; checkpoint kept at {checkpoint_path}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('migration', nargs='?', choices=sorted(MIGRATIONS))
+    parser.add_argument('--list', action='store_true', help='list the available migrations')
+    parser.add_argument('--segments', type=int, default=4, help='parallel scan segments')
+    parser.add_argument('--workers', type=int, default=8, help='concurrent update_item calls')
+    parser.add_argument('--read-units', type=float, default=50, help='read capacity budget per second')
+    parser.add_argument('--write-units', type=float, default=50, help='write capacity budget per second')
+    parser.add_argument('--checkpoint', help='checkpoint file (default: .migration-<name>-<table>.json)')
+    parser.add_argument('--dry-run', action='store_true', help='scan and count without writing')
+    parser.add_argument('--reset', action='store_true', help='ignore and remove an existing checkpoint')
+    args = parser.parse_args()
+
+    if args.list or not args.migration:
+        for migration in MIGRATIONS.values():
+            print(f"{migration.name:<20} {migration.table_env:<12} {migration.description}")
+        return
+
+    ok = run_migration(
+        MIGRATIONS[args.migration], segments=args.segments, workers=args.workers,
+        read_units=args.read_units, write_units=args.write_units,
+        checkpoint_path=args.checkpoint, dry_run=args.dry_run, reset=args.reset,
+    )
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
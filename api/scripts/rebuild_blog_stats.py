@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Script to recompute the blog aggregate counters from scratch.
+
+Create/update/delete keep the aggregates current with atomic ADDs; run this
+after enabling them on an existing table, or to repair drift.
+"""
+
+import boto3
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda'))
+
+from common.blog_stats import compute_aggregates  # noqa: E402
+from common.post_views import VIEWS_PREFIX  # noqa: E402
+from common.scan import parallel_scan  # noqa: E402
+
+
+def rebuild_blog_stats():
+    """
+    Recompute every scope from the Blogs table and overwrite the stats table.
+    """
+    dynamodb = boto3.resource('dynamodb')
+
+    # Get table names from environment or use defaults
+    blogs_table = dynamodb.Table(os.getenv('BLOGS_TABLE', 'portfolio-Blogs-dev'))
+    stats_table = dynamodb.Table(os.getenv('BLOG_STATS_TABLE', 'portfolio-Blogs-Stats-dev'))
+
+    print(f"Scanning table: {blogs_table.name}")
+    aggregates = compute_aggregates(parallel_scan(
+        blogs_table,
+        ProjectionExpression='id, author, #status, published_at',
+        ExpressionAttributeNames={'#status': 'status'},
+    ))
+    print(f"Computed {len(aggregates)} scopes")
+
+    stale_scopes = {item['scope'] for item in parallel_scan(stats_table, ProjectionExpression='#scope',
+                                                            ExpressionAttributeNames={'#scope': 'scope'})}
+    # Only counter scopes are rebuilt; cached per-post view summaries stay
+    stale_scopes = {scope for scope in stale_scopes if not scope.startswith(VIEWS_PREFIX)} - set(aggregates)
+
+    with stats_table.batch_writer() as batch:
+        for scope, counters in aggregates.items():
+            batch.put_item(Item={'scope': scope, **counters})
+            print(f"{scope}: {counters.get('total', 0)} total, {counters.get('published', 0)} published")
+        for scope in stale_scopes:
+            batch.delete_item(Key={'scope': scope})
+            print(f"Removed stale scope {scope}")
+
+    print("Rebuild complete!")
+
+
+if __name__ == '__main__':
+    rebuild_blog_stats()
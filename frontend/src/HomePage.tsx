@@ -376,11 +376,11 @@ const HomePage: React.FC = () => {
                         {blog.published_at ? formatDate(blog.published_at) : 'Recent'}
                       </span>
                       <span className="portfolio-blog-read-time">
-                        {calculateReadTime(blog.content)}
+                        {blog.content ? calculateReadTime(blog.content) : `${blog.reading_time || 1} min read`}
                       </span>
                     </div>
                     <h4 className="portfolio-blog-title">{blog.title}</h4>
-                    <p className="portfolio-blog-snippet">{createSnippet(blog.content)}</p>
+                    <p className="portfolio-blog-snippet">{createSnippet(blog.excerpt || blog.content || '')}</p>
                     <Link to={`/blog/${blog.id}`} className="portfolio-blog-link">
                       Read More <FontAwesomeIcon icon={faArrowRight} />
                     </Link>
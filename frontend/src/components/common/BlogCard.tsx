@@ -5,6 +5,9 @@ import { BlogCardProps } from '../../types';
 import { FontAwesomeIcon } from '@fortawesome/react-fontawesome';
 import { faCalendar, faClock, faArrowRight } from '@fortawesome/free-solid-svg-icons';
 
+// Rendered width of .blogcard-thumbnail-container (full width on narrow screens, see BlogCard.css)
+const THUMBNAIL_SIZES = '(max-width: 768px) 100vw, 160px';
+
 /**
  * Helper function to create a clean text snippet from HTML content.
  * @param htmlString The raw HTML from the editor.
@@ -40,6 +43,7 @@ const BlogCard: React.FC<BlogCardProps> = ({
   publishDate,
   readTimeInMinutes,
   thumbnail,
+  thumbnailSource,
   tags
 }) => {
   const contentSnippet = createSnippet(content);
@@ -88,20 +92,32 @@ const BlogCard: React.FC<BlogCardProps> = ({
         
         {thumbnail && (
           <div className="blogcard-thumbnail-container">
-            <img 
-              src={thumbnail} 
-              alt={`Thumbnail for ${title}`} 
-              className="blogcard-thumbnail"
-              loading="lazy"
-              decoding="async"
-              onError={(e) => {
-                // Hide thumbnail container if image fails to load
-                const container = e.currentTarget.parentElement;
-                if (container) {
-                  container.style.display = 'none';
-                }
-              }}
-            />
+            <picture>
+              {thumbnailSource?.sources.map((source) => (
+                <source
+                  key={source.type}
+                  type={source.type}
+                  srcSet={source.srcset}
+                  sizes={THUMBNAIL_SIZES}
+                />
+              ))}
+              <img 
+                src={thumbnail} 
+                alt={`Thumbnail for ${title}`} 
+                className="blogcard-thumbnail"
+                width={thumbnailSource?.width ?? undefined}
+                height={thumbnailSource?.height ?? undefined}
+                loading="lazy"
+                decoding="async"
+                onError={(e) => {
+                  // Hide thumbnail container if image fails to load
+                  const container = e.currentTarget.closest('.blogcard-thumbnail-container') as HTMLElement | null;
+                  if (container) {
+                    container.style.display = 'none';
+                  }
+                }}
+              />
+            </picture>
           </div>
         )}
       </article>
@@ -6,6 +6,7 @@ import type {
   BlogPostData, 
   BlogPostPayload,
   PresignedUrlApiResponse,
+  BatchPresignedUrl,
   HttpHeaders
 } from '../../types';
 import { safeApiCall } from '../../utils/apiRetryManager';
@@ -161,82 +162,92 @@ export async function GetProfileImage() {
 
 export const getProfileImage = GetProfileImage;
 
-export async function UploadProfileImage(fileContent: string, fileType: string): Promise<{ message: string; imageUrl: string; lastModified?: string }> {
-  const endpoint = `${API_BASE_URL}/upload-profile-image`;
-  const token = localStorage.getItem('authToken');
-  
-  if (!token) {
-    throw new Error('Authentication required. Please log in.');
-  }
+interface DirectUpload {
+  uploadKey: string;
+  url: string;
+  fields: Record<string, string>;
+  // Set instead of the fields above when the same bytes are already stored
+  exists?: boolean;
+}
 
-  try {
-    const response = await fetch(endpoint, {
-      method: 'POST',
-      headers: getAuthHeaders(),
-      body: JSON.stringify({ file_content: fileContent, file_type: fileType }),
-    });
+// Hex SHA-256 of a file; media is stored under this content hash
+export async function sha256Hex(file: Blob): Promise<string> {
+  const digest = await crypto.subtle.digest('SHA-256', await file.arrayBuffer());
+  return Array.from(new Uint8Array(digest), (byte) => byte.toString(16).padStart(2, '0')).join('');
+}
 
-    const jsonResponse = await response.json().catch(() => ({
-      message: `Request failed with status ${response.status} and no JSON error body.`,
-    }));
+async function postUploadAction<T>(endpoint: string, body: Record<string, unknown>, label: string): Promise<T> {
+  const response = await fetch(endpoint, {
+    method: 'POST',
+    headers: getAuthHeaders(),
+    body: JSON.stringify(body),
+  });
 
-    if (!response.ok) {
-      const error: ApiError = new Error(jsonResponse.message || `API Error: ${response.status} ${response.statusText}`);
-      error.statusCode = response.status;
-      error.details = jsonResponse;
-      console.error('UploadProfileImage API error:', error.details);
-      throw error;
-    }
+  const jsonResponse = await response.json().catch(() => ({
+    message: `Request failed with status ${response.status} and no JSON error body.`,
+  }));
 
-    return jsonResponse;
-  } catch (error) {
-    console.error('Network or other error in UploadProfileImage:', error);
-    if ((error as ApiError).statusCode) {
-      throw error;
-    }
-    const apiError: ApiError = new Error((error as Error).message || 'An unexpected error occurred during profile image upload.');
-    throw apiError;
+  if (!response.ok) {
+    const error: ApiError = new Error(jsonResponse.error || jsonResponse.message || `API Error: ${response.status} ${response.statusText}`);
+    error.statusCode = response.status;
+    error.details = jsonResponse;
+    console.error(`${label} API error:`, error.details);
+    throw error;
   }
+
+  return jsonResponse as T;
 }
 
-export async function UploadResume(fileContent: string): Promise<{ message: string; downloadUrl: string; lastModified?: string }> {
-  const endpoint = `${API_BASE_URL}/upload-resume`;
+// Two-phase upload: the API presigns a POST to a staging key, the file goes
+// straight to S3, and a finalize call verifies it and moves it into place.
+// Files whose hash is already stored are not sent at all.
+async function uploadFileDirect<T>(endpoint: string, file: File, label: string): Promise<T> {
   const token = localStorage.getItem('authToken');
-  
+
   if (!token) {
     throw new Error('Authentication required. Please log in.');
   }
 
   try {
-    const response = await fetch(endpoint, {
-      method: 'POST',
-      headers: getAuthHeaders(),
-      body: JSON.stringify({ file_content: fileContent }),
-    });
-
-    const jsonResponse = await response.json().catch(() => ({
-      message: `Request failed with status ${response.status} and no JSON error body.`,
-    }));
+    const upload = await postUploadAction<DirectUpload>(
+      endpoint,
+      { action: 'start', content_type: file.type, size: file.size, sha256: await sha256Hex(file) },
+      label,
+    );
+    if (upload.exists) {
+      return upload as unknown as T;
+    }
 
-    if (!response.ok) {
-      const error: ApiError = new Error(jsonResponse.message || `API Error: ${response.status} ${response.statusText}`);
-      error.statusCode = response.status;
-      error.details = jsonResponse;
-      console.error('UploadResume API error:', error.details);
+    const form = new FormData();
+    Object.entries(upload.fields).forEach(([name, value]) => form.append(name, value));
+    // S3 requires the file to be the last field
+    form.append('file', file);
+    const s3Response = await fetch(upload.url, { method: 'POST', body: form });
+    if (!s3Response.ok) {
+      const error: ApiError = new Error(`Failed to upload file: ${s3Response.status} ${s3Response.statusText}`);
+      error.statusCode = s3Response.status;
       throw error;
     }
 
-    return jsonResponse;
+    return await postUploadAction<T>(endpoint, { action: 'finalize', upload_key: upload.uploadKey }, label);
   } catch (error) {
-    console.error('Network or other error in UploadResume:', error);
+    console.error(`Network or other error in ${label}:`, error);
     if ((error as ApiError).statusCode) {
       throw error;
     }
-    const apiError: ApiError = new Error((error as Error).message || 'An unexpected error occurred during resume upload.');
+    const apiError: ApiError = new Error((error as Error).message || `An unexpected error occurred during ${label}.`);
     throw apiError;
   }
 }
 
+export async function UploadProfileImage(file: File): Promise<{ message: string; imageUrl: string; lastModified?: string }> {
+  return uploadFileDirect(`${API_BASE_URL}/upload-profile-image`, file, 'UploadProfileImage');
+}
+
+export async function UploadResume(file: File): Promise<{ message: string; downloadUrl: string; lastModified?: string }> {
+  return uploadFileDirect(`${API_BASE_URL}/upload-resume`, file, 'UploadResume');
+}
+
 export async function GetFile(fileURL: string) {
   try {
     const response = await fetch(fileURL, {
@@ -481,8 +492,8 @@ export async function GetWebAnalytics(dateRange: string = '7d') {
 };
 
 
-export async function GetBlogPostById(id: string) {
-  const endpoint = `${API_BASE_URL}/get-blog?id=${id}`;
+export async function GetBlogPostById(id: string, mode?: 'snapshot') {
+  const endpoint = `${API_BASE_URL}/get-blog?id=${id}${mode ? `&mode=${mode}` : ''}`;
   try {
     const response = await fetch(endpoint, {
       method: 'GET',
@@ -500,7 +511,8 @@ export async function GetBlogPostById(id: string) {
       console.error('GetBlogPostById API error:', error.details);
       throw error;
     }
-    const parsedData = JSON.parse(rawStringResponse);
+    // Older API versions double-encoded the post as a JSON string
+    const parsedData = typeof rawStringResponse === 'string' ? JSON.parse(rawStringResponse) : rawStringResponse;
     console.log('Parsed data (object):', parsedData);
 
     if (parsedData && typeof parsedData === 'object' && parsedData.id) {
@@ -626,8 +638,9 @@ export async function uploadFileToS3(fileName: string, file_content: any): Promi
 
 
 
-export async function getPresignedUrl(fileName: string): Promise<PresignedUrlApiResponse | null> {
-  const endpoint = `${API_BASE_URL}/get-presigned-url?fileName=${encodeURIComponent(fileName)}`;
+export async function getPresignedUrl(fileName: string, sha256?: string): Promise<PresignedUrlApiResponse | null> {
+  const hashParam = sha256 ? `&sha256=${sha256}` : '';
+  const endpoint = `${API_BASE_URL}/get-presigned-url?fileName=${encodeURIComponent(fileName)}${hashParam}`;
   if (!fileName) {
     console.error('File name or type is missing for presigned URL request.');
     return null;
@@ -650,4 +663,30 @@ export async function getPresignedUrl(fileName: string): Promise<PresignedUrlApi
     console.error('Error getting presigned URL:', error);
     throw error;
   }
-}
\ No newline at end of file
+}
+
+export async function getPresignedUrls(fileNames: string[]): Promise<BatchPresignedUrl[]> {
+  const endpoint = `${API_BASE_URL}/get-presigned-urls`;
+  if (!fileNames.length) {
+    return [];
+  }
+
+  try {
+    const response = await fetch(endpoint, {
+      method: 'POST',
+      headers: getAuthHeaders(),
+      body: JSON.stringify({ fileNames }),
+    });
+
+    if (!response.ok) {
+      throw new Error(`Failed to get presigned URLs: ${response.status} ${response.statusText}`);
+    }
+
+    const jsonResponse = await response.json();
+    return (jsonResponse.files || []) as BatchPresignedUrl[];
+
+  } catch (error) {
+    console.error('Error getting presigned URLs:', error);
+    throw error;
+  }
+}
@@ -124,34 +124,20 @@ const AdminDashboardPage: React.FC = () => {
       return;
     }
 
-    if (file.size > 5 * 1024 * 1024) { // 5MB limit
-      addToast('error', 'Resume file size must be less than 5MB');
+    if (file.size > 10 * 1024 * 1024) { // 10MB limit, also enforced by the upload policy
+      addToast('error', 'Resume file size must be less than 10MB');
       return;
     }
 
     try {
       setUploadingResume(true);
-
-      // Convert file to base64
-      const reader = new FileReader();
-      reader.onload = async () => {
-        try {
-          const base64Content = reader.result as string;
-          const base64Data = base64Content.split(',')[1]; // Remove data:application/pdf;base64, prefix
-
-          await UploadResume(base64Data);
-          addToast('success', 'Resume uploaded successfully');
-        } catch (error) {
-          console.error('Failed to upload resume:', error);
-          addToast('error', 'Failed to upload resume. Please try again.');
-        } finally {
-          setUploadingResume(false);
-        }
-      };
-      reader.readAsDataURL(file);
+      // The file goes straight to S3; the API only presigns and finalizes
+      await UploadResume(file);
+      addToast('success', 'Resume uploaded successfully');
     } catch (error) {
-      console.error('Failed to process resume file:', error);
-      addToast('error', 'Failed to process resume file');
+      console.error('Failed to upload resume:', error);
+      addToast('error', 'Failed to upload resume. Please try again.');
+    } finally {
       setUploadingResume(false);
     }
   };
@@ -165,34 +151,20 @@ const AdminDashboardPage: React.FC = () => {
       return;
     }
 
-    if (file.size > 2 * 1024 * 1024) { // 2MB limit (note: base64 encoding adds ~33% overhead)
-      addToast('error', 'Image file size must be less than 2MB. Please compress the image before uploading.');
+    if (file.size > 5 * 1024 * 1024) { // 5MB limit, also enforced by the upload policy
+      addToast('error', 'Image file size must be less than 5MB. Please compress the image before uploading.');
       return;
     }
 
     try {
       setUploadingProfile(true);
-
-      // Convert file to base64
-      const reader = new FileReader();
-      reader.onload = async () => {
-        try {
-          const base64Content = reader.result as string;
-          const base64Data = base64Content.split(',')[1]; // Remove data:image/...;base64, prefix
-
-          await UploadProfileImage(base64Data, file.type);
-          addToast('success', 'Profile image uploaded successfully');
-        } catch (error) {
-          console.error('Failed to upload profile image:', error);
-          addToast('error', 'Failed to upload profile image. Please try again.');
-        } finally {
-          setUploadingProfile(false);
-        }
-      };
-      reader.readAsDataURL(file);
+      // The file goes straight to S3; the API only presigns and finalizes
+      await UploadProfileImage(file);
+      addToast('success', 'Profile image uploaded successfully');
     } catch (error) {
-      console.error('Failed to process profile image:', error);
-      addToast('error', 'Failed to process profile image');
+      console.error('Failed to upload profile image:', error);
+      addToast('error', 'Failed to upload profile image. Please try again.');
+    } finally {
       setUploadingProfile(false);
     }
   };
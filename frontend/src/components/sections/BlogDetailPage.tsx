@@ -40,7 +40,7 @@ const BlogDetailPage: React.FC = () => {
       setLoading(true);
       setError('');
       try {
-        const data = await GetBlogPostById(blogId);
+        const data = await GetBlogPostById(blogId, 'snapshot');
         console.log('Fetched blog data:', data);
 
         if (data && typeof data === 'object' && data.id) {
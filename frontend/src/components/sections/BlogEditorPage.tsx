@@ -32,7 +32,7 @@ import html from 'highlight.js/lib/languages/xml';
 // --- Your Project Imports ---
 import { Link, useSearchParams } from 'react-router-dom';
 import './BlogEditorPage.css';
-import { CreateDraftBlogPost, UpdateBlogPost, GetBlogPostById, getPresignedUrl } from '../common/apiService';
+import { CreateDraftBlogPost, UpdateBlogPost, GetBlogPostById, getPresignedUrl, sha256Hex } from '../common/apiService';
 import { useToast } from '../common/ToastProvider';
 import { usePageTitle } from '../common/usePageTitle';
 import { useAuth } from '../../contexts/AuthContext';
@@ -280,17 +280,23 @@ const BlogEditorPage = () => {
       
       const imageKey = `posts/${blogId}/image_${imageCounter.current++}.${extension}`;
 
-      const presignedData = await getPresignedUrl(imageKey);
-      if (!presignedData || !presignedData.presignedUrl || !presignedData.publicUrl) {
+      // Images are stored under their content hash; the name only sets the type
+      const presignedData = await getPresignedUrl(imageKey, await sha256Hex(file));
+      if (!presignedData || !presignedData.publicUrl || (!presignedData.exists && !presignedData.presignedUrl)) {
         throw new Error('Invalid response from presigned URL endpoint.');
       }
 
-      // Upload to S3 using the presigned URL
-      await fetch(presignedData.presignedUrl, {
-        method: 'PUT',
-        headers: { 'Content-Type': file.type },
-        body: file
-      });
+      // Upload to S3 using the presigned URL, unless the same image is already stored
+      if (presignedData.presignedUrl) {
+        const uploadResponse = await fetch(presignedData.presignedUrl, {
+          method: 'PUT',
+          headers: presignedData.uploadHeaders || { 'Content-Type': file.type },
+          body: file
+        });
+        if (!uploadResponse.ok) {
+          throw new Error(`Upload failed: ${uploadResponse.status} ${uploadResponse.statusText}`);
+        }
+      }
 
       const finalImageUrl = presignedData.publicUrl;
 
@@ -27,6 +27,13 @@ const calculateReadTime = (htmlContent: string): number => {
   return readTime;
 };
 
+/**
+ * Reading time for a feed item: computed from content when the full post was
+ * fetched, otherwise the server-side estimate from the card projection.
+ */
+const getReadTime = (blog: Blog): number =>
+  blog.content ? calculateReadTime(blog.content) : (blog.reading_time || 1);
+
 /**
  * Formats a date string or Date object into a more readable format.
  * @param dateString The ISO date string from the database.
@@ -89,7 +96,7 @@ const BlogListPage: React.FC = () => {
 
   // Calculate stats
   const totalBlogs = blogs.length;
-  const totalReadTime = blogs.reduce((total, blog) => total + calculateReadTime(blog.content), 0);
+  const totalReadTime = blogs.reduce((total, blog) => total + getReadTime(blog), 0);
   const uniqueAuthors = new Set(blogs.map(blog => blog.author)).size;
 
   // Pagination
@@ -150,14 +157,16 @@ const BlogListPage: React.FC = () => {
       <div className="bloglist-grid">
         {currentBlogs.length > 0 ? (
           currentBlogs.map((blog) => {
-            const readTime = calculateReadTime(blog.content);
+            const readTime = getReadTime(blog);
             const publishDate = blog.published_at ? formatPublishDate(blog.published_at) : "Date not available";
             
             // Extract first image from images field
             let thumbnail: string | undefined = undefined;
-            if (blog.images) {
+            if (Array.isArray(blog.images)) {
+              thumbnail = blog.images[0];
+            } else if (blog.images) {
               try {
-                // Try to parse as JSON array
+                // Older API responses encoded the array as a JSON string
                 const imagesArray = JSON.parse(blog.images);
                 if (Array.isArray(imagesArray) && imagesArray.length > 0) {
                   thumbnail = imagesArray[0];
@@ -175,11 +184,12 @@ const BlogListPage: React.FC = () => {
                 key={blog.id}
                 id={blog.id}
                 title={blog.title}
-                content={blog.content}
+                content={blog.excerpt || blog.content || ''}
                 author={blog.author}
                 publishDate={publishDate}
                 readTimeInMinutes={readTime}
                 thumbnail={thumbnail}
+                thumbnailSource={blog.thumbnail}
                 tags={tags}
               />
             );
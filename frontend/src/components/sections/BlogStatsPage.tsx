@@ -22,6 +22,7 @@ interface BlogStatsData {
   status: string;
   createdAt: string;
   publishedAt?: string;
+  windowDays?: number;
   metrics: {
     totalViews: number;
     uniqueVisitors: number;
@@ -36,8 +37,14 @@ interface BlogStatsData {
     topReferrers: Array<{
       source: string;
       visits: number;
+      percentage?: number;
     }>;
   };
+  dailyViews?: Array<{
+    date: string;
+    views: number;
+    visitors: number;
+  }>;
 }
 
 const BlogStatsPage: React.FC = () => {
@@ -46,6 +46,16 @@ export interface ConfirmUserResponse {
 }
 
 // ===== BLOG TYPES =====
+// Responsive variants of an uploaded image; sources are ordered best format first
+export interface ImageSource {
+  url: string;
+  width: number | null;
+  height: number | null;
+  format: string | null;
+  sources: { type: string; srcset: string }[];
+  variants: { url: string; width: number; height: number; format: string }[];
+}
+
 export interface BlogPostData {
   id: string;
   title: string;
@@ -63,11 +73,15 @@ export interface BlogPostData {
 export interface Blog {
   id: string;
   title: string;
-  content: string;
+  content?: string;
+  excerpt?: string;
+  reading_time?: number;
   author: string;
   createdAt: string;
   published_at?: string;
-  images?: string;
+  images?: string[] | string | null;
+  thumbnail?: ImageSource | null;
+  imageSources?: ImageSource[];
   tags?: string[];
   [key: string]: any;
 }
@@ -86,9 +100,18 @@ export interface PresignedUrlResponse {
 }
 
 export interface PresignedUrlApiResponse {
-  presignedUrl: string;
+  // null when the same bytes are already stored (exists: true)
+  presignedUrl: string | null;
   publicUrl: string;
   fileName: string;
+  exists?: boolean;
+  // Headers the PUT must send with content-addressed uploads
+  uploadHeaders?: Record<string, string> | null;
+}
+
+export interface BatchPresignedUrl extends PresignedUrlApiResponse {
+  contentType: string;
+  downloadUrl: string;
 }
 
 // ===== COMPONENT PROP TYPES =====
@@ -111,6 +134,7 @@ export interface BlogCardProps {
   publishDate: string;
   readTimeInMinutes: number;
   thumbnail?: string;
+  thumbnailSource?: ImageSource | null;
   tags?: string[];
 }
 
@@ -12,11 +12,18 @@ interface AnalyticsEvent {
   additional_data?: Record<string, any>;
 }
 
+// Events are sent in batches: after a short quiet period, once the queue
+// fills up, or with sendBeacon when the page is hidden or unloaded.
+const FLUSH_DELAY_MS = 2000;
+const MAX_BATCH_SIZE = 20;
+
 class AnalyticsTracker {
   private apiBaseUrl: string;
   private sessionId: string;
   private userId?: string;
   private isEnabled: boolean;
+  private queue: AnalyticsEvent[] = [];
+  private flushTimer?: ReturnType<typeof setTimeout>;
 
   constructor() {
     this.apiBaseUrl = process.env.REACT_APP_API_BASE_URL || '';
@@ -55,6 +62,12 @@ class AnalyticsTracker {
 
     // Track clicks on external links
     this.trackExternalLinks();
+
+    // Deliver whatever is queued before the page goes away
+    document.addEventListener('visibilitychange', () => {
+      if (document.visibilityState === 'hidden') this.flush(true);
+    });
+    window.addEventListener('pagehide', () => this.flush(true));
   }
 
   private trackSPANavigation(): void {
@@ -131,8 +144,8 @@ class AnalyticsTracker {
       additional_data: additionalData
     };
 
-    // Send to analytics API
-    this.sendEvent(event);
+    // Queue for the next batch sent to the analytics API
+    this.enqueue(event);
   }
 
   public setUserId(userId: string): void {
@@ -153,14 +166,41 @@ class AnalyticsTracker {
     });
   }
 
-  private async sendEvent(event: AnalyticsEvent): Promise<void> {
+  private enqueue(event: AnalyticsEvent): void {
+    this.queue.push(event);
+    if (this.queue.length >= MAX_BATCH_SIZE) {
+      this.flush();
+      return;
+    }
+    clearTimeout(this.flushTimer);
+    this.flushTimer = setTimeout(() => this.flush(), FLUSH_DELAY_MS);
+  }
+
+  private flush(useBeacon: boolean = false): void {
+    clearTimeout(this.flushTimer);
+    if (!this.queue.length) return;
+    const events = this.queue.splice(0, this.queue.length);
+    this.sendEvents(events, useBeacon);
+  }
+
+  private async sendEvents(events: AnalyticsEvent[], useBeacon: boolean): Promise<void> {
+    const url = `${this.apiBaseUrl}/track-analytics`;
+    const body = JSON.stringify(events);
+
+    // A text/plain beacon survives page unload and needs no CORS preflight
+    if (useBeacon && navigator.sendBeacon &&
+        navigator.sendBeacon(url, new Blob([body], { type: 'text/plain' }))) {
+      return;
+    }
+
     try {
-      await fetch(`${this.apiBaseUrl}/track-analytics`, {
+      await fetch(url, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
         },
-        body: JSON.stringify(event),
+        body,
+        keepalive: useBeacon,
       });
     } catch (error) {
       // Silently fail - don't break the user experience
@@ -175,6 +215,7 @@ class AnalyticsTracker {
   }
 
   public disable(): void {
+    this.flush();
     this.isEnabled = false;
   }
 }